@@ -1,9 +1,8 @@
-from cgi import test
-import pandas as pd, numpy as np
+import math
 from datetime import datetime, timedelta
 from accounts import TestAccount
-import execution, time, indicators, structure_data
-import time
+import execution, time, indicators, structure_data, build_patterns, strategies
+import numpy as np
 
 ####################################
 ### Basic Historical Backtesting ###
@@ -28,21 +27,22 @@ def runBasicBacktest(account, symbols, params):
         N/A - updates TestAccount object
     '''
     
-    lstData = structure_data.getDaily()
+    # Candles indexed by (symbol, time) so each day's window is a binary search, not a scan; the
+    # index is cached, so every run of a tuning grid reuses the same one
+    indexData = structure_data.getDailyIndex()
+
+    # Mine (or load) the pattern model once for the whole run rather than once per candle, and
+    # let runStrategy read the ATR from the cached daily series, since the candles are stored ones
+    params = dict(params, **{"Pattern Model": build_patterns.getPatternModel('daily', params),
+                             "ATR Dataset": 'daily'})
     storeDate = params["Current Date"]
 
     for symbol in symbols:
         
-        # Initialize list of candles based on symbol once per symbol
-        lstCandlesSymbol = structure_data.setTradingData(lstData,
-                                                symbol,
-                                                params["Current Date"],
-                                                "ALL")
-        
         while params["Current Date"] < params["Trade End"]:
 
             # Reinitialize subset list per day to simulate moving window
-            lstCandles = structure_data.setTradingData(lstCandlesSymbol,
+            lstCandles = structure_data.setTradingData(indexData,
                                                 symbol,
                                                 params["Current Date"],
                                                 params["Candles"])
@@ -52,49 +52,98 @@ def runBasicBacktest(account, symbols, params):
         
         params["Current Date"] = storeDate
 
-def getValidSymbols(params):
+def applySignals(account, symbol, series, signals, indices):
     '''
-    Function to test which symbols in symbols.csv have enough data history for a given set of params
+    Replays a strategy's precomputed signals through an account, one candle at a time in the same
+    order runStrategy works: open any new positions, then update and close the symbol's positions
 
     Args:
-        listsymbols (lst of dicts): sourced from symbols.csv
-        params (dict): set of dates and windows for a given backtesting strategy
-    
+        account (TestAccount): account object to manage trade accounting
+        symbol (str): symbol the series belongs to
+        series (CandleSeries): the symbol's candles
+        signals (dict): output of a strategy's generate_signals for the series
+        indices (list): candle positions to trade on, in order (a position may repeat)
+
     Returns:
-        validSymbols (lst): list of symbols that have sufficient data for a test to be executed
+        N/A - updates TestAccount object
     '''
-    
-    # Initialize a list with all candles data available per get-data and all symbols in list
-    lstCandles = execution.getDaily()
-    lstSymbols = execution.getSymbols()
-    
-    # Set a variable for the oldest date per the params 
-    dateOldestDate = params["Current Date"] - timedelta(days = int(params["Candles"]))
+    lstTimes = series.time.tolist()
+    lstDirection, lstEntries = signals["direction"].tolist(), signals["entries"].tolist()
+    lstPrice, lstStop, lstTarget = signals["price"].tolist(), signals["stop"].tolist(), signals["target"].tolist()
+
+    for i in indices:
+        floatPrice = lstPrice[i]
+        dateEffective = datetime.fromtimestamp(lstTimes[i]) + timedelta(days = 1)
+
+        for j in range(lstEntries[i]):
+            account.open_position("buy" if lstDirection[i] == strategies.BUY else "short",
+                        symbol,
+                        floatPrice,
+                        account.trade_value / floatPrice,
+                        lstStop[i],
+                        lstTarget[i],
+                        dateEffective)
+
+        account.update_positions(symbol, floatPrice, dateEffective)
+        account.close_positions(symbol, floatPrice, dateEffective)
+
+def runSignalBacktest(account, symbols, strategy, params):
+    '''
+    Same day-by-day walk as runBasicBacktest, but the strategy's signals for each symbol's whole
+    history come from one generate_signals call instead of a runStrategy call per day
+
+    Args:
+        account (TestAccount): account object to manage trade accounting
+        symbols (lst): list of symbols to take into consideration
+        strategy (object): strategy plugin with generate_signals(series, params), see strategies.STRATEGIES
+        params (dict): set of dates and windows to be used for trading date scenarios and generating indicators
 
-    # Set a list to collect the symbols whose earliest data meets the params conditions
-    lstValidSymbols = []
+    Returns:
+        N/A - updates TestAccount object
+    '''
+    if 'daily' not in strategy.datasets:
+        print('runSignalBacktest error: strategy does not run on daily candles, choose one of',
+              strategies.getStrategyNames('daily'))
+        return None
+
+    dictSeries = structure_data.getDailySeries(symbols)
+    params = dict(params, **{"Profit Multiple": account.profit_multiple, "Stop Loss": account.stop_loss})
+
+    # Trading dates, as runBasicBacktest steps through them
+    lstDates = []
+    dateCurrent = params["Current Date"]
+    while dateCurrent < params["Trade End"]:
+        lstDates.append(dateCurrent.timestamp())
+        dateCurrent = dateCurrent + timedelta(days = 1)
+    floatDates = np.array(lstDates)
+    floatWindow = timedelta(days = int(params["Candles"])).total_seconds()
 
-    # Iterate through all symbols in symbols.csv
-    for symbol in lstSymbols:
+    for symbol in symbols:
 
-        # Initialize a variable with today's date, to be updated with the oldest record for the symbol
-        dateSymbolOldest = datetime.today()
+        # Skip symbols that have no daily candles
+        if symbol not in dictSeries:
+            continue
+        seriesSymbol = dictSeries[symbol]
 
-        # Iterate through all candle data
-        for candle in lstCandles:
+        # The latest candle on each date, skipping dates whose Candles-day window holds no candles
+        intLast = np.searchsorted(seriesSymbol.time, floatDates, side='right') - 1
+        boolTrade = intLast >= 0
+        boolTrade[boolTrade] = seriesSymbol.time[intLast[boolTrade]] > floatDates[boolTrade] - floatWindow
 
-            # Check for match with given symbol from symbols.csv
-            if candle["symbol"] == symbol["symbol"]:
+        applySignals(account, symbol, seriesSymbol, strategy.generate_signals(seriesSymbol, params), intLast[boolTrade].tolist())
 
-                # Check to see if the candle's date is older than dateOldest, update if so
-                if datetime.fromtimestamp(int(candle["time"])) < dateSymbolOldest:
-                    dateSymbolOldest = datetime.fromtimestamp(int(candle["time"]))
-            
-        # Check to see if the dateSymbolOldest is older than the param's earliest time period
-        if dateSymbolOldest < dateOldestDate:
-            lstValidSymbols.append(symbol["symbol"])
+def getValidSymbols(params):
+    '''
+    Function to test which symbols in symbols.csv have enough data history for a given set of params
+    See structure_data.getValidSymbols, which answers this from the daily data catalog
+
+    Args:
+        params (dict): set of dates and windows for a given backtesting strategy
     
-    return lstValidSymbols
+    Returns:
+        validSymbols (lst): list of symbols that have sufficient data for a test to be executed
+    '''
+    return structure_data.getValidSymbols(params)
 
 ##############################
 ### Define scenarios here ####
@@ -199,6 +248,7 @@ testParams = {"Trade Start": datetime(2021, 3, 6, 23, 59, 59),
                 "Candles": 210,
                 "Trend": 5,
                 "Pattern": 10,
+                "Scoring Range": 3,
                 "ATR": 14,
                 "Short EMA": 20,
                 "Long EMA": 200,
@@ -213,7 +263,7 @@ testParams = {"Trade Start": datetime(2021, 3, 6, 23, 59, 59),
 def getSize(paramGrid):
     keys, valuesList = zip(*sorted(paramGrid.items())[::-1])
     sizes = [len(vList) for vList in valuesList]
-    total = np.product(sizes)
+    total = math.prod(sizes)
     return total 
 
 def getItem(paramGrid, ind):
@@ -247,7 +297,7 @@ def getItem(paramGrid, ind):
         # Reverse so most frequent cycling parameter comes first
         keys, valuesList = zip(*sorted(subGrid.items())[::-1])
         sizes = [len(vList) for vList in valuesList]
-        total = np.product(sizes)
+        total = math.prod(sizes)
 
         if ind >= total:
             # Try the next grid
@@ -289,12 +339,13 @@ paramGrid = {"Trade Start": [datetime(2021, 5, 31, 23, 59, 59)],
                 "Current Date": [datetime(2021, 5, 31, 23, 59, 59)],
                 "Trade End": [datetime(2022, 1, 19, 23, 59, 59)],
                 "Candles": [365], # was 210 (i think it's just the max of other params?, for now just setting to 365 even if 365 isnt needed)
-                "Trend": np.arange(4, 7, 1), # was 5
-                "Pattern": np.arange(4, 7, 1), # was 5
-                "ATR": np.arange(7, 22, 7), # was 14
-                "Short EMA": np.arange(10, 50, 10), # was 20
-                "Long EMA": np.arange(100, 301, 50), # was 200
-                "RSI": np.arange(7, 22, 7) # was 14
+                "Trend": list(range(4, 7, 1)), # was 5
+                "Pattern": list(range(4, 7, 1)), # was 5
+                "Scoring Range": [3],
+                "ATR": list(range(7, 22, 7)), # was 14
+                "Short EMA": list(range(10, 50, 10)), # was 20
+                "Long EMA": list(range(100, 301, 50)), # was 200
+                "RSI": list(range(7, 22, 7)) # was 14
             } 
 
 # RUN THIS SECTION TO RUN HYPERPARAMTER TUNING. HOWEVER IT CAN TAKE A WHILE, SO COMMENTING OUT FOR NOW. 
@@ -303,7 +354,7 @@ paramGrid = {"Trade Start": [datetime(2021, 5, 31, 23, 59, 59)],
 # print(testParams)
 
 # THIS WAS THE OUTPUT OF THE PREVIOUS TUNING
-testParams = {'Trend': 6, 'Trade Start': datetime(2021, 5, 31, 23, 59, 59), 'Trade End': datetime(2022, 1, 19, 23, 59, 59), 'Short EMA': 40, 'RSI': 21, 'Pattern': 6, 'Long EMA': 300, 'Current Date': datetime(2021, 5, 31, 23, 59, 59), 'Candles': 365, 'ATR': 21}
+testParams = {'Trend': 6, 'Trade Start': datetime(2021, 5, 31, 23, 59, 59), 'Trade End': datetime(2022, 1, 19, 23, 59, 59), 'Short EMA': 40, 'RSI': 21, 'Pattern': 6, 'Scoring Range': 3, 'Long EMA': 300, 'Current Date': datetime(2021, 5, 31, 23, 59, 59), 'Candles': 365, 'ATR': 21}
 
 ### RUN THIS SECTION AFTER testParams HAS BEEN CONFIGURED ###
 
@@ -405,25 +456,41 @@ for position in accountAlpha.open_positions:
 '''
 
 # TEST ALL SCENARIOS
-mostRecent30 = [scenarios[0]] # test on only most recent 30 days for now...
-for scenarioX in scenarios:# mostRecent30: 
+def runScenarios(params, scenarios, strategy=None):
+    '''
+    Runs a fresh TestAccount through each scenario's date range and prints a summary per scenario
 
-    accountAlpha = TestAccount(balance = 5000, profit = 3, stoploss = 1.5)
-    
-    testParams["Trade Start"] = scenarioX["start"]
-    testParams["Current Date"] = testParams["Trade Start"]
-    testParams["Trade End"] = scenarioX["end"]
+    Args:
+        params (dict): set of windows to test with; trade dates are overwritten per scenario
+        scenarios (lst): list of scenario dicts with name, start and end
+        strategy (object): strategy plugin to run through runSignalBacktest; runStrategy via runBasicBacktest if None
 
-    testSymbols = getValidSymbols(testParams)
+    Returns:
+        N/A - prints results
+    '''
+    for scenarioX in scenarios:
 
-    runBasicBacktest(accountAlpha, testSymbols, testParams)
-    
-    print(scenarioX["name"])
-    print("Total Positions:", len(accountAlpha.open_positions))
-    print("Final Account Balance:", accountAlpha.balance)
-    print("Profit / Loss:", accountAlpha.balance - 5000)
-    print("Maximum Account Drawdown:", accountAlpha.max_drawdown)
-    print()
+        accountAlpha = TestAccount(balance = 5000, profit = 3, stoploss = 1.5)
+
+        params["Trade Start"] = scenarioX["start"]
+        params["Current Date"] = params["Trade Start"]
+        params["Trade End"] = scenarioX["end"]
+
+        testSymbols = getValidSymbols(params)
+
+        if strategy is None:
+            runBasicBacktest(accountAlpha, testSymbols, params)
+        else:
+            runSignalBacktest(accountAlpha, testSymbols, strategy, params)
+
+        print(scenarioX["name"])
+        print("Total Positions:", len(accountAlpha.open_positions))
+        print("Final Account Balance:", accountAlpha.balance)
+        print("Profit / Loss:", accountAlpha.balance - 5000)
+        print("Maximum Account Drawdown:", accountAlpha.max_drawdown)
+        print()
+
+mostRecent30 = [scenarios[0]] # test on only most recent 30 days for now...
 
 
 # # data = pd.read_csv('data/daily.csv', index_col=None)
@@ -449,4 +516,7 @@ for scenarioX in scenarios:# mostRecent30:
 #         account = strategy.runStrategy(datetime.fromtimestamp(curr), account, currParams) # TODO: make this the interface for runStrategy
 #         curr += granularity
 #         if account.balance < 0.2 * startingBalance: 
-#             break
\ No newline at end of file
+#             break
+
+if __name__ == '__main__':
+    runScenarios(testParams, scenarios)
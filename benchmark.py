@@ -0,0 +1,398 @@
+import json, os, time, tracemalloc
+import numpy as np
+import indicators, build_candles, build_patterns, candle_series
+
+# Micro-benchmarks for the hot indicator and data-path functions. Each case runs on a synthetic
+# random-walk series of a given number of candles (the same seed always gives the same candles),
+# reports throughput and peak traced memory, and reduces its output to a small numeric digest.
+#
+# Correctness: digests are compared against data/benchmark-golden.json, which is recorded (--record)
+# from the scalar implementations the vectorized functions replaced (REFERENCES below: the scalar
+# indicators called once per window or prefix, and the original SuperTrend / window scoring
+# loops), so a digest that differs means the current code no longer reproduces them. Scalar
+# references that are too slow for a size are capped; larger sizes are then timed but not checked.
+#
+# Speed: the scalar reference is timed in the same run on the same machine, and a case is flagged
+# if the current path is not at least min-speedup times faster than it. Absolute timings are
+# reported only, since they depend on the machine.
+#
+#   python cli.py bench [--sizes 1000 100000] [--cases sma rsi] [--record] [--min-speedup 1]
+
+GOLDEN_FILE = 'data/benchmark-golden.json'
+SIZES = [1000, 10000, 100000]
+MIN_SPEEDUP = 1.0 # the current path must be at least this many times faster than the scalar one
+RTOL = 1e-9 # allowed relative difference in digest values (summation order may change)
+MIN_SECONDS = 0.001 # slowdowns smaller than this are timer noise, never flagged
+REPEATS = 3 # timing is the best of this many runs
+DIGEST_POINTS = 8 # evenly spaced sample values kept in each digest
+
+
+def getSyntheticSeries(size, seed=0, symbol="SYN-USD"):
+    """
+    Args:
+        size (int): number of candles
+        seed (int): random seed; the same seed always produces the same candles
+        symbol (str): symbol stored on the series
+
+    Returns:
+        CandleSeries: one-minute candles following a geometric random walk
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    open = np.concatenate(([100.0], close[:-1]))
+    high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.005, size)))
+    low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.005, size)))
+    volume = rng.lognormal(3, 1, size)
+    timestamps = 1609459200 + 60 * np.arange(size)
+    return candle_series.CandleSeries(symbol, timestamps, low, high, open, close, volume)
+
+
+def runVolumeCandles(series):
+    lstCandles = series.toDicts()
+    floatVolume = float(np.mean(series.volume)) * 60 # about one volume candle per hour of minutes
+    lstVolumeCandles = build_candles.buildVolumeCandles(lstCandles, floatVolume)
+    return [float(x["close"]) for x in lstVolumeCandles]
+
+
+def runWindowScores(series):
+    lstPatterns = build_patterns.getWindowScores(series, [], {"Pattern": 6, "Scoring Range": 5})
+    return [x["strength"] for x in lstPatterns] + [sum(x["sequence"]) for x in lstPatterns]
+
+
+# Case name -> (function(series) returning numbers, largest size worth running)
+CASES = {"sma": (lambda s: indicators.getSMASeries(s.close, 20), 10 ** 7),
+         "ema": (lambda s: indicators.getEMASeries(s.close, 20), 10 ** 7),
+         "atr": (lambda s: indicators.getATRSeries(s.high, s.low, 14), 10 ** 7),
+         "rsi": (lambda s: indicators.getRSISeries(s.open, s.close, 14), 10 ** 7),
+         "supertrend": (lambda s: indicators.getSuperTrend(s), 10 ** 7),
+         "trend": (lambda s: np.concatenate(indicators.getTrendSeries(s.low, s.high, 5)), 10 ** 7),
+         "engulfing": (lambda s: indicators.getEngulfingSeries(s.open, s.close), 10 ** 7),
+         "volume_candles": (runVolumeCandles, 10 ** 6),
+         "window_scores": (runWindowScores, 10 ** 6)}
+
+
+###### Scalar references #####
+# The implementations the cases replaced, run on candle dicts. Each returns the same numbers as
+# its case. The scalar indicators still in indicators.py are called the way the old code did, per
+# window or per prefix; the SuperTrend and window-scoring loops are kept here as they were.
+
+def scalarSuperTrend(candles, timeperiod=10, multiplier=3):
+    """
+    indicators.getSuperTrend before it took every window's ATR in one pass: getATR re-summed each window
+
+    Args:
+        candles (list): candle dicts
+        timeperiod (int): window to examine trend data
+        multiplier (int): magnitude factor for supertrend
+
+    Returns:
+        list: supertrend data for the given set of candles
+    """
+    lstStart = candles[0:timeperiod + 1]
+    intCounter = timeperiod + 1
+
+    prevFinalUpper = 99999999
+    prevFinalLower = -99999999
+    prevSuperTrend = 0
+    superTrend = prevFinalUpper
+
+    lstSuperTrend = []
+
+    while intCounter < len(candles):
+
+        floatATR = indicators.getATR(lstStart)
+
+        basicUpper = ((float(lstStart[-1]["high"]) + float(lstStart[-1]["low"])) / 2) + (multiplier * floatATR)
+        basicLower = ((float(lstStart[-1]["high"]) + float(lstStart[-1]["low"])) / 2) - (multiplier * floatATR)
+
+        if basicUpper < prevFinalUpper or float(lstStart[len(lstStart) - 2]["close"]) > prevFinalUpper:
+            finalUpper = basicUpper
+        else:
+            finalUpper = prevFinalUpper
+
+        if basicLower > prevFinalLower or float(lstStart[len(lstStart) - 2]["close"]) < prevFinalLower:
+            finalLower = basicLower
+        else:
+            finalLower = prevFinalLower
+
+        if prevSuperTrend == prevFinalUpper and float(lstStart[-1]["close"]) < finalUpper:
+            superTrend = finalUpper
+        elif prevSuperTrend == prevFinalUpper and float(lstStart[-1]["close"]) > finalUpper:
+            superTrend = finalLower
+        elif prevSuperTrend == prevFinalLower and float(lstStart[-1]["close"]) > finalLower:
+            superTrend = finalLower
+        elif prevSuperTrend == prevFinalLower and float(lstStart[-1]["close"]) < finalLower:
+            superTrend = finalUpper
+
+        lstSuperTrend.append(superTrend)
+
+        prevFinalUpper = finalUpper
+        prevFinalLower = finalLower
+        prevSuperTrend = superTrend
+
+        lstStart.append(candles[intCounter])
+        lstStart.pop(0)
+        intCounter += 1
+
+    return lstSuperTrend
+
+
+def scalarWindowScores(candles, params):
+    """
+    build_patterns.getWindowScores before rolling highs / lows and the sequence index: every window
+    is scanned for its high and low, and matched against the pattern list one item at a time
+
+    Args:
+        candles (list): candle dicts
+        params (dict): "Pattern" and "Scoring Range"
+
+    Returns:
+        list: pattern dicts (sequence, signal, strength) in order of first appearance
+    """
+    lstPatterns = []
+    lstEval = candles[0:int(params["Pattern"])]
+    intCounter = int(params["Pattern"])
+
+    while intCounter < len(candles):
+        floatHigh = 0.00
+        floatLow = 9999999999999.00
+        for candle in lstEval:
+            if float(candle["close"]) > floatHigh:
+                floatHigh = float(candle["close"])
+            if float(candle["close"]) < floatLow:
+                floatLow = float(candle["close"])
+
+        floatIndex = (floatHigh - floatLow) / params["Scoring Range"]
+        dictCurrent = {"sequence": [], "signal": None, "strength": 1}
+        for candle in lstEval:
+            dictCurrent["sequence"].append(int(round((float(candle["close"]) - floatLow) / floatIndex, 0)))
+
+        if float(dictCurrent["sequence"][-1]) > float(dictCurrent["sequence"][-2]):
+            dictCurrent["signal"] = "buy"
+        elif float(dictCurrent["sequence"][-1]) < float(dictCurrent["sequence"][-2]):
+            dictCurrent["signal"] = "short"
+        else:
+            dictCurrent["signal"] = False
+
+        boolMatch = False
+        for item in lstPatterns:
+            if dictCurrent["sequence"] == item["sequence"]:
+                item["strength"] += 1
+                boolMatch = True
+        if boolMatch == False:
+            lstPatterns.append(dictCurrent)
+
+        lstEval.append(candles[intCounter])
+        lstEval.pop(0)
+        intCounter += 1
+
+    return lstPatterns
+
+
+def scalarWindows(candles, length, function):
+    # function(window) for the window of `length` candles ending at each candle, NaN before the first
+    return [np.nan] * min(length - 1, len(candles)) + \
+        [function(candles[i - length + 1:i + 1]) for i in range(length - 1, len(candles))]
+
+
+def scalarPrefixes(candles, length, function):
+    # function(candles up to and including each candle), NaN before the first `length` candles
+    return [np.nan] * min(length - 1, len(candles)) + \
+        [function(candles[:i + 1]) for i in range(length - 1, len(candles))]
+
+
+def scalarTrend(candles, length):
+    # risingCheck for the window ending at each candle, then fallingCheck; False before the first window
+    lstRising = [False] * min(length - 1, len(candles)) + \
+        [indicators.risingCheck(candles[i - length + 1:i + 1]) for i in range(length - 1, len(candles))]
+    lstFalling = [False] * min(length - 1, len(candles)) + \
+        [indicators.fallingCheck(candles[i - length + 1:i + 1]) for i in range(length - 1, len(candles))]
+    return lstRising + lstFalling
+
+
+def scalarEngulfing(candles):
+    lstMasks = [0] if len(candles) > 0 else []
+    for oldcandle, newcandle in zip(candles, candles[1:]):
+        result = indicators.getEngulfing(oldcandle, newcandle)
+        lstMasks.append(0 if result == "Non-Engulfing" or not result[1] else
+                        indicators.BULLISH if result[0] == "Bullish" else indicators.BEARISH)
+    return lstMasks
+
+
+def scalarWindowScoresDigest(candles):
+    lstPatterns = scalarWindowScores(candles, {"Pattern": 6, "Scoring Range": 5})
+    return [x["strength"] for x in lstPatterns] + [sum(x["sequence"]) for x in lstPatterns]
+
+
+# Case name -> (scalar function(candle dicts) returning the case's numbers, largest size it is run
+# at). volume_candles has no entry: buildVolumeCandles is still the scalar loop, so its golden
+# digest is recorded from the case itself and its speed is only reported.
+REFERENCES = {"sma": (lambda c: scalarWindows(c, 20, indicators.getSMA), 10 ** 5),
+              "ema": (lambda c: scalarPrefixes(c, 20, lambda x: indicators.getEMA(x, 20)), 10 ** 3),
+              "atr": (lambda c: scalarWindows(c, 14, indicators.getATR), 10 ** 5),
+              "rsi": (lambda c: scalarPrefixes(c, 14, lambda x: indicators.getRSI(x, 14)), 10 ** 3),
+              "supertrend": (scalarSuperTrend, 10 ** 5),
+              "trend": (lambda c: scalarTrend(c, 5), 10 ** 5),
+              "engulfing": (scalarEngulfing, 10 ** 5),
+              "window_scores": (scalarWindowScoresDigest, 10 ** 4)}
+
+
+def getDigest(values):
+    """
+    Args:
+        values (array): a case's numeric output
+
+    Returns:
+        dict: length, NaN count, sum, sum of absolute values and evenly spaced sample values
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    finite = values[~np.isnan(values)]
+    lstIndex = np.linspace(0, len(values) - 1, DIGEST_POINTS).astype(int).tolist() if len(values) > 0 else []
+    return {"length": len(values),
+            "nan": int(len(values) - len(finite)),
+            "sum": float(np.sum(finite)),
+            "abs": float(np.sum(np.abs(finite))),
+            "points": [None if np.isnan(values[i]) else float(values[i]) for i in lstIndex]}
+
+
+def compareDigest(digest, golden):
+    """
+    Args:
+        digest (dict): digest of the current run
+        golden (dict): recorded digest
+
+    Returns:
+        str: description of the first difference, or None if they match
+    """
+    for key in ["length", "nan"]:
+        if digest[key] != golden[key]:
+            return key + " " + str(digest[key]) + " != " + str(golden[key])
+    for key in ["sum", "abs"]:
+        if not np.isclose(digest[key], golden[key], rtol=RTOL, atol=0):
+            return key + " " + repr(digest[key]) + " != " + repr(golden[key])
+    for i, (x, y) in enumerate(zip(digest["points"], golden["points"])):
+        if (x is None) != (y is None) or (x is not None and not np.isclose(x, y, rtol=RTOL, atol=0)):
+            return "point " + str(i) + " " + repr(x) + " != " + repr(y)
+    return None
+
+
+def runCase(name, size, repeats=REPEATS):
+    """
+    Args:
+        name (str): key of CASES
+        size (int): number of synthetic candles
+        repeats (int): timing runs; the fastest is reported
+
+    Returns:
+        dict: seconds, candles per second, peak traced MB and output digest; where the scalar
+            reference runs at this size, also its seconds, the speedup over it and its digest
+    """
+    function = CASES[name][0]
+    series = getSyntheticSeries(size)
+
+    floatSeconds = None
+    for i in range(repeats):
+        floatStart = time.perf_counter()
+        output = function(series)
+        floatElapsed = time.perf_counter() - floatStart
+        if floatSeconds is None or floatElapsed < floatSeconds:
+            floatSeconds = floatElapsed
+
+    # Memory is measured on a separate run, since tracing slows the timed code down
+    tracemalloc.start()
+    function(series)
+    intPeak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    dictResult = {"seconds": floatSeconds,
+                  "throughput": size / floatSeconds if floatSeconds > 0 else float('inf'),
+                  "peak_mb": intPeak / (1024 * 1024),
+                  "digest": getDigest(output)}
+
+    # The scalar reference is slow, so it is timed once; candle dicts are built outside the timing
+    if name in REFERENCES and size <= REFERENCES[name][1]:
+        lstCandles = series.toDicts()
+        floatStart = time.perf_counter()
+        reference = REFERENCES[name][0](lstCandles)
+        dictResult["scalar_seconds"] = time.perf_counter() - floatStart
+        dictResult["speedup"] = dictResult["scalar_seconds"] / floatSeconds if floatSeconds > 0 else float('inf')
+        dictResult["scalar_digest"] = getDigest(reference)
+    return dictResult
+
+
+def readGolden(file=GOLDEN_FILE):
+    """
+    Returns:
+        dict: "<case>/<size>" -> recorded digest, empty if nothing has been recorded
+    """
+    if not os.path.exists(file):
+        return {}
+    with open(file) as f:
+        return json.load(f)
+
+
+def runBenchmarks(sizes=SIZES, cases=None, record=False, minSpeedup=MIN_SPEEDUP, file=GOLDEN_FILE):
+    """
+    Runs every case at every size, prints a results table and checks it against the golden file
+    and the scalar references
+
+    Args:
+        sizes (list): numbers of candles to run each case on
+        cases (list): names from CASES; all of them if None
+        record (bool): write the scalar references' digests to the golden file instead of checking
+        minSpeedup (float): how many times faster than its scalar reference a case must run
+        file (str): golden results file
+
+    Returns:
+        list: regression messages, empty if everything matched
+    """
+    dictGolden = readGolden(file)
+    lstRegressions = []
+    print("%-16s %10s %12s %16s %10s %10s  %s" % ("case", "candles", "seconds", "candles/s", "peak MB", "speedup", "status"))
+
+    for name in (cases or list(CASES)):
+        for size in sizes:
+            if size > CASES[name][1]:
+                print("%-16s %10d %12s %16s %10s %10s  %s" % (name, size, "-", "-", "-", "-", "skipped (too large)"))
+                continue
+
+            strKey = name + "/" + str(size)
+            dictResult = runCase(name, size)
+            strSpeedup = "x" + str(round(dictResult["speedup"], 1)) if "speedup" in dictResult else "-"
+            strStatus = "no golden"
+
+            if record:
+                # Golden digests come from the scalar reference; cases without one record themselves
+                if "scalar_digest" in dictResult:
+                    dictGolden[strKey] = {"digest": dictResult["scalar_digest"], "source": "scalar"}
+                    strStatus = "recorded"
+                elif name not in REFERENCES:
+                    dictGolden[strKey] = {"digest": dictResult["digest"], "source": "case"}
+                    strStatus = "recorded"
+                else:
+                    dictGolden.pop(strKey, None)
+                    strStatus = "not recorded (scalar reference capped)"
+            else:
+                if strKey in dictGolden:
+                    strDiff = compareDigest(dictResult["digest"], dictGolden[strKey]["digest"])
+                    strStatus = "ok"
+                    if strDiff is not None:
+                        strStatus = "WRONG OUTPUT: " + strDiff
+                        lstRegressions.append(strKey + " output changed: " + strDiff)
+
+                # Relative speed check against the scalar path timed on this machine just now
+                if "speedup" in dictResult and dictResult["speedup"] < minSpeedup and \
+                    dictResult["seconds"] - dictResult["scalar_seconds"] / minSpeedup > MIN_SECONDS:
+                    strStatus += ", TOO SLOW: need x" + str(minSpeedup)
+                    lstRegressions.append(strKey + " runs " + strSpeedup + " the speed of the scalar reference, " +
+                                          "below the required x" + str(minSpeedup))
+
+            print("%-16s %10d %12.5f %16.0f %10.1f %10s  %s" % (name, size, dictResult["seconds"],
+                  dictResult["throughput"], dictResult["peak_mb"], strSpeedup, strStatus))
+
+    if record:
+        with open(file, 'w') as f:
+            json.dump(dictGolden, f, indent=1, sort_keys=True)
+        print("Wrote", file)
+
+    return lstRegressions
@@ -1,8 +1,8 @@
-from turtle import update
-import execution, csv
+import structure_data, candle_series, candle_store, csv, itertools
+from collections import deque
 
-lstTestBTC = execution.getMinute()
-lstSymbols = execution.getSymbols()
+# Number of minute candles per setVolumeLimit window
+WINDOWS = {"hour": 60, "day": 1440, "week": 10080, "month": 43800}
 
 # Takes a set of candles and a window parameter to determine the volume limit to be used when
 # rebuilding volume-based candles
@@ -28,19 +28,7 @@ def setVolumeLimit(candles, params):
     floatVolumeSum = 0.00
 
     # Convert window parameter (str) into corresponding # of candles, set to intWindow variable:
-    intWindow = 0
-    
-    if params["window"] == "hour":
-        intWindow = 60
-    
-    elif params["window"] == "day":
-        intWindow = 1440
-    
-    elif params["window"] == "week":
-        intWindow = 10080
-
-    elif params["window"] == "month":
-        intWindow = 43800
+    intWindow = WINDOWS.get(params["window"], 0)
 
     # First check if there are enough candles based on the params
     if len(candles) < (intWindow * params["range"]):
@@ -54,9 +42,11 @@ def setVolumeLimit(candles, params):
     # For example, if we are taking minute-level candles, the window parameter is daily (groups of
     # 1440 candles) and the range is 30 (take the 30 day average), we just need to take 1440 * 30
     # candles (43200) and divide the total volume by 30.
+    # This is one sum over one slice per call, so there is nothing for rolling.rollingSum to share
+    # between windows; the sequential sum also keeps data/volume.csv byte-identical.
     else:
        lstSubset = candles[len(candles)-(intWindow * params["range"]):]
-       floatVolumeSum = sum(float(item["volume"]) for item in lstSubset)
+       floatVolumeSum = sum(candle_series.getColumn(lstSubset, "volume"))
     
     return floatVolumeSum / params["range"]
 
@@ -78,6 +68,12 @@ def buildVolumeCandles(candles, volume):
 
         dictParsedCandle = candle
 
+        # Parse the fields used below once per candle
+        floatVolume = float(dictParsedCandle["volume"])
+        floatClose = float(dictParsedCandle["close"])
+        floatHigh = float(dictParsedCandle["high"])
+        floatLow = float(dictParsedCandle["low"])
+
         # If current candle is empty, check for a partial candle
         if len(dictCurrentCandle) == 0:
             
@@ -85,8 +81,8 @@ def buildVolumeCandles(candles, volume):
             if len(dictPartialCandle) == 0:
             
                 dictCurrentCandle = dictParsedCandle.copy()
-                floatRunningAmount += float(dictParsedCandle["volume"]) * float(dictParsedCandle["close"])
-                floatRunningVolume += float(dictParsedCandle["volume"])
+                floatRunningAmount += floatVolume * floatClose
+                floatRunningVolume += floatVolume
             
             # If the partial candle isn't empty, initialize the current candle with the partial candle
             # and add the values from the parsed candle, checking highs and lows as you go
@@ -96,13 +92,13 @@ def buildVolumeCandles(candles, volume):
                 floatRunningAmount += float(dictPartialCandle["volume"]) * float(dictPartialCandle["close"])
                 floatRunningVolume += float(dictPartialCandle["volume"])
 
-                floatRunningAmount += float(dictParsedCandle["volume"]) * float(dictParsedCandle["close"])
-                floatRunningVolume += float(dictParsedCandle["volume"])
+                floatRunningAmount += floatVolume * floatClose
+                floatRunningVolume += floatVolume
 
-                if float(dictParsedCandle["high"]) > float(dictCurrentCandle["high"]):
+                if floatHigh > float(dictCurrentCandle["high"]):
                     dictCurrentCandle["high"] = dictParsedCandle["high"]
         
-                elif float(dictParsedCandle["low"]) < float(dictCurrentCandle["low"]):
+                elif floatLow < float(dictCurrentCandle["low"]):
                     dictCurrentCandle["low"] = dictParsedCandle["low"]
 
         # Else if the currently accumulated volume is less than the volume limit...
@@ -112,14 +108,14 @@ def buildVolumeCandles(candles, volume):
             # Note: in the unlikely event the parsed candle volume EXACTLY meets the volume limit,
             # a partial candle will be initialized with zero volume, which has no impact on the
             # weighted price calculation for the next volume candle
-            if floatRunningVolume + float(dictParsedCandle["volume"]) >= volume:
+            if floatRunningVolume + floatVolume >= volume:
 
                 # Set the partial candle to the parsed candle and update its volume to the remainder volume
                 dictPartialCandle = dictParsedCandle.copy()
-                dictPartialCandle["volume"] = float(dictParsedCandle["volume"]) - (volume - floatRunningVolume)
+                dictPartialCandle["volume"] = floatVolume - (volume - floatRunningVolume)
                 
                 # "Top off" weighted average variables with the volume needed to achieve the volume limit
-                floatRunningAmount += (volume - floatRunningVolume) * float(dictParsedCandle["close"])
+                floatRunningAmount += (volume - floatRunningVolume) * floatClose
                 floatRunningVolume = volume
 
                 # Update current candle with the final volume and set the close price to the
@@ -130,10 +126,10 @@ def buildVolumeCandles(candles, volume):
                 dictCurrentCandle["close"] = floatRunningAmount / floatRunningVolume
                 dictCurrentCandle["time"] = dictParsedCandle["time"]
                 
-                if float(dictParsedCandle["high"]) > float(dictCurrentCandle["high"]):
+                if floatHigh > float(dictCurrentCandle["high"]):
                     dictCurrentCandle["high"] = dictParsedCandle["high"]
         
-                elif float(dictParsedCandle["low"]) < float(dictCurrentCandle["low"]):
+                elif floatLow < float(dictCurrentCandle["low"]):
                     dictCurrentCandle["low"] = dictParsedCandle["low"]
                 
                 lstVolumeCandles.append(dictCurrentCandle)
@@ -146,13 +142,13 @@ def buildVolumeCandles(candles, volume):
             # If the volume of the parsed candle won't exceed the volume limit, just increment the running
             # values, check the highs and lows, and keep going
             else:
-                floatRunningAmount += float(dictParsedCandle["volume"]) * float(dictParsedCandle["close"])
-                floatRunningVolume += float(dictParsedCandle["volume"])
+                floatRunningAmount += floatVolume * floatClose
+                floatRunningVolume += floatVolume
 
-                if float(dictParsedCandle["high"]) > float(dictCurrentCandle["high"]):
+                if floatHigh > float(dictCurrentCandle["high"]):
                     dictCurrentCandle["high"] = dictParsedCandle["high"]
         
-                elif float(dictParsedCandle["low"]) < float(dictCurrentCandle["low"]):
+                elif floatLow < float(dictCurrentCandle["low"]):
                     dictCurrentCandle["low"] = dictParsedCandle["low"]
                 
     return lstVolumeCandles
@@ -163,7 +159,8 @@ def buildVolumeCandles(candles, volume):
 def updateVolumeFile(minutelist, params):
     """
     Args:
-        minutelist (list of dicts): list of candle dictionaries at the minute level
+        minutelist (list of dicts): list of candle dictionaries at the minute level, or None to stream
+            each symbol's candles from data/minute/ so only about one batch plus the volume window is in memory
         params (dict): specifies the window and range to use when calculating the average volume to build candles up to
 
     Returns:
@@ -171,19 +168,31 @@ def updateVolumeFile(minutelist, params):
     """
 
     # First, write to volume.csv to initialize the header
-    csvKeys = minutelist[0].keys()
+    csvKeys = minutelist[0].keys() if minutelist is not None else candle_store.COLUMNS
     with open('data/volume.csv', 'w', newline='') as output_file:
         dict_writer = csv.DictWriter(output_file, csvKeys)
         dict_writer.writeheader()
     
     # Next, iterate through each symbol in the symbol list
-    for symbol in lstSymbols:
+    for symbol in structure_data.getSymbols():
         
-        # For each symbol, initialize a subset list 
-        lstSubset = [x for x in minutelist if x["symbol"] == symbol["symbol"]]
+        if minutelist is not None:
+            # For each symbol, initialize a subset list 
+            lstSubset = [x for x in minutelist if x["symbol"] == symbol["symbol"]]
+
+            # Using the subset list, call setVolumeLimit to determine the average volume to set as the volume limit for candle building
+            floatVolumeLimit = setVolumeLimit(lstSubset, params)
+
+        else:
+            # Stream the symbol once keeping only the candles setVolumeLimit looks at (the most recent
+            # window * range), then stream it again into buildVolumeCandles
+            lstRecent = deque(maxlen=WINDOWS.get(params["window"], 0) * params["range"])
+            for batch in structure_data.streamMinute([symbol["symbol"]]):
+                lstRecent.extend(batch)
+            floatVolumeLimit = setVolumeLimit(list(lstRecent), params)
+            lstRecent.clear()
 
-        # Using the subset list, call setVolumeLimit to determine the average volume to set as the volume limit for candle building
-        floatVolumeLimit = setVolumeLimit(lstSubset, params)
+            lstSubset = itertools.chain.from_iterable(structure_data.streamMinute([symbol["symbol"]]))
 
         # Append the return of buildVolumeCandles to volume.csv using the subset list and volume limit
         lstVolumeCandles = buildVolumeCandles(lstSubset, floatVolumeLimit)
@@ -192,7 +201,8 @@ def updateVolumeFile(minutelist, params):
             dict_writer = csv.DictWriter(output_file, csvKeys)
             dict_writer.writerows(lstVolumeCandles)
 
-updateVolumeFile(lstTestBTC, {"window": "day", "range": 30})
+if __name__ == '__main__':
+    updateVolumeFile(None, {"window": "day", "range": 30})
 
 ''' Csv write code
 dictVolumeCandles = buildVolumeCandles(lstTestBTC, 10000.00)
@@ -1,33 +1,39 @@
-import structure_data, indicators, csv, datetime
+import structure_data, indicators, candle_series, candle_store, rolling, dataset_cache, csv, datetime, json, os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 # Building a function (TBD module) to build out and store trading patterns.
 
-lstSymbols = structure_data.getSymbols()
-lstVolume = structure_data.getVolume()
-
 # Function to take a set of candles, normalize the close price patterns of the candles relative
 # to the set's high and low, and return a sequence pattern and a simple trading signal based
 # on the pattern's final movement (if the final position is higher than the previous position, buy,
 # if lower, then short, else return False for a flat signal.)
-def scoreMovingWindow(candles, params):
+# When the window's highest and lowest close are already known (see getWindowScores) they can be
+# passed in to skip the scan.
+def scoreMovingWindow(candles, params, high=None, low=None):
 
     floatHigh = 0.00
     floatLow = 9999999999999.00
+    lstClose = candle_series.getColumn(candles, "close")
 
     # Iterate to find highest high and lowest low from the set:
-    for candle in candles:
-        if float(candle["close"]) > floatHigh:
-            floatHigh = float(candle["close"])
-        
-        if float(candle["close"]) < floatLow:
-            floatLow = float(candle["close"])
+    if high is None or low is None:
+        for floatClose in lstClose:
+            if floatClose > floatHigh:
+                floatHigh = floatClose
+            
+            if floatClose < floatLow:
+                floatLow = floatClose
+    else:
+        floatHigh = max(floatHigh, high)
+        floatLow = min(floatLow, low)
 
     floatIndex = (floatHigh - floatLow) / params["Scoring Range"]
     returnDict = {"sequence": [], "signal": None, "strength": 1}
 
     # Generate sequence
-    for candle in candles:
-        intScore = int(round((float(candle["close"]) - floatLow) / floatIndex, 0))
+    for floatClose in lstClose:
+        intScore = int(round((floatClose - floatLow) / floatIndex, 0))
         returnDict["sequence"].append(intScore)
 
     # If the last score is higher than the second to last, set a buy signal
@@ -44,6 +50,22 @@ def scoreMovingWindow(candles, params):
     
     return returnDict
 
+# scoreMovingWindow's sequence for every window of `length` closes at once. Row j scores closes
+# j..j+length-1 with the same arithmetic, so each row equals scoreMovingWindow(...)["sequence"];
+# rows whose closes are all equal (which scoreMovingWindow cannot score) are marked invalid.
+def scoreWindows(close, length, scoringRange):
+
+    windows = sliding_window_view(np.asarray(close, dtype=np.float64), length)
+    floatHigh = np.maximum(windows.max(axis=1), 0.00)
+    floatLow = np.minimum(windows.min(axis=1), 9999999999999.00)
+    floatIndex = (floatHigh - floatLow) / scoringRange
+    boolValid = floatIndex != 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arrScores = np.round((windows - floatLow[:, None]) / floatIndex[:, None], 0)
+    arrScores[~boolValid] = 0
+    return arrScores.astype(np.int64), boolValid
+
 # Takes a list of candle dictionary objects and a params object to build a list of
 # patterns with associated trading signals
 def getWindowScores(candles, patterns, params):
@@ -51,48 +73,56 @@ def getWindowScores(candles, patterns, params):
     # Initialize variables, including an empty list of patterns, the starting pattern to
     # evaluate, a working counter to iterate through the list of candles, and a matching boolean
     lstPatterns = patterns
-    lstEval = candles[0:int(params["Pattern"])]
-    intCounter = int(params["Pattern"])
+    candles = candle_series.asSeries(candles)
+    windowEval = candle_series.CandleWindow(candles, int(params["Pattern"]))
     boolMatch = False
 
+    # Index the patterns by sequence so each window is matched with one lookup instead of a scan
+    # of the whole list (a list per sequence, in case the patterns passed in repeat one)
+    dictIndex = {}
+    for item in lstPatterns:
+        dictIndex.setdefault(tuple(item["sequence"]), []).append(item)
+
+    # Highest and lowest close of every window in one O(n) pass each
+    lstHigh = rolling.rollingMax(candles.close, int(params["Pattern"])).tolist()
+    lstLow = rolling.rollingMin(candles.close, int(params["Pattern"])).tolist()
+
     # Iterate through the list of candles
-    while intCounter < len(candles):
+    while windowEval.end < len(candles):
         
-        # Initialize a dict object using the moving window function based on the initial Eval object
-        dictCurrent = scoreMovingWindow(lstEval, params)
+        # Initialize a dict object using the moving window function based on the current window
+        dictCurrent = scoreMovingWindow(windowEval, params, lstHigh[windowEval.end - 1], lstLow[windowEval.end - 1])
         
-        # Check the list of patterns to see if the sequence has already been logged
-        for item in lstPatterns:
+        # Check the index to see if the sequence has already been logged
+        for item in dictIndex.get(tuple(dictCurrent["sequence"]), []):
             
             # If so, increment the sequence's 'strength' in the pattern list and set the match boolean to True
-            if dictCurrent["sequence"] == item["sequence"]:
-                item["strength"] += 1
-                boolMatch = True
+            item["strength"] += 1
+            boolMatch = True
 
         # If no match was found, append the dict object as a novel item
         if boolMatch == False:
             lstPatterns.append(dictCurrent)
+            dictIndex[tuple(dictCurrent["sequence"])] = [dictCurrent]
         
-        # Shift the moving window forward using the counter and popping the oldest object
-        lstEval.append(candles[intCounter])
-        lstEval.pop(0)
-
-        # Increment the counter and reset the match boolean to False
-        intCounter += 1
+        # Shift the moving window forward one candle and reset the match boolean to False
+        windowEval.advance()
         boolMatch = False
     
     return lstPatterns
 
-# Generates a list of raw patterns based on the latest symbols and volume-based candle data
+# Generates a list of raw patterns from the given candles, one symbols.csv symbol at a time. The
+# pattern files are mined from the volume candles and the daily model from the daily candles
+# (before the module stopped loading data on import, every call mined the volume candles).
 def buildPatternLibrary(candles, params):
 
     lstPatterns = []
 
     # Iterate through each symbol
-    for symbol in lstSymbols:
+    for symbol in structure_data.getSymbols():
 
         # Generate a subset list of candles for the given symbol
-        lstSubset = [x for x in lstVolume if x["symbol"] == symbol["symbol"]]
+        lstSubset = [x for x in candles if x["symbol"] == symbol["symbol"]]
 
         # Execute window scoring on the subset list and return the raw patterns list
         lstPatterns = getWindowScores(lstSubset, lstPatterns, params)
@@ -106,33 +136,28 @@ def consolidatePatterns(candles, params):
     lstPatternOutput = buildPatternLibrary(candles, params)
     lstSignals = []
 
+    # Total the signal strengths of every raw pattern sharing a sequence-1 prefix in one pass
+    # (grouping by prefix rather than re-scanning the whole list for each item)
+    dictCounts = {}
+    for match in lstPatternOutput:
+        
+        # Counters for the prefix: buy, short, hold, total
+        lstCounts = dictCounts.setdefault(tuple(match["sequence"][:params["Pattern"]-1]), [0, 0, 0, 0])
+        if match["signal"] == "buy":
+            lstCounts[0] += match["strength"]
+        
+        elif match["signal"] == "short":
+            lstCounts[1] += match["strength"]
+        
+        else:
+            lstCounts[2] += match["strength"]
+        lstCounts[3] += match["strength"]
+
     # Iterate through all items in the raw patterns list
     for item in lstPatternOutput:
         
-        # Initialize counter variables for signals
-        intBuy = 0
-        intShort = 0
-        intHold = 0
-        intTotal = 0
-
-        # Further subset the raw patterns into dicts that match the sequence less the last price result
-        lstMatch = [x for x in lstPatternOutput if \
-            x["sequence"][:params["Pattern"]-1] == item["sequence"][:params["Pattern"]-1]]
-
-        # Based on the items (up to 3) that match the sequence-1, increment counters by signal as well as total
-        for match in lstMatch:
-            if match["signal"] == "buy":
-                intBuy += match["strength"]
-                intTotal += match["strength"]
-            
-            elif match["signal"] == "short":
-                intShort += match["strength"]
-                intTotal += match["strength"]
-            
-            else:
-                intHold += match["strength"]
-                intTotal += match["strength"]
-        
+        intBuy, intShort, intHold, intTotal = dictCounts[tuple(item["sequence"][:params["Pattern"]-1])]
+
         # Append the consolidated results into a new list object with a single item per sequence-1 with signal counts
         lstSignals.append({"sequence": item["sequence"][:params["Pattern"]-1],
                             "total": intTotal,
@@ -143,14 +168,158 @@ def consolidatePatterns(candles, params):
     return lstSignals
 
 
+# Filters consolidated patterns down to strong buy / short signals and writes them to
+# patterns/pattern-<Pattern>-<Scoring Range>-<minimum total>-<minimum share %>.csv
+def writePatternFile(candles, params, minTotal=20, minShare=0.6):
+
+    lstSignals = consolidatePatterns(candles, params)
+    lstStrongSignals = [x for x in lstSignals if x["total"] > minTotal and \
+        (x["short"] / x["total"] > minShare or x["buy"] / x["total"] > minShare)]
+    csvKeys = lstStrongSignals[0].keys()
+
+    strFile = 'patterns/pattern-' + str(params["Pattern"]) + '-' + str(params["Scoring Range"]) + \
+        '-' + str(minTotal) + '-' + str(round(minShare * 100)) + '.csv'
+
+    with open(strFile, 'w', newline='') as output_file:
+        dict_writer = csv.DictWriter(output_file, csvKeys)
+        dict_writer.writeheader()
+        dict_writer.writerows(lstStrongSignals)
+
+    return strFile
+
+
+# Encodes a score sequence as one integer: the scores are digits in base Scoring Range + 1 behind a
+# leading 1, so sequences of different lengths never collide. Returns None if a score is not a
+# valid digit (it cannot match any pattern scored with that range).
+def encodeSequence(sequence, base):
+
+    intCode = 1
+    for intScore in sequence:
+        if intScore < 0 or intScore >= base:
+            return None
+        intCode = intCode * base + int(intScore)
+    return intCode
+
+# encodeSequence for each row of a 2D array of scores; -1 where a score is not a valid digit
+def encodeSequences(scores, base):
+
+    arrCodes = np.ones(len(scores), dtype=np.int64)
+    for i in range(scores.shape[1]):
+        arrCodes = arrCodes * base + scores[:, i]
+    arrCodes[((scores < 0) | (scores >= base)).any(axis=1)] = -1
+    return arrCodes
+
+# Builds a lookup table keyed by encodeSequence from consolidated signal rows (sequence as a list
+# of ints, counts as ints). Rows are kept per key in order, since pattern files can hold the same
+# sequence more than once and each row is acted on separately.
+def buildPatternIndex(rows, scoringRange):
+
+    intBase = int(scoringRange) + 1
+    dictSignals = {}
+
+    for row in rows:
+        intCode = encodeSequence(row["sequence"], intBase)
+        if intCode is None:
+            print('buildPatternIndex error: sequence ' + str(row["sequence"]) + ' does not fit scoring range ' + str(scoringRange))
+            continue
+        dictSignals.setdefault(intCode, []).append({"total": row["total"],
+                                                    "buy": row["buy"],
+                                                    "short": row["short"],
+                                                    "hold": row["hold"]})
+
+    return {"base": intBase, "signals": dictSignals}
+
+# Reads a pattern file written by writePatternFile into a pattern index, with the counts as ints
+def readPatternIndex(file, scoringRange):
+
+    with open(file, mode='r', encoding='UTF-8') as f:
+        lstRows = [{"sequence": json.loads(row["sequence"]),
+                    "total": int(row["total"]),
+                    "buy": int(row["buy"]),
+                    "short": int(row["short"]),
+                    "hold": int(row["hold"])} for row in csv.DictReader(f)]
+
+    return buildPatternIndex(lstRows, scoringRange)
+
+# Loads the pattern index once per process; the cached index is rebuilt only if the file changes
+def getPatternIndex(file, scoringRange):
+
+    return dataset_cache.cache.load(('patterns', file, int(scoringRange)), [file],
+                                    lambda: readPatternIndex(file, scoringRange))
+
+# Returns the signal rows (possibly empty) for a score sequence from a pattern index
+def getPatternSignals(index, sequence):
+
+    return index["signals"].get(encodeSequence(sequence, index["base"]), [])
+
+
+##### Persisted pattern models #####
+# A model is the consolidated signal counts of every sequence-1 prefix mined from a dataset, saved
+# to patterns/model-<dataset>-<Pattern>-<Scoring Range>.json together with the mtime / size of the
+# files it was mined from. Strategies query it through getPatternSignals; it is mined again only
+# when the data changes (or by an explicit trainPatternModel call).
+
+# Files a dataset is mined from (buildPatternLibrary also reads the symbol list)
+def getSnapshotPaths(dataset):
+
+    if dataset == 'volume':
+        lstPaths = ['data/volume.csv']
+    else:
+        lstPaths = [candle_store.getSymbolPath(dataset, x) for x in candle_store.getStoredSymbols(dataset)]
+    return lstPaths + ['data/symbols.csv']
+
+def getModelPath(dataset, params):
+
+    return 'patterns/model-' + dataset + '-' + str(params["Pattern"]) + '-' + str(params["Scoring Range"]) + '.json'
+
+# Mines the dataset once, saves the model and returns its pattern index
+def trainPatternModel(dataset, params):
+
+    lstSnapshot = [list(x) for x in dataset_cache.getFingerprint(getSnapshotPaths(dataset))]
+    candles = structure_data.getVolume() if dataset == 'volume' else structure_data.getDaily()
+
+    # One row per sequence-1 prefix (consolidatePatterns repeats a prefix once per raw pattern)
+    dictRows = {}
+    for item in consolidatePatterns(candles, params):
+        dictRows.setdefault(tuple(item["sequence"]), item)
+
+    dictModel = {"dataset": dataset,
+                 "pattern": params["Pattern"],
+                 "scoring range": params["Scoring Range"],
+                 "snapshot": lstSnapshot,
+                 "signals": list(dictRows.values())}
+
+    strFile = getModelPath(dataset, params)
+    with open(strFile + '.tmp', 'w') as output_file:
+        json.dump(dictModel, output_file)
+    os.replace(strFile + '.tmp', strFile)
+
+    return buildPatternIndex(dictModel["signals"], params["Scoring Range"])
+
+# Reads the saved model if it was mined from the current data, otherwise trains a new one
+def readPatternModel(dataset, params):
+
+    strFile = getModelPath(dataset, params)
+    lstSnapshot = [list(x) for x in dataset_cache.getFingerprint(getSnapshotPaths(dataset))]
+
+    if os.path.exists(strFile):
+        with open(strFile) as f:
+            dictModel = json.load(f)
+        if dictModel["snapshot"] == lstSnapshot:
+            return buildPatternIndex(dictModel["signals"], params["Scoring Range"])
+
+    return trainPatternModel(dataset, params)
+
+# Loads the model for (dataset, Pattern, Scoring Range) once per process; the cached model is
+# reloaded (and retrained if needed) only when the dataset's files change
+def getPatternModel(dataset, params):
+
+    return dataset_cache.cache.load(('pattern model', dataset, params["Pattern"], params["Scoring Range"]),
+                                    getSnapshotPaths(dataset), lambda: readPatternModel(dataset, params))
+
+
 testParams = {"Pattern": 8,
                 "Scoring Range": 3}
 
-lstSignals = consolidatePatterns(lstVolume, testParams)
-lstStrongSignals = [x for x in lstSignals if x["total"] > 20 and (x["short"] / x["total"] > 0.6 or x["buy"] / x["total"] > 0.6)]
-csvKeys = lstStrongSignals[0].keys()
-
-with open('patterns/pattern-8-3-20-60.csv', 'w', newline='') as output_file:
-    dict_writer = csv.DictWriter(output_file, csvKeys)
-    dict_writer.writeheader()
-    dict_writer.writerows(lstStrongSignals)
\ No newline at end of file
+if __name__ == '__main__':
+    writePatternFile(structure_data.getVolume(), testParams)
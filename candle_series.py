@@ -0,0 +1,263 @@
+import numpy as np
+
+# Typed candle containers. CandleSeries holds one symbol's candles as float64 / int64 numpy
+# columns (about 48 bytes per candle versus ~750 for a dict of strings), so indicators can read
+# a whole column without calling float() per access. Candle is a __slots__ record with the same
+# fields that also answers dict-style lookups (candle["close"]), so code written against the
+# csv.DictReader rows keeps working when handed a series. CandleWindow slides a fixed-length
+# view along a series by moving two offsets, for the backtest and indicator loops.
+
+FIELDS = ['time', 'low', 'high', 'open', 'close', 'volume', 'symbol'] # same order as the csv files
+
+
+class Candle:
+    """
+    Single typed candle: time is an int, prices and volume are floats. Behaves like the
+    dict rows read from the csv files (indexing, get, keys, copy), returning typed values.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, time, low, high, open, close, volume, symbol):
+        self.time = time
+        self.low = low
+        self.high = high
+        self.open = open
+        self.close = close
+        self.volume = volume
+        self.symbol = symbol
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return 'Candle(' + ', '.join(x + '=' + repr(getattr(self, x)) for x in FIELDS) + ')'
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def keys(self):
+        return list(FIELDS)
+
+    def values(self):
+        return [getattr(self, x) for x in FIELDS]
+
+    def items(self):
+        return [(x, getattr(self, x)) for x in FIELDS]
+
+    def copy(self):
+        return Candle(*self.values())
+
+    def toDict(self):
+        """
+        Returns:
+            dict: plain dict with the candle's typed values
+        """
+        return dict(self.items())
+
+
+class CandleSeries:
+    """
+    One symbol's candles as typed numpy columns, ordered by time. Indexing with an int returns
+    a Candle; slicing returns another CandleSeries viewing the same memory (no copy), with the
+    same negative-index semantics as list slicing. Iterating yields Candles.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, symbol, time, low, high, open, close, volume):
+        """
+        Args:
+            symbol (str): ticker symbol
+            time (array): candle times, seconds since epoch
+            low, high, open, close, volume (array): price and volume columns
+        """
+        self.symbol = symbol
+        self.time = np.asarray(time, dtype=np.int64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def fromColumns(cls, symbol, columns):
+        """
+        Wraps a dict of columns (e.g. memory-mapped arrays from column_store) without copying
+
+        Args:
+            symbol (str): ticker symbol
+            columns (dict): column name -> array
+
+        Returns:
+            CandleSeries
+        """
+        return cls(symbol, columns["time"], columns["low"], columns["high"],
+                   columns["open"], columns["close"], columns["volume"])
+
+    @classmethod
+    def fromDicts(cls, candles):
+        """
+        Parses candle dicts (as read from the csv files) once into typed columns
+
+        Args:
+            candles (list): list of candle dicts for a single symbol
+
+        Returns:
+            CandleSeries
+        """
+        symbol = candles[0]["symbol"] if len(candles) > 0 else None
+        return cls(symbol,
+                   [int(float(x["time"])) for x in candles],
+                   [float(x["low"]) for x in candles],
+                   [float(x["high"]) for x in candles],
+                   [float(x["open"]) for x in candles],
+                   [float(x["close"]) for x in candles],
+                   [float(x["volume"]) for x in candles])
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleSeries(self.symbol, self.time[index], self.low[index], self.high[index],
+                                self.open[index], self.close[index], self.volume[index])
+        return Candle(int(self.time[index]), float(self.low[index]), float(self.high[index]),
+                      float(self.open[index]), float(self.close[index]), float(self.volume[index]),
+                      self.symbol)
+
+    def __iter__(self):
+        for values in zip(self.time.tolist(), self.low.tolist(), self.high.tolist(),
+                          self.open.tolist(), self.close.tolist(), self.volume.tolist()):
+            yield Candle(*values, self.symbol)
+
+    def __repr__(self):
+        return 'CandleSeries(' + str(self.symbol) + ', ' + str(len(self)) + ' candles)'
+
+    @property
+    def nbytes(self):
+        """
+        Returns:
+            int: bytes held by the six columns (views count the part of the buffer they show)
+        """
+        return sum(getattr(self, x).nbytes for x in FIELDS if x != 'symbol')
+
+    def toDicts(self):
+        """
+        Returns:
+            list: plain candle dicts with typed values, for code that needs real dicts
+        """
+        return [x.toDict() for x in self]
+
+
+class CandleWindow:
+    """
+    Fixed-length sliding view over a CandleSeries, held as [start, end) offsets into it. advance()
+    moves both offsets, so stepping a window through a series copies nothing; indexing, slicing,
+    len() and iteration behave like a list holding just the candles in the window.
+    """
+    __slots__ = ['series', 'start', 'end']
+
+    def __init__(self, series, length, end=None):
+        """
+        Args:
+            series (CandleSeries): candles to slide over
+            length (int): number of candles in the window
+            end (int): index just past the window's last candle; defaults to length (window at the start)
+        """
+        self.series = series
+        self.end = length if end is None else end
+        self.start = max(self.end - length, 0)
+
+    def advance(self, steps=1):
+        """
+        Moves the window forward (or back, for negative steps) by a number of candles
+        """
+        self.start += steps
+        self.end += steps
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Slicing the window's view keeps Python's semantics for any step, negative ones included
+            return self.view()[index]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('CandleWindow index out of range')
+        return self.series[self.start + index]
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __repr__(self):
+        return 'CandleWindow(' + str(self.series.symbol) + ', ' + str(self.start) + ':' + str(self.end) + ')'
+
+    def column(self, key):
+        """
+        Args:
+            key (str): field name, e.g. "close"
+
+        Returns:
+            numpy array: view of the field for the candles in the window
+        """
+        return getattr(self.series, key)[self.start:self.end]
+
+    def view(self):
+        """
+        Returns:
+            CandleSeries: the window's candles as a series sharing the underlying memory
+        """
+        return self.series[self.start:self.end]
+
+
+def asSeries(candles):
+    """
+    Args:
+        candles (CandleSeries, CandleWindow or list): candles for a single symbol
+
+    Returns:
+        CandleSeries: the series itself, a view of the window, or the list parsed once into a series
+    """
+    if isinstance(candles, CandleSeries):
+        return candles
+    if isinstance(candles, CandleWindow):
+        return candles.view()
+    return CandleSeries.fromDicts(candles)
+
+
+def getColumn(candles, key):
+    """
+    Reads one field for every candle as a list of Python numbers. Series columns are converted
+    directly; dict candles are parsed once here rather than at every access.
+
+    Args:
+        candles (CandleSeries, CandleWindow or list): candles to read
+        key (str): field name, e.g. "close"
+
+    Returns:
+        list: floats (ints for "time")
+    """
+    if isinstance(candles, CandleSeries):
+        return getattr(candles, key).tolist()
+    if isinstance(candles, CandleWindow):
+        return candles.column(key).tolist()
+    if key == "time":
+        return [int(float(x[key])) for x in candles]
+    return [float(x[key]) for x in candles]
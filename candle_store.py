@@ -0,0 +1,484 @@
+import csv, io, json, os, shutil
+
+# Incremental candle storage. Each dataset (daily, minute) is kept as one CSV per symbol under
+# data/<dataset>/<symbol>.csv, sorted by time, with the same columns as the original combined
+# files. New candles are appended to the end of a symbol's file; candles that overlap the end
+# of the stored history (e.g. yesterday's still-forming candle) are replaced by rewriting
+# just those trailing rows, so an update only touches the bytes it changes.
+#
+# Alongside the files, data/<dataset>/catalog.json records per symbol the first and last candle
+# time, the row count and the number of holes in the history. It is updated by every upsert
+# from the rows that changed, so questions like "which symbols go back far enough" are answered
+# without reading any candles.
+
+COLUMNS = ['time', 'low', 'high', 'open', 'close', 'volume', 'symbol']
+DATASETS = {86400: 'daily', 60: 'minute'}
+GRANULARITIES = {y: x for x, y in DATASETS.items()}
+TAIL_BYTES = 65536 # initial read size when scanning backwards from the end of a file
+BATCH_SIZE = 10000 # candles per batch yielded by iterCandles
+
+
+def getDatasetPath(dataset):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        str: directory holding the per-symbol files for the dataset
+    """
+    return os.path.join('data', dataset)
+
+
+def getSymbolPath(dataset, symbol):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbol (str): ticker symbol
+
+    Returns:
+        str: path of the symbol's candle file
+    """
+    return os.path.join(getDatasetPath(dataset), symbol + '.csv')
+
+
+def getStoredSymbols(dataset):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        list: symbols with a candle file in the dataset, sorted by name
+    """
+    if not os.path.isdir(getDatasetPath(dataset)):
+        return []
+    return sorted(x[:-4] for x in os.listdir(getDatasetPath(dataset)) if x.endswith('.csv'))
+
+
+def getTruncateOffset(file, minTime):
+    """
+    Finds where the trailing rows with time >= minTime begin, reading backwards from the end of
+    the file only as far as needed (normally a single block)
+
+    Args:
+        file (file): symbol file opened in binary mode
+        minTime (int): earliest candle time about to be written
+
+    Returns:
+        int: byte offset to truncate the file at before appending
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    tail = TAIL_BYTES
+
+    while True:
+        pos = max(size - tail, 0)
+        file.seek(pos)
+        lines = file.read().split(b'\n')
+
+        # Skip the header when reading from the top, otherwise the (possibly partial) first line
+        offset = pos + len(lines[0]) + 1
+        intFirst = offset
+        for line in lines[1:]:
+            if line.strip() and int(float(line.split(b',', 1)[0])) >= minTime:
+                break
+            offset += len(line) + 1
+        else:
+            return size
+
+        # If even the first complete row overlaps, earlier rows may too - widen the read
+        if offset == intFirst and pos > 0:
+            tail *= 2
+            continue
+        return offset
+
+
+def readLastTime(file, end):
+    """
+    Reads the time of the last complete row that ends before a byte offset, scanning backwards
+
+    Args:
+        file (file): symbol file opened in binary mode
+        end (int): byte offset to read back from, e.g. the file size
+
+    Returns:
+        int: time of the row, or None if there are no rows before the offset
+    """
+    tail = TAIL_BYTES
+    while True:
+        pos = max(end - tail, 0)
+        file.seek(pos)
+        lines = [x for x in file.read(end - pos).split(b'\n')[1:] if x.strip()]
+        if lines:
+            return int(float(lines[-1].split(b',', 1)[0]))
+        if pos == 0:
+            return None
+        tail *= 2
+
+
+def getLastTime(dataset, symbol):
+    """
+    Reads the time of the most recent stored candle for a symbol from the end of its file
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbol (str): ticker symbol
+
+    Returns:
+        int: time of the last candle, or None if nothing is stored for the symbol
+    """
+    path = getSymbolPath(dataset, symbol)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as file:
+        return readLastTime(file, os.path.getsize(path))
+
+
+def countGaps(times, granularity):
+    """
+    Args:
+        times (list): candle times, ascending
+        granularity (int): expected spacing between candles in seconds
+
+    Returns:
+        int: number of holes, i.e. consecutive candles further apart than the granularity
+    """
+    return sum(1 for x, y in zip(times, times[1:]) if y - x > granularity)
+
+
+def getCatalogPath(dataset):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        str: path of the dataset's catalog file
+    """
+    return os.path.join(getDatasetPath(dataset), 'catalog.json')
+
+
+def readCatalog(dataset):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        dict: catalog entries as last saved, without checking them against the files
+    """
+    path = getCatalogPath(dataset)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def saveCatalog(dataset, catalog):
+    """
+    Writes the catalog to a temporary file and swaps it in, so readers never see a torn file
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        catalog (dict): symbol -> catalog entry
+
+    Returns:
+        None
+    """
+    path = getCatalogPath(dataset)
+    with open(path + '.tmp', 'w') as output_file:
+        json.dump(catalog, output_file, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def scanSymbol(dataset, symbol):
+    """
+    Builds a symbol's catalog entry by reading its whole file - only needed when the catalog is
+    missing or the file was changed by something other than upsertCandles
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbol (str): ticker symbol
+
+    Returns:
+        dict: catalog entry with first, last, rows, gaps and size (bytes, to detect outside edits)
+    """
+    path = getSymbolPath(dataset, symbol)
+    with open(path, mode='r', encoding='UTF-8') as file:
+        lstTimes = [int(float(x[0])) for x in csv.reader(file) if x and x[0] != 'time']
+    return {"first": lstTimes[0] if lstTimes else None,
+            "last": lstTimes[-1] if lstTimes else None,
+            "rows": len(lstTimes),
+            "gaps": countGaps(lstTimes, GRANULARITIES[dataset]),
+            "size": os.path.getsize(path)}
+
+
+def getCatalog(dataset):
+    """
+    Returns the catalog for every stored symbol. Entries whose recorded file size no longer
+    matches the file (or that are missing) are rebuilt from the file and saved.
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        dict: symbol -> {"first", "last", "rows", "gaps", "size"}, times in seconds since epoch
+    """
+    dictCatalog = readCatalog(dataset)
+    lstStored = getStoredSymbols(dataset)
+    boolChanged = set(dictCatalog) != set(lstStored)
+
+    dictCatalog = {x: dictCatalog[x] for x in lstStored if x in dictCatalog}
+    for symbol in lstStored:
+        if symbol not in dictCatalog or \
+            dictCatalog[symbol]["size"] != os.path.getsize(getSymbolPath(dataset, symbol)):
+            dictCatalog[symbol] = scanSymbol(dataset, symbol)
+            boolChanged = True
+
+    if boolChanged and len(lstStored) > 0:
+        saveCatalog(dataset, dictCatalog)
+    return dictCatalog
+
+
+def upsertCandles(dataset, symbol, candles):
+    """
+    Writes new candles for a symbol, upserting by time. Stored rows from the earliest new time
+    onwards are read back, merged with the new candles (new values win) and rewritten; rows
+    before that point are never touched. For a normal update this is just the boundary candle;
+    filling a hole in the middle of the history rewrites only the rows after the hole, which
+    are streamed through a temporary file rather than held in memory.
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbol (str): ticker symbol
+        candles (list): API candles as [time, low, high, open, close, volume] lists, in any order
+
+    Returns:
+        int: number of rows written, including stored rows that were rewritten
+    """
+    if len(candles) == 0:
+        return 0
+
+    # De-duplicate by time (later responses win) and sort ascending to keep the file ordered
+    dictCandles = {}
+    for candle in candles:
+        dictCandles[int(candle[0])] = candle
+    lstRows = [[x] + list(dictCandles[x][1:6]) + [symbol] for x in sorted(dictCandles)]
+
+    os.makedirs(getDatasetPath(dataset), exist_ok=True)
+    path = getSymbolPath(dataset, symbol)
+    dictCatalog = readCatalog(dataset)
+    lstTimes = sorted(dictCandles)
+
+    if not os.path.exists(path):
+        with open(path, 'w', newline='') as output_file:
+            writer = csv.writer(output_file, lineterminator='\n')
+            writer.writerow(COLUMNS)
+            writer.writerows(lstRows)
+        dictCatalog[symbol] = {"first": lstTimes[0], "last": lstTimes[-1], "rows": len(lstTimes),
+                               "gaps": countGaps(lstTimes, GRANULARITIES[dataset]),
+                               "size": os.path.getsize(path)}
+        saveCatalog(dataset, dictCatalog)
+        return len(lstRows)
+
+    # Only trust the catalog entry if the file is exactly as it was when the entry was written
+    dictEntry = dictCatalog.get(symbol)
+    if dictEntry is not None and dictEntry["size"] != os.path.getsize(path):
+        dictEntry = None
+
+    # Merge the overlapping tail rows with the new candles (new values win) into a temporary
+    # file. Stored rows are streamed one at a time, so memory holds only the new candles however
+    # long the tail after a filled hole is; holes are counted on the way, from the last
+    # untouched row, for both the old tail and the merged rows.
+    granularity = GRANULARITIES[dataset]
+    tempPath = path + '.tmp'
+
+    with open(path, 'rb') as file:
+        offset = getTruncateOffset(file, lstRows[0][0])
+        prevTime = readLastTime(file, offset)
+        file.seek(offset)
+        reader = csv.reader(io.TextIOWrapper(file, encoding='UTF-8', newline=''))
+        with open(tempPath, 'w', newline='') as output_file:
+            writer = csv.writer(output_file, lineterminator='\n')
+            dictCounts = {"rows": 0, "gaps": 0, "first": None, "last": prevTime,
+                          "tailRows": 0, "tailGaps": 0}
+            intTailLast = prevTime
+
+            def writeRow(row):
+                intTime = int(float(row[0]))
+                if dictCounts["last"] is not None and intTime - dictCounts["last"] > granularity:
+                    dictCounts["gaps"] += 1
+                if dictCounts["first"] is None:
+                    dictCounts["first"] = intTime
+                dictCounts["last"] = intTime
+                dictCounts["rows"] += 1
+                writer.writerow(row)
+
+            i = 0
+            for row in reader:
+                if not row:
+                    continue
+                intTime = int(float(row[0]))
+                if intTailLast is not None and intTime - intTailLast > granularity:
+                    dictCounts["tailGaps"] += 1
+                intTailLast = intTime
+                dictCounts["tailRows"] += 1
+
+                while i < len(lstRows) and lstRows[i][0] < intTime:
+                    writeRow(lstRows[i])
+                    i += 1
+                if i < len(lstRows) and lstRows[i][0] == intTime:
+                    writeRow(lstRows[i])
+                    i += 1
+                else:
+                    writeRow(row)
+            for row in lstRows[i:]:
+                writeRow(row)
+
+    # Swap the merged rows in for the old tail; rows before it are never touched. The merged rows
+    # are copied over in fixed-size blocks, and the temporary file keeps them until that is done.
+    with open(path, 'r+b') as file, open(tempPath, 'rb') as merged:
+        file.truncate(offset)
+        file.seek(offset)
+        shutil.copyfileobj(merged, file, TAIL_BYTES)
+    os.remove(tempPath)
+
+    # Update the catalog from the rewritten rows alone: swap the old tail's rows and holes
+    # for the new ones
+    if dictEntry is None:
+        dictCatalog[symbol] = scanSymbol(dataset, symbol)
+    else:
+        dictEntry["gaps"] += dictCounts["gaps"] - dictCounts["tailGaps"]
+        dictEntry["rows"] += dictCounts["rows"] - dictCounts["tailRows"]
+        dictEntry["first"] = dictCounts["first"] if prevTime is None else dictEntry["first"]
+        dictEntry["last"] = dictCounts["last"]
+        dictEntry["size"] = os.path.getsize(path)
+        dictCatalog[symbol] = dictEntry
+    saveCatalog(dataset, dictCatalog)
+
+    return dictCounts["rows"]
+
+
+def readCandles(dataset, symbols=None):
+    """
+    Reads stored candles into the list-of-dicts format used throughout the repo, ordered by
+    symbol then time like the original combined files
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbols (list): symbols to read; all stored symbols if None
+
+    Returns:
+        list: list of candles
+    """
+    lstCandles = []
+    for symbol in (getStoredSymbols(dataset) if symbols is None else sorted(symbols)):
+        path = getSymbolPath(dataset, symbol)
+        if os.path.exists(path):
+            with open(path, mode='r', encoding='UTF-8') as file:
+                lstCandles.extend(csv.DictReader(file))
+    return lstCandles
+
+
+def findOffset(file, minTime):
+    """
+    Binary search over byte offsets for the first row with time >= minTime, so a reader can seek
+    straight to it instead of parsing every earlier row
+
+    Args:
+        file (file): symbol file opened in binary mode, rows sorted by time
+        minTime (int): earliest candle time wanted
+
+    Returns:
+        int: byte offset of the first row with time >= minTime (the file size if there is none)
+    """
+    file.seek(0)
+    intHeader = len(file.readline()) # first row starts after the header
+    file.seek(0, os.SEEK_END)
+    intLow, intHigh = intHeader, file.tell()
+
+    def seekRow(pos):
+        # Position the file at the first row starting at or after pos
+        if pos <= intHeader:
+            file.seek(intHeader)
+        else:
+            file.seek(pos - 1)
+            file.readline()
+        return file.tell()
+
+    # Smallest position whose next row is >= minTime (or end of file); rows before it are skipped
+    while intLow < intHigh:
+        intMid = (intLow + intHigh) // 2
+        intRow = seekRow(intMid)
+        line = file.readline()
+        if not line.strip() or int(float(line.split(b',', 1)[0])) >= minTime:
+            intHigh = intMid
+        else:
+            intLow = intRow + len(line)
+    return seekRow(intLow)
+
+
+def iterCandles(dataset, symbols=None, start=None, end=None, batchSize=BATCH_SIZE):
+    """
+    Streams stored candles in batches, filtering while reading. Only the requested symbols'
+    files are opened; each file is entered at the first row >= start by binary search and read
+    until the first row past end, so rows outside the range are never parsed. At most one batch
+    of candles is held in memory.
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+        symbols (list): symbols to read; all stored symbols if None
+        start (int): earliest candle time to include, seconds since epoch; no lower bound if None
+        end (int): latest candle time to include, seconds since epoch; no upper bound if None
+        batchSize (int): maximum candles per batch
+
+    Yields:
+        list: candle dicts (string values, like csv.DictReader), ordered by symbol then time
+    """
+    lstBatch = []
+    for symbol in (getStoredSymbols(dataset) if symbols is None else sorted(symbols)):
+        path = getSymbolPath(dataset, symbol)
+        if not os.path.exists(path):
+            continue
+
+        with open(path, 'rb') as file:
+            lstKeys = file.readline().decode('UTF-8').strip().split(',')
+            if start is not None:
+                file.seek(findOffset(file, start))
+
+            for row in csv.reader(io.TextIOWrapper(file, encoding='UTF-8', newline='')):
+                if not row:
+                    continue
+                if end is not None and int(float(row[0])) > end:
+                    break
+                lstBatch.append(dict(zip(lstKeys, row)))
+                if len(lstBatch) >= batchSize:
+                    yield lstBatch
+                    lstBatch = []
+
+    if len(lstBatch) > 0:
+        yield lstBatch
+
+
+def splitCombinedFile(dataset):
+    """
+    One-time migration from a combined data/<dataset>.csv file to per-symbol files
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily' or 'minute'
+
+    Returns:
+        None: writes data/<dataset>/<symbol>.csv for every symbol in the combined file
+    """
+    dictRows = {}
+    with open(os.path.join('data', dataset + '.csv'), mode='r', encoding='UTF-8') as file:
+        for row in csv.reader(file):
+            if row[0] == 'time':
+                continue
+            dictRows.setdefault(row[6], []).append(row)
+
+    os.makedirs(getDatasetPath(dataset), exist_ok=True)
+    for symbol, lstRows in dictRows.items():
+        lstRows.sort(key=lambda x: int(float(x[0])))
+        with open(getSymbolPath(dataset, symbol), 'w', newline='') as output_file:
+            writer = csv.writer(output_file, lineterminator='\n')
+            writer.writerow(COLUMNS)
+            writer.writerows(lstRows)
@@ -0,0 +1,168 @@
+import argparse, sys
+
+# Single entry point for the repo's jobs. Each subcommand imports the modules it needs only when
+# it runs, so starting any one task does not pay for pandas, numpy or the other tasks' modules.
+#
+#   python cli.py fetch [--granularity daily|minute] [--workers N] [--repair]
+#   python cli.py build-volume [--window day] [--range 30]
+#   python cli.py mine-patterns [--pattern 8] [--scoring-range 3]
+#   python cli.py train [--dataset daily] [--pattern 6] [--scoring-range 3]
+#   python cli.py backtest [--volume] [--strategy pattern|volume-pattern|cross|trend-rsi|supertrend-ema]
+#   python cli.py tune
+#   python cli.py screen [--short-ema 20] [--long-ema 200] [--trend 5] [--rsi 14]
+#   python cli.py bench [--sizes 1000 100000] [--cases sma rsi] [--record] [--min-speedup 1]
+
+def runFetch(args):
+    """
+    Updates (or repairs holes in) the stored candle data from Coinbase
+    """
+    import get_data
+    granularity = {"daily": 86400, "minute": 60}[args.granularity]
+    if args.repair:
+        get_data.repairGaps(granularity, workers=args.workers, bufferSize=args.buffer_size)
+    else:
+        get_data.updateData(granularity, workers=args.workers, bufferSize=args.buffer_size)
+
+def runBuildVolume(args):
+    """
+    Rebuilds data/volume.csv from minute-level candles
+    """
+    import build_candles
+    build_candles.updateVolumeFile(None, {"window": args.window, "range": args.range})
+
+def runMinePatterns(args):
+    """
+    Mines volume-candle patterns and writes the strong signals to patterns/
+    """
+    import build_patterns, structure_data
+    params = {"Pattern": args.pattern, "Scoring Range": args.scoring_range}
+    strFile = build_patterns.writePatternFile(structure_data.getVolume(), params, args.min_total, args.min_share)
+    print("Wrote", strFile)
+
+def runTrain(args):
+    """
+    Mines the consolidated pattern model for a dataset and saves it under patterns/
+    """
+    import build_patterns
+    params = {"Pattern": args.pattern, "Scoring Range": args.scoring_range}
+    dictModel = build_patterns.trainPatternModel(args.dataset, params)
+    print("Wrote", build_patterns.getModelPath(args.dataset, params), "-", len(dictModel["signals"]), "sequences")
+
+def runBacktest(args):
+    """
+    Runs the daily scenario backtests, or the volume-candle backtest with --volume; --strategy runs a
+    strategy plugin on whole-series signals instead of the per-candle runStrategy (pattern needs the
+    daily backtest, volume-pattern needs --volume)
+    """
+    import strategies
+    strategy = strategies.STRATEGIES[args.strategy] if args.strategy is not None else None
+    strDataset = 'volume' if args.volume else 'daily'
+    if strategy is not None and strDataset not in strategy.datasets:
+        print('runBacktest error: --strategy', args.strategy, 'does not run on', strDataset, 'candles; choose one of',
+              ', '.join(strategies.getStrategyNames(strDataset)))
+        sys.exit(2)
+    if args.volume:
+        import volume_backtest
+        volume_backtest.runVolumeBacktest(volume_backtest.volumeParams, volume_backtest.volumeSymbols, strategy)
+    else:
+        import backtest
+        backtest.runScenarios(backtest.testParams, backtest.scenarios, strategy)
+
+def runTune(args):
+    """
+    Runs the hyperparameter grid search over backtest.paramGrid
+    """
+    import backtest
+    bestParams = backtest.runHyperparameterTuning(args.balance, args.profit, args.stop_loss, backtest.paramGrid)
+    print("Best params:")
+    print(bestParams)
+
+def runScreen(args):
+    """
+    Prints every symbol's cross state, trend checks and RSI for the latest daily candle, ranked
+    """
+    import screener
+    params = {"Short EMA": args.short_ema, "Long EMA": args.long_ema, "Trend": args.trend, "RSI": args.rsi}
+    screener.printScreen(screener.screen(None, params))
+
+def runBench(args):
+    """
+    Benchmarks the hot indicator / candle functions and checks them against the golden results
+    recorded from their scalar references, and their speed against those references
+    """
+    import benchmark
+    lstRegressions = benchmark.runBenchmarks(args.sizes, args.cases, args.record, args.min_speedup)
+    if len(lstRegressions) > 0:
+        print()
+        print(len(lstRegressions), "regressions:")
+        for item in lstRegressions:
+            print("    " + item)
+        sys.exit(1)
+
+def getParser():
+    """
+    Returns:
+        argparse.ArgumentParser: parser with one subcommand per job
+    """
+    parser = argparse.ArgumentParser(description="SBB crypto trading jobs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser("fetch", help="download new candles from Coinbase")
+    fetch.add_argument("--granularity", choices=["daily", "minute"], default="daily")
+    fetch.add_argument("--workers", type=int, default=1, help="concurrent fetch threads")
+    fetch.add_argument("--buffer-size", type=int, default=10000, help="candles held in memory before writing")
+    fetch.add_argument("--repair", action="store_true", help="only fill holes in the stored history")
+    fetch.set_defaults(func=runFetch)
+
+    volume = subparsers.add_parser("build-volume", help="rebuild data/volume.csv from minute candles")
+    volume.add_argument("--window", choices=["hour", "day", "week", "month"], default="day")
+    volume.add_argument("--range", type=int, default=30)
+    volume.set_defaults(func=runBuildVolume)
+
+    patterns = subparsers.add_parser("mine-patterns", help="mine volume-candle patterns into patterns/")
+    patterns.add_argument("--pattern", type=int, default=8)
+    patterns.add_argument("--scoring-range", type=int, default=3)
+    patterns.add_argument("--min-total", type=int, default=20)
+    patterns.add_argument("--min-share", type=float, default=0.6)
+    patterns.set_defaults(func=runMinePatterns)
+
+    train = subparsers.add_parser("train", help="mine and save the pattern model used by the daily strategy")
+    train.add_argument("--dataset", choices=["daily", "volume"], default="daily")
+    train.add_argument("--pattern", type=int, default=6)
+    train.add_argument("--scoring-range", type=int, default=3)
+    train.set_defaults(func=runTrain)
+
+    backtest = subparsers.add_parser("backtest", help="run backtest scenarios")
+    backtest.add_argument("--volume", action="store_true", help="run the volume-candle backtest instead")
+    backtest.add_argument("--strategy", choices=["pattern", "volume-pattern", "cross", "trend-rsi", "supertrend-ema"],
+                          default=None, help="run a strategy plugin on whole-series signals instead of runStrategy")
+    backtest.set_defaults(func=runBacktest)
+
+    tune = subparsers.add_parser("tune", help="run hyperparameter tuning")
+    tune.add_argument("--balance", type=float, default=5000)
+    tune.add_argument("--profit", type=float, default=3)
+    tune.add_argument("--stop-loss", type=float, default=1.5)
+    tune.set_defaults(func=runTune)
+
+    screen = subparsers.add_parser("screen", help="rank all symbols by cross state, trend and RSI")
+    screen.add_argument("--short-ema", type=int, default=20)
+    screen.add_argument("--long-ema", type=int, default=200)
+    screen.add_argument("--trend", type=int, default=5)
+    screen.add_argument("--rsi", type=int, default=14)
+    screen.set_defaults(func=runScreen)
+
+    bench = subparsers.add_parser("bench", help="benchmark indicator / candle functions against golden results")
+    bench.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="synthetic candles per run")
+    bench.add_argument("--cases", nargs="+", default=None, help="cases to run (default: all)")
+    bench.add_argument("--record", action="store_true", help="record the scalar references' outputs as the golden results")
+    bench.add_argument("--min-speedup", type=float, default=1.0, help="required speedup over the scalar reference")
+    bench.set_defaults(func=runBench)
+
+    return parser
+
+def main(argv=None):
+    args = getParser().parse_args(argv)
+    args.func(args)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
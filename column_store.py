@@ -0,0 +1,143 @@
+import csv, os
+import numpy as np
+import candle_store
+
+# Binary columnar copy of the candle data. Each symbol gets one .npy file per column under
+# data/columns/<dataset>/<symbol>/, which is memory-mapped on load: opening the arrays costs
+# only the file header, and pages are read from disk only when a slice of them is touched.
+# The CSV files stay the source of truth - columns are rebuilt from them when stale.
+
+COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+DTYPES = {'time': np.int64, 'open': np.float64, 'high': np.float64,
+          'low': np.float64, 'close': np.float64, 'volume': np.float64}
+
+
+def getColumnPath(dataset, symbol):
+    """
+    Args:
+        dataset (str): dataset name, e.g. 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+
+    Returns:
+        str: directory holding the symbol's column files
+    """
+    return os.path.join('data', 'columns', dataset, symbol)
+
+
+def writeColumns(dataset, symbol, rows):
+    """
+    Writes one symbol's candles as column files; each file is written to a temporary name and
+    swapped in, so readers holding a memory map of the old file are not disturbed. time.npy is
+    swapped in last: isStale checks only its modification time, so a write interrupted part way
+    leaves the symbol stale and it is rebuilt on the next conversion.
+
+    Args:
+        dataset (str): dataset name
+        symbol (str): ticker symbol
+        rows (list): candle dicts as read from the CSV files
+
+    Returns:
+        None
+    """
+    path = getColumnPath(dataset, symbol)
+    os.makedirs(path, exist_ok=True)
+    for column in [x for x in COLUMNS if x != 'time'] + ['time']:
+        if column == 'time':
+            array = np.array([int(float(x[column])) for x in rows], dtype=DTYPES[column])
+        else:
+            array = np.array([float(x[column]) for x in rows], dtype=DTYPES[column])
+        np.save(os.path.join(path, column + '.tmp.npy'), array)
+        os.replace(os.path.join(path, column + '.tmp.npy'), os.path.join(path, column + '.npy'))
+
+
+def convertDataset(dataset, force=False):
+    """
+    Converts a dataset's CSV files to the columnar store, skipping anything whose columns are
+    already newer than the source. Daily and minute data are checked per symbol file (see
+    candle_store.py); the combined data/volume.csv is checked as a whole.
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily', 'minute' or 'volume'
+        force (bool): rebuild everything regardless of modification times
+
+    Returns:
+        list: symbols that were (re)built
+    """
+    if dataset in candle_store.DATASETS.values():
+        lstStale = [x for x in candle_store.getStoredSymbols(dataset) \
+            if force or isStale(getColumnPath(dataset, x), candle_store.getSymbolPath(dataset, x))]
+        for symbol in lstStale:
+            with open(candle_store.getSymbolPath(dataset, symbol), mode='r', encoding='UTF-8') as file:
+                writeColumns(dataset, symbol, list(csv.DictReader(file)))
+        return lstStale
+
+    source = os.path.join('data', dataset + '.csv')
+    stamp = os.path.join('data', 'columns', dataset, '.converted')
+    if not os.path.exists(source) or (not force and not isStale(stamp, source)):
+        return []
+
+    dictRows = {}
+    with open(source, mode='r', encoding='UTF-8') as file:
+        for row in csv.DictReader(file):
+            dictRows.setdefault(row["symbol"], []).append(row)
+    for symbol, lstRows in dictRows.items():
+        writeColumns(dataset, symbol, lstRows)
+    open(stamp, 'w').close()
+
+    return sorted(dictRows)
+
+
+def isStale(path, source):
+    """
+    Args:
+        path (str): converted output - a symbol's column directory or a dataset stamp file
+        source (str): path of the CSV the output is built from
+
+    Returns:
+        bool: True if the output is missing or older than the source CSV (time.npy is written
+            last, so its modification time stands for the whole directory)
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, 'time.npy')
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source)
+
+
+def loadSymbol(dataset, symbol):
+    """
+    Memory-maps one symbol's columns. The arrays are read-only views onto the files; nothing
+    is copied or parsed.
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+
+    Returns:
+        dict: column name -> numpy array (memory-mapped)
+    """
+    path = getColumnPath(dataset, symbol)
+    return {x: np.load(os.path.join(path, x + '.npy'), mmap_mode='r') for x in COLUMNS}
+
+
+def loadDataset(dataset, symbols=None, refresh=True):
+    """
+    Memory-maps the columns for every symbol in a dataset
+
+    Args:
+        dataset (str): dataset name, e.g. 'daily', 'minute' or 'volume'
+        symbols (list): symbols to load; all symbols in the dataset if None
+        refresh (bool): convert missing or stale symbols from CSV before loading
+
+    Returns:
+        dict: symbol -> dict of column name -> numpy array (memory-mapped)
+    """
+    if refresh:
+        convertDataset(dataset)
+
+    dictSymbols = {}
+    root = os.path.join('data', 'columns', dataset)
+    lstStored = sorted(x for x in os.listdir(root) if os.path.isdir(os.path.join(root, x))) \
+        if os.path.isdir(root) else []
+    for symbol in (lstStored if symbols is None else symbols):
+        if symbol in lstStored:
+            dictSymbols[symbol] = loadSymbol(dataset, symbol)
+    return dictSymbols
@@ -0,0 +1,162 @@
+import os, sys, itertools
+from collections import OrderedDict
+
+# Process-level cache for parsed datasets. Each entry remembers the modification time and size
+# of the files it was parsed from; a load whose files are unchanged returns the parsed rows
+# without touching the CSV, and any write to the files (an upsert, a rebuilt volume.csv) makes
+# the next load re-parse. Entries are evicted least-recently-used once their estimated size
+# passes the memory cap.
+
+MAX_BYTES = 512 * 1024 * 1024 # default memory cap for cached datasets
+SAMPLE_SIZE = 64 # items measured per list / dict when estimating sizes
+
+
+def getFingerprint(paths):
+    """
+    Args:
+        paths (list): files a dataset is parsed from
+
+    Returns:
+        tuple: (path, mtime in ns, size) per file; None values for files that do not exist
+    """
+    lstFingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            lstFingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            lstFingerprint.append((path, None, None))
+    return tuple(lstFingerprint)
+
+
+def estimateSize(value):
+    """
+    Estimated in-memory size of a cached value. Arrays and objects that report their buffers
+    (numpy arrays, CandleSeries, CandleIndex) count their nbytes; lists, tuples and dicts are
+    sized recursively, measuring an evenly spaced sample of at most SAMPLE_SIZE items and scaling
+    it up, so a million parsed rows cost a few dozen measurements
+
+    Args:
+        value (object): list of row dicts, pattern index, array, series or any other object
+
+    Returns:
+        int: estimated size in bytes
+    """
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+
+    intSize = sys.getsizeof(value)
+    if isinstance(value, dict):
+        lstSample = list(itertools.islice(value.items(), SAMPLE_SIZE))
+        intSample = sum(estimateSize(x) + estimateSize(y) for x, y in lstSample)
+    elif isinstance(value, (list, tuple)):
+        intStep = max((len(value) + SAMPLE_SIZE - 1) // SAMPLE_SIZE, 1)
+        lstSample = value[::intStep]
+        intSample = sum(estimateSize(x) for x in lstSample)
+    else:
+        return intSize
+
+    if len(lstSample) == 0:
+        return intSize
+    return intSize + intSample * len(value) // len(lstSample)
+
+
+class DatasetCache:
+    """
+    LRU cache of parsed datasets keyed by name and validated against file mtime / size
+    """
+
+    def __init__(self, maxBytes=MAX_BYTES):
+        """
+        Args:
+            maxBytes (int): estimated memory cap; least recently used entries are evicted past it
+        """
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict() # key -> (fingerprint, value, estimated bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, key, paths, loader):
+        """
+        Args:
+            key (str): dataset name, e.g. 'daily'
+            paths (list): files the dataset is parsed from
+            loader (function): called with no arguments to parse the dataset on a miss
+
+        Returns:
+            object: the cached value, or the loader's result if the files changed or it was never loaded
+        """
+        # Fingerprint before loading, so a write during the load is caught by the next call
+        fingerprint = getFingerprint(paths)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = loader()
+        self.store(key, fingerprint, value)
+        return value
+
+    def store(self, key, fingerprint, value):
+        """
+        Adds or replaces an entry, then evicts least recently used entries down to the memory cap.
+        A value larger than the whole cap is not cached.
+        """
+        self.invalidate(key)
+        intBytes = estimateSize(value)
+        if intBytes > self.maxBytes:
+            return
+        self.entries[key] = (fingerprint, value, intBytes)
+        self.bytes += intBytes
+        self.evict()
+
+    def evict(self):
+        """
+        Drops least recently used entries until the estimated total is within the cap
+        """
+        while self.bytes > self.maxBytes and len(self.entries) > 0:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry[2]
+
+    def invalidate(self, key=None):
+        """
+        Args:
+            key (str): dataset to drop; every dataset if None
+        """
+        if key is None:
+            self.entries.clear()
+            self.bytes = 0
+        elif key in self.entries:
+            self.bytes -= self.entries.pop(key)[2]
+
+    def setMaxBytes(self, maxBytes):
+        """
+        Args:
+            maxBytes (int): new memory cap; evicts immediately if the cache is over it
+        """
+        self.maxBytes = maxBytes
+        self.evict()
+
+    def getStats(self):
+        """
+        Returns:
+            dict: hits, misses, cached dataset names and estimated bytes held
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": list(self.entries), "bytes": self.bytes}
+
+
+cache = DatasetCache() # shared by the structure_data loaders
+
+
+def invalidate(key=None):
+    """
+    Drops a cached dataset (or all of them) so the next load re-parses from disk
+
+    Args:
+        key (str): dataset name, e.g. 'daily'; every dataset if None
+    """
+    cache.invalidate(key)
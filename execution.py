@@ -1,13 +1,40 @@
-import csv, indicators, accounts, pandas, strategies, build_patterns
+import csv, indicators, indicator_cache, accounts, strategies, build_patterns
 from datetime import datetime, timedelta
 
+def getWindowATR(candles, timeperiod, dataset=None):
+    """
+    ATR of the timeperiod candles before the latest one. When the caller says the candles are the
+    stored history of a dataset, and they form a contiguous run of it, the value is read from
+    indicator_cache, which computes the symbol's full ATR series once per window length and shares
+    it across every backtest step and hyperparameter combination; otherwise it is computed from
+    the candles directly.
+
+    Args:
+        candles (lst or CandleSeries): candles for a single symbol ending in the current date
+        timeperiod (int): ATR window length
+        dataset (str): 'daily', 'minute' or 'volume' if the candles are that dataset's stored
+            candles unchanged; None (e.g. for derived or adjusted prices) always computes directly
+
+    Returns:
+        float: average high - low range of the window
+    """
+    lstATR = candles[len(candles)-timeperiod-1:len(candles) - 1]
+    if dataset is not None and len(lstATR) == timeperiod and timeperiod > 0:
+        strSymbol = lstATR[-1]["symbol"]
+        intIndex = indicator_cache.getIndex(dataset, strSymbol, int(float(lstATR[-1]["time"])))
+        # The window's first candle must also line up, so no stored candle is missing from it
+        if intIndex is not None and intIndex >= timeperiod - 1 and \
+            indicator_cache.getSeries(dataset, strSymbol, "time")[intIndex - timeperiod + 1] == int(float(lstATR[0]["time"])):
+            return float(indicator_cache.getSeries(dataset, strSymbol, "atr", (timeperiod,))[intIndex])
+    return indicators.getATR(lstATR)
+
 def runStrategy(candles, account, params):
     """
     Called in backtest.py. params is a dictionary containing hyperparameters to test from backtest.
     Account is an object class which stores account balance and trading positions.
 
     Args:
-        candles (lst): the total set of data to be considered for the trading strategy ending in the current date
+        candles (lst or CandleSeries): the total set of data to be considered for the trading strategy ending in the current date
         account (TestAccount): TestAccount instance containing balance, holdings, etc.
         params (dict): dictionary of dates and windows relevant to executing the strategy
 
@@ -27,20 +54,22 @@ def runStrategy(candles, account, params):
     
     # Next, initialize lists of data to generate indicators / strategy outputs based on the window params
     lstTrend = candles[len(candles)-int(params["Trend"])-1:len(candles) - 1]
-    lstATR = candles[len(candles)-int(params["ATR"])-1:len(candles) - 1]
     lstRSI = candles[len(candles)-int(params["RSI"])-1:len(candles) - 1]
 
     # Set a trading price and quantity based on the midpoint of the current day's candle
-    if float(candles[-1]["open"]) <= float(candles[-1]["close"]): # Price closed above open
-        floatPrice = float(candles[-1]["open"]) + (float(candles[-1]["close"]) - float(candles[-1]["open"]) / 2)
+    floatOpen, floatClose = float(candles[-1]["open"]), float(candles[-1]["close"])
+    if floatOpen <= floatClose: # Price closed above open
+        floatPrice = floatOpen + (floatClose - floatOpen / 2)
     else: # Price closed below open
-        floatPrice = float(candles[-1]["open"]) - (float(candles[-1]["open"]) - float(candles[-1]["close"]) / 2)
+        floatPrice = floatOpen - (floatOpen - floatClose / 2)
 
     tradeAmount = account.trade_value # Trade in increments based on account definition
     floatQuantity = tradeAmount / floatPrice # Quantity for purchase is based on the trade amount from the account
     
     # Check ATR to determine spread for position stop-loss and profit target
-    floatATR = indicators.getATR(lstATR)
+    # params["ATR Dataset"] names the stored dataset the candles come from, if any, so the ATR can
+    # be read from indicator_cache
+    floatATR = getWindowATR(candles, int(params["ATR"]), params.get("ATR Dataset"))
     
     # Set stop-loss and profit target based on ATR and targeted profit multiple
     profitMultiple = account.profit_multiple
@@ -53,20 +82,18 @@ def runStrategy(candles, account, params):
     floatShortProfitTarget = floatPrice - (floatATR * profitMultiple)
 
     # Moving window analysis of normalized patterns
-    # First, build a list of patterns on the full set of candles using the new patterns module
-    lstConsolidatedPatterns = build_patterns.consolidatePatterns()
-
-    # Next, check the latest pattern including 
-    # NOTE: need to update - technically, the check should be looking for all patterns that match the first
-    # params["Pattern"]-1 items including the latest trading data and check to see the trading signal strength
-    # off of those patterns for a significant signal strength (i.e., if the pattern sequences are ten in length,
-    # we should be matching the last nine days of trading data and looking at the signals (which are based on
-    # the tenth day) to establish the final signal).
-    # This fix should be made to both lstCheck as well as the item comparison logic below.
-    lstCheck = indicators.scoreMovingWindow(candles[len(candles)-params["Pattern"]-1:len(candles) - 1], params)
-
-    for item in lstConsolidatedPatterns:
-        if item["sequence"] == lstCheck and item["signal"] == "buy" and item["strength"] > 1:
+    # The consolidated pattern model is mined once per data snapshot (see build_patterns.getPatternModel);
+    # the backtest loads it once and passes it in params, otherwise it is loaded (and cached) here
+    dictPatternModel = params.get("Pattern Model")
+    if dictPatternModel is None:
+        dictPatternModel = build_patterns.getPatternModel('daily', params)
+
+    # Score the last Pattern-1 closed candles and look up the signal counts of patterns that start
+    # with that sequence - the model's counts describe the candle that follows it
+    lstCheck = build_patterns.scoreMovingWindow(candles[len(candles)-params["Pattern"]:len(candles) - 1], params)
+
+    for item in build_patterns.getPatternSignals(dictPatternModel, lstCheck["sequence"]):
+        if item["buy"] > item["short"] and item["buy"] > 1:
             
             account.open_position("buy",
                         strSymbol,
@@ -76,7 +103,7 @@ def runStrategy(candles, account, params):
                         floatShortProfitTarget,
                         dateEffective)
         
-        elif item["sequence"] == lstCheck and item["signal"] == "short" and item["strength"] > 1:
+        elif item["short"] > item["buy"] and item["short"] > 1:
             
             account.open_position("short",
                         strSymbol,
@@ -1,32 +1,297 @@
-import pandas as pd, json, requests, time
+import pandas as pd, numpy as np, json, os, requests, time, threading, functools, candle_store, column_store
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, Counter
 
+# Root of the Coinbase Exchange REST API; can be pointed at a local stand-in server
+# (see mock_exchange.py) when testing or benchmarking the downloader
+API_URL = 'https://api.exchange.coinbase.com'
 
-def getProductCandles(symbol, start, end, granularity=86400):
+# Candles held in memory per symbol before being flushed to storage during a download
+BUFFER_SIZE = 10000
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every fetch thread so that concurrent downloads across
+    symbols stay within the public API budget (10 requests per second)
+    """
+
+    def __init__(self, rate=10, capacity=1):
+        """
+        Args:
+            rate (float): tokens (requests) added to the bucket per second
+            capacity (int): maximum number of tokens held, i.e. the largest allowed burst;
+                            kept at 1 by default so no one-second window exceeds the budget
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks the calling thread until a token is available, then consumes it
+
+        Returns:
+            None
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                floatWait = (1 - self.tokens) / self.rate
+            time.sleep(floatWait)
+
+
+class Checkpoint:
+    """
+    Durable per-symbol progress for a download job, kept in data/<dataset>/checkpoint.json.
+    Each symbol records the end of the last chunk whose candles were committed to storage and
+    any chunks that failed, so an interrupted job resumes where it stopped without re-fetching
+    (including long runs of empty chunks before a symbol was listed). A symbol's entry is
+    dropped once all its chunks are committed, so finished jobs leave no checkpoint behind.
+    """
+
+    def __init__(self, dataset):
+        """
+        Args:
+            dataset (str): dataset name, e.g. 'daily' or 'minute'
+        """
+        self.path = os.path.join(candle_store.getDatasetPath(dataset), 'checkpoint.json')
+        self.symbols = {}
+        if os.path.exists(self.path):
+            with open(self.path, mode='r', encoding='UTF-8') as file:
+                self.symbols = json.load(file)
+
+    def getCommitted(self, symbol):
+        """
+        Returns:
+            float: end of the last committed chunk for an interrupted symbol, else None
+        """
+        if symbol not in self.symbols:
+            return None
+        return self.symbols[symbol]["committed"]
+
+    def getFailed(self, symbol):
+        """
+        Returns:
+            list: (start, end) tuples of chunks that failed in an earlier run
+        """
+        if symbol not in self.symbols:
+            return []
+        return [tuple(x) for x in self.symbols[symbol]["failed"]]
+
+    def commit(self, symbol, end, done):
+        """
+        Records that every chunk for `symbol` up to `end` has been written to storage
+
+        Args:
+            symbol (str): ticker symbol
+            end (float): end time of the last chunk that was written
+            done (bool): True if this was the symbol's final planned chunk
+        """
+        entry = self.symbols.setdefault(symbol, {"committed": None, "failed": [], "done": False})
+        if entry["committed"] is None or end > entry["committed"]:
+            entry["committed"] = end
+        entry["done"] = done
+        self.prune(symbol)
+        self.save()
+
+    def fail(self, symbol, chunk):
+        """
+        Records a chunk that could not be fetched, so the next run retries it
+        """
+        entry = self.symbols.setdefault(symbol, {"committed": None, "failed": [], "done": False})
+        if list(chunk) not in entry["failed"]:
+            entry["failed"].append(list(chunk))
+            self.save()
+
+    def resolve(self, symbol, chunk):
+        """
+        Clears a previously failed chunk once it has been fetched
+        """
+        if symbol in self.symbols and list(chunk) in self.symbols[symbol]["failed"]:
+            self.symbols[symbol]["failed"].remove(list(chunk))
+            self.prune(symbol)
+            self.save()
+
+    def prune(self, symbol):
+        if symbol in self.symbols and self.symbols[symbol]["done"] and len(self.symbols[symbol]["failed"]) == 0:
+            del self.symbols[symbol]
+
+    def save(self):
+        # Nothing left to resume once every symbol has finished
+        if len(self.symbols) == 0:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+
+        # Write to a temporary file and swap it in so an interruption never leaves a torn checkpoint
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.tmp', 'w') as output_file:
+            json.dump(self.symbols, output_file)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class Progress:
+    """
+    Counts chunks and candles received during a download and periodically prints
+    throughput (candles per second) and the estimated time remaining
+    """
+
+    def __init__(self, totalChunks, interval=5):
+        """
+        Args:
+            totalChunks (int): number of chunks planned for the job
+            interval (float): minimum seconds between printed reports
+        """
+        self.total = totalChunks
+        self.chunks = 0
+        self.candles = 0
+        self.interval = interval
+        self.start = time.monotonic()
+        self.reported = self.start
+
+    def update(self, candles):
+        """
+        Args:
+            candles (int): number of candles in the chunk that just finished
+        """
+        self.chunks += 1
+        self.candles += candles
+        if time.monotonic() - self.reported >= self.interval or self.chunks == self.total:
+            self.reported = time.monotonic()
+            print(self.getReport())
+
+    def getReport(self):
+        """
+        Returns:
+            str: chunks done, candles received, throughput and ETA
+        """
+        floatElapsed = max(time.monotonic() - self.start, 1e-9)
+        strETA = 'unknown'
+        if self.chunks > 0:
+            strETA = str(timedelta(seconds=round(floatElapsed / self.chunks * (self.total - self.chunks))))
+        return str(self.chunks) + ' / ' + str(self.total) + ' chunks | ' + \
+            str(self.candles) + ' candles | ' + \
+            str(round(self.candles / floatElapsed)) + ' candles/s | ETA ' + strETA
+
+
+def getSession(poolSize=10):
+    """
+    Builds a persistent HTTP session whose connection pool is shared by every API call in a
+    download run, so chunks reuse keep-alive connections instead of reconnecting per request
+
+    Args:
+        poolSize (int): connections kept open per host; should be at least the number of fetch threads
+
+    Returns:
+        requests.Session: session with a sized connection pool and JSON accept header
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=poolSize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+
+def getProductCandles(symbol, start, end, granularity=86400, limiter=None, baseUrl=API_URL,
+                      session=None, retries=5, backoff=0.5):
     """
     Formats API call to Coinbase to download historical candlestick data for `symbol`
     Reference: https://docs.cloud.coinbase.com/exchange/reference/exchangerestapi_getproductcandles
 
+    Requests that come back 429 or 5xx (or fail to connect) are retried with exponential
+    backoff, honoring the Retry-After header when the API sends one. Once retries are
+    exhausted the last error is raised rather than returning a partial or error payload.
+
     Args:
         symbol (str): ticker symbol to download
         start (str): strt time in ISO 8601
         end (str): end time in ISO 8601
         granularity (int): desired timeslice in seconds
+        limiter (RateLimiter): shared token bucket; if None, sleeps a fixed 0.15s instead
+        baseUrl (str): root of the API, defaults to Coinbase Exchange
+        session (requests.Session): pooled session from getSession; a new one is built if None
+        retries (int): number of retries after the first attempt
+        backoff (float): delay in seconds before the first retry, doubled on each retry after
 
     Returns:
         list: list of dicts, which represent individual candles
     """
-    url = 'https://api.exchange.coinbase.com/products/' + symbol +'/candles/'
+    url = baseUrl + '/products/' + symbol +'/candles/'
     params = {
         'start': start,
         'end': end,
         'granularity': granularity
     }
-    headers = {'Accept': 'application/json'}
-    time.sleep(0.15) # Rate limit is 10 requests per second
-    response = requests.request('GET', url, headers=headers, params=params)
-    lst = json.loads(response.text)
-    return lst
+    if session is None:
+        session = getSession(1)
+
+    for attempt in range(retries + 1):
+        if limiter is None:
+            time.sleep(0.15) # Rate limit is 10 requests per second
+        else:
+            limiter.acquire()
+
+        floatWait = backoff * (2 ** attempt)
+        try:
+            response = session.get(url, params=params, timeout=30)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(floatWait)
+            continue
+
+        # Retry on rate limiting and server errors, anything else is returned or raised as-is
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt == retries:
+                response.raise_for_status()
+            if response.headers.get('Retry-After', '').isdigit():
+                floatWait = max(floatWait, int(response.headers['Retry-After']))
+            time.sleep(floatWait)
+            continue
+
+        response.raise_for_status()
+        lst = json.loads(response.text)
+        if not isinstance(lst, list): # error payloads come back as {"message": ...}
+            raise ValueError('Unexpected response for ' + symbol + ': ' + response.text[:200])
+        return lst
+
+
+def fetchChunk(symbol, chunk, granularity, limiter, baseUrl, session):
+    """
+    Fetches one planned chunk, converting a final failure into a bookkeeping record
+    so that one bad window does not abort the whole download
+
+    Args:
+        symbol (str): ticker symbol to download
+        chunk (tuple): (start, end) epoch pair from getChunks
+        granularity (int): desired timeslice in seconds
+        limiter (RateLimiter): shared token bucket, or None for the fixed sleep
+        baseUrl (str): root of the API
+        session (requests.Session): pooled session from getSession
+
+    Returns:
+        tuple (list, dict): candles (empty on failure) and a failure record (None on success)
+    """
+    try:
+        return getProductCandles(symbol,
+                                 epochToISOFormat(chunk[0]),
+                                 epochToISOFormat(chunk[1]),
+                                 granularity=granularity,
+                                 limiter=limiter,
+                                 baseUrl=baseUrl,
+                                 session=session), None
+    except (requests.RequestException, ValueError) as error:
+        return [], {"symbol": symbol, "start": chunk[0], "end": chunk[1], "error": str(error)}
 
 
 def epochToISOFormat(epoch):
@@ -42,61 +307,274 @@ def epochToISOFormat(epoch):
     return datetime.utcfromtimestamp(epoch).isoformat()
 
 
-def updateData(granularity=86400):
+def getChunks(start, end, granularity):
+    """
+    Splits a download window into the (start, end) epoch pairs requested per API call
+
+    Args:
+        start (int): first candle time to fetch, seconds since epoch
+        end (int): fetch up to this time, seconds since epoch
+        granularity (int): desired timeslice in seconds
+
+    Returns:
+        list: list of (start, end) tuples, each covering 250 candles
+    """
+    lstChunks = []
+    while start < end: # chunk api calls based on start and end dates
+        e = start + granularity * 250 # include 250 rows in each api call
+        lstChunks.append((start, e))
+        start = e + granularity
+    return lstChunks
+
+
+def findGaps(times, granularity):
+    """
+    Finds holes in a sorted time column with one vectorized diff
+
+    Args:
+        times (numpy array): candle times for one symbol, ascending
+        granularity (int): expected spacing between candles in seconds
+
+    Returns:
+        list: (first missing, last missing) candle time pairs, one per hole
+    """
+    times = np.asarray(times, dtype=np.int64)
+    lstIndex = np.flatnonzero(np.diff(times) > granularity)
+    return [(int(times[i]) + granularity, int(times[i + 1]) - granularity) for i in lstIndex]
+
+
+def planBackfill(gaps, granularity):
+    """
+    Covers a symbol's holes with the fewest request windows of the size getChunks uses. Windows
+    are placed greedily from the first missing candle, so small holes close to each other share
+    a single request instead of costing one each.
+
+    Args:
+        gaps (list): (first missing, last missing) pairs from findGaps, ascending
+        granularity (int): desired timeslice in seconds
+
+    Returns:
+        list: list of (start, end) tuples, each covering up to 250 candles
+    """
+    lstChunks = []
+    for first, last in gaps:
+        if len(lstChunks) > 0 and first <= lstChunks[-1][1]:
+            first = lstChunks[-1][1] + granularity # already covered by the previous window
+        while first <= last:
+            lstChunks.append((first, first + granularity * 250))
+            first = first + granularity * 251
+    return lstChunks
+
+
+def repairGaps(granularity=86400, workers=1, baseUrl=API_URL, symbols=None, bufferSize=BUFFER_SIZE):
+    """
+    Scans the stored history of each symbol for holes (e.g. from API outages or dropped chunks)
+    and fetches only the missing windows, upserting the results. Note that the API omits candles
+    for periods with no trades, so thinly traded symbols may report holes that cannot be filled.
+
+    Args:
+        granularity (int): desired timeslice in seconds; 86400 (daily) or 60 (minute)
+        workers (int): number of concurrent fetch threads sharing one rate limiter
+        baseUrl (str): root of the API, defaults to Coinbase Exchange
+        symbols (list): symbols to repair; every stored symbol if None
+        bufferSize (int): candles held in memory per symbol before they are written to storage
+
+    Returns:
+        list: failure records for any chunks that could not be fetched
+    """
+    if granularity not in candle_store.DATASETS:
+        print('repairGaps error: choose valid granularity')
+        return None
+    dataset = candle_store.DATASETS[granularity]
+
+    # The catalog counts holes per symbol as data is stored, so only symbols with holes are scanned
+    dictCatalog = candle_store.getCatalog(dataset)
+    lstHoles = [x for x in (dictCatalog if symbols is None else symbols) \
+        if x in dictCatalog and dictCatalog[x]["gaps"] > 0]
+
+    dictChunks = {}
+    for symbol, columns in column_store.loadDataset(dataset, lstHoles).items():
+        lstGaps = findGaps(columns["time"], granularity)
+        if len(lstGaps) > 0:
+            dictChunks[symbol] = planBackfill(lstGaps, granularity)
+            print(symbol, ':', len(lstGaps), 'gaps,', len(dictChunks[symbol]), 'requests')
+
+    lstFailed = fetchCandles(dictChunks,
+                             functools.partial(candle_store.upsertCandles, dataset),
+                             granularity,
+                             workers,
+                             baseUrl,
+                             bufferSize)
+    for failure in lstFailed:
+        print('repairGaps error: could not fetch', failure["symbol"],
+              epochToISOFormat(failure["start"]), 'to', epochToISOFormat(failure["end"]),
+              '-', failure["error"])
+    return lstFailed
+
+
+def fetchCandles(dictChunks, sink, granularity=86400, workers=1, baseUrl=API_URL, bufferSize=BUFFER_SIZE,
+                 checkpoint=None):
+    """
+    Downloads every planned chunk for every symbol and streams the candles to `sink` in batches
+    of about `bufferSize`, so memory stays bounded however much history is fetched. Chunks run
+    on a thread pool that shares one RateLimiter, so total traffic stays at the API's request
+    budget no matter how many threads are running; only a few chunks per thread are in flight
+    at once, and results are handed to the sink in planned order, so each symbol's batches
+    arrive oldest first. All calls share one pooled session. Chunks that still fail after
+    getProductCandles' own retries get one more recovery pass at the end; any left after that
+    are returned so the caller can report them instead of silently dropping the window.
+    Progress, throughput and ETA are printed as chunks complete.
+
+    Args:
+        dictChunks (dict): symbol -> list of (start, end) tuples from getChunks
+        sink (function): called as sink(symbol, candles) with each batch of API candles
+        granularity (int): desired timeslice in seconds
+        workers (int): number of fetch threads; 1 keeps the original sequential behavior
+        baseUrl (str): root of the API, defaults to Coinbase Exchange
+        bufferSize (int): number of candles buffered per symbol before flushing to the sink
+        checkpoint (Checkpoint): if given, updated after every flush and failure; each symbol's
+                                 chunks must be in ascending order of start time (they need not
+                                 be contiguous, e.g. retried failures ahead of new chunks)
+
+    Returns:
+        list: failure records ({"symbol", "start", "end", "error"}) for chunks that could not be fetched
+    """
+    lstFailed = []
+    session = getSession(max(workers, 1))
+    limiter = RateLimiter() if workers > 1 else None # sequential runs keep the fixed sleep
+
+    lstTasks = [(symbol, chunk) for symbol, lstChunks in dictChunks.items() for chunk in lstChunks]
+    dictRemaining = Counter(x[0] for x in lstTasks)
+    progress = Progress(len(lstTasks))
+    intNext = 0
+    queuePending = deque()
+    strBufferSymbol = None
+    lstBuffer = []
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while intNext < len(lstTasks) or len(queuePending) > 0:
+
+            # Top up the chunks in flight, bounded so finished results cannot pile up in memory
+            while intNext < len(lstTasks) and len(queuePending) < max(workers, 1) * 2:
+                symbol, chunk = lstTasks[intNext]
+                queuePending.append((symbol, chunk, executor.submit(fetchChunk,
+                                                                    symbol,
+                                                                    chunk,
+                                                                    granularity,
+                                                                    limiter,
+                                                                    baseUrl,
+                                                                    session)))
+                intNext += 1
+
+            symbol, chunk, future = queuePending.popleft()
+            candles, failure = future.result()
+            dictRemaining[symbol] -= 1
+            progress.update(len(candles))
+            if failure is not None:
+                lstFailed.append(failure)
+                if checkpoint is not None:
+                    checkpoint.fail(symbol, chunk)
+            elif checkpoint is not None:
+                checkpoint.resolve(symbol, chunk)
+
+            if symbol != strBufferSymbol:
+                print('Fetching ', symbol, '...')
+                strBufferSymbol = symbol
+
+            # Flush when the buffer is full or the symbol's last chunk is in, then checkpoint
+            lstBuffer.extend(candles)
+            if len(lstBuffer) >= bufferSize or dictRemaining[symbol] == 0:
+                if len(lstBuffer) > 0:
+                    sink(symbol, lstBuffer)
+                lstBuffer = []
+                if checkpoint is not None:
+                    checkpoint.commit(symbol, chunk[1], dictRemaining[symbol] == 0)
+
+    # Recovery pass: transient outages are usually over by the time the main pass finishes
+    lstStillFailed = []
+    for failure in lstFailed:
+        candles, retryFailure = fetchChunk(failure["symbol"],
+                                           (failure["start"], failure["end"]),
+                                           granularity,
+                                           limiter,
+                                           baseUrl,
+                                           session)
+        if len(candles) > 0:
+            sink(failure["symbol"], candles)
+        if retryFailure is not None:
+            lstStillFailed.append(retryFailure)
+        elif checkpoint is not None:
+            checkpoint.resolve(failure["symbol"], (failure["start"], failure["end"]))
+
+    session.close()
+    return lstStillFailed
+
+
+def updateData(granularity=86400, workers=1, baseUrl=API_URL, bufferSize=BUFFER_SIZE):
     """
     For each symbol in `data/symbols.csv`, downloads market data from Coinbase
-    from the latest date in `data/daily.csv` to current date. If the symbol does
-    not exist in the daily file yet, then it will download data from Jan 1, 2017 
-    to the current date. 
+    from the latest date in `data/daily/<symbol>.csv` to current date. If the symbol does
+    not exist in the daily data yet, then it will download data from Jan 1, 2017
+    to the current date.
+
+    The download starts at the last stored candle rather than the one after it, so a candle
+    that was still forming at the previous update is refreshed. New candles are upserted by
+    (symbol, time) into each symbol's file (see candle_store.py), so an update only costs
+    time proportional to the new data. Candles are written in batches as they arrive, so a
+    multi-year minute backfill never holds more than `bufferSize` candles in memory.
+
+    Progress is checkpointed per symbol (see Checkpoint), so if a long backfill is interrupted,
+    running updateData again resumes after the last committed chunk and retries failed ones.
 
     Args:
-        granularity (int): desired timeslice in seconds; currently only works for daily
+        granularity (int): desired timeslice in seconds; 86400 (daily) or 60 (minute)
+        workers (int): number of concurrent fetch threads sharing one rate limiter
+        baseUrl (str): root of the API, defaults to Coinbase Exchange
+        bufferSize (int): candles held in memory per symbol before they are written to storage
 
     Returns:
-        None: fills in `data/daily.csv' with updated data
+        list: failure records for any chunks that could not be fetched; fills in
+              `data/daily/' with updated data
     """
-    if granularity == 86400: 
-        fileName = 'daily.csv'
-    elif granularity == 60: 
-        fileName = 'minute.csv'
-    else: 
+    if granularity not in candle_store.DATASETS:
         print('updateData error: choose valid granularity')
         return None
+    dataset = candle_store.DATASETS[granularity]
 
     symbols = pd.read_csv('data/symbols.csv', index_col=None)
-    file = pd.read_csv('data/' + fileName, index_col=None)
-    newFile = pd.DataFrame() # container for all new symbol data
-    for symbol in symbols['symbol']: 
-        print('Fetching ', symbol, '...')
-        fileSymbol = file[file['symbol'] == symbol]
-        if len(fileSymbol) > 0:   # define start 
-            start = fileSymbol['time'].max()
-            start = start + granularity
-        else: 
+    checkpoint = Checkpoint(dataset)
+    dictChunks = {} # planned api calls per symbol
+    for symbol in symbols['symbol']:
+        start = candle_store.getLastTime(dataset, symbol) # define start
+        if start is None:
             start = datetime(2017,1,1).timestamp()
+        if checkpoint.getCommitted(symbol) is not None: # resume an interrupted job
+            start = max(start, checkpoint.getCommitted(symbol) + granularity)
         end = datetime.now()    # define end
         # end = end - timedelta(hours=end.hour,        # Round now() to current day
         #                         minutes=end.minute,  # by removing hour, min, etc.
         #                         seconds=end.second,
-        #                         microseconds=end.microsecond) 
+        #                         microseconds=end.microsecond)
         end = end.timestamp()
-        newData = [] # container for all api call results
-        while start < end: # chunk api calls based on start and end dates
-            e = start + granularity * 250 # include 250 rows in each api call
-            candles = getProductCandles(symbol, 
-                                        epochToISOFormat(start), 
-                                        epochToISOFormat(e), 
-                                        granularity=granularity)
-            newData.extend(candles)
-            start = e + granularity
-        newData = pd.DataFrame(newData, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
-        newData['symbol'] = symbol # add symbol column to all responses for this symbol
-        newFile = newFile.append(newData)
-    file = file.append(newFile)
-    file = file.sort_values(['symbol', 'time']) # inefficient, but it will re-sort the file
-    file.to_csv('data/' + fileName, index=False)
+        # Failed chunks from an earlier run lie before the resume point, so merge them into the
+        # new chunks by start time to keep each symbol's chunks in ascending order
+        dictChunks[symbol] = sorted(set(checkpoint.getFailed(symbol)) | set(getChunks(start, end, granularity)))
+
+    lstFailed = fetchCandles(dictChunks,
+                             functools.partial(candle_store.upsertCandles, dataset),
+                             granularity,
+                             workers,
+                             baseUrl,
+                             bufferSize,
+                             checkpoint)
+    for failure in lstFailed:
+        print('updateData error: could not fetch', failure["symbol"],
+              epochToISOFormat(failure["start"]), 'to', epochToISOFormat(failure["end"]),
+              '-', failure["error"])
+    return lstFailed
 
 
 # run file; can be called by live application daily
 # will update the data file if possible
-updateData()
\ No newline at end of file
+if __name__ == '__main__':
+    updateData()
@@ -0,0 +1,129 @@
+import numpy as np
+import candle_store, dataset_cache, indicators, structure_data
+
+# Memoized full-series indicators. The first request for an indicator on a symbol computes the
+# whole history once with the series functions in indicators.py; later requests with the same
+# (dataset, symbol, indicator, params) - e.g. every hyperparameter combination that shares an
+# ATR window - are served by indexing or slicing the stored array. Entries are tied to the
+# modification time and size of the symbol's data file, so new candles invalidate them, and
+# share the LRU memory cap / hit and miss counters of dataset_cache.DatasetCache.
+
+MAX_BYTES = 256 * 1024 * 1024 # default memory cap for cached indicator series
+
+LOADERS = {'daily': structure_data.getDailySeries,
+           'minute': structure_data.getMinuteSeries,
+           'volume': structure_data.getVolumeSeries}
+
+# Indicator name -> function(series, *params) returning one value per candle
+INDICATORS = {"time": lambda series: np.array(series.time),
+              "sma": lambda series, n: indicators.getSMASeries(series.close, n),
+              "ema": lambda series, n: indicators.getEMASeries(series.close, n),
+              "atr": lambda series, n: indicators.getATRSeries(series.high, series.low, n),
+              "rsi": lambda series, n: indicators.getRSISeries(series.open, series.close, n),
+              "supertrend": indicators.getSuperTrendSeries,
+              "rising": lambda series, n: indicators.getTrendSeries(series.low, series.high, n)[0],
+              "falling": lambda series, n: indicators.getTrendSeries(series.low, series.high, n)[1]}
+
+cache = dataset_cache.DatasetCache(MAX_BYTES)
+
+
+def getSourcePath(dataset, symbol):
+    """
+    Args:
+        dataset (str): 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+
+    Returns:
+        str: file the symbol's candles are read from
+    """
+    if dataset == 'volume':
+        return 'data/volume.csv'
+    return candle_store.getSymbolPath(dataset, symbol)
+
+
+def getSeries(dataset, symbol, indicator, params=()):
+    """
+    Args:
+        dataset (str): 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+        indicator (str): key of INDICATORS, e.g. 'atr'
+        params (tuple): indicator parameters, e.g. (14,)
+
+    Returns:
+        numpy array: the indicator for every candle of the symbol, oldest first (empty if the
+            symbol has no data); shared with the cache, so treat it as read-only
+    """
+    params = tuple(params)
+
+    def loader():
+        dictSeries = LOADERS[dataset]([symbol])
+        if symbol not in dictSeries:
+            return np.array([])
+        return INDICATORS[indicator](dictSeries[symbol], *params)
+
+    return cache.load((dataset, symbol, indicator, params), [getSourcePath(dataset, symbol)], loader)
+
+
+def getIndex(dataset, symbol, time):
+    """
+    Args:
+        dataset (str): 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+        time (int): candle time, seconds since epoch
+
+    Returns:
+        int: position of the candle with exactly that time in the symbol's series, or None
+    """
+    times = getSeries(dataset, symbol, "time")
+    intIndex = int(np.searchsorted(times, time))
+    if intIndex < len(times) and times[intIndex] == time:
+        return intIndex
+    return None
+
+
+def getValue(dataset, symbol, indicator, params, time):
+    """
+    Args:
+        dataset (str): 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+        indicator (str): key of INDICATORS
+        params (tuple): indicator parameters
+        time (int): time of the candle to read the indicator at
+
+    Returns:
+        float: the indicator at that candle, or None if the candle is not stored or there is
+            not enough history before it
+    """
+    intIndex = getIndex(dataset, symbol, time)
+    if intIndex is None:
+        return None
+    value = getSeries(dataset, symbol, indicator, params)[intIndex]
+    if isinstance(value, np.floating) and np.isnan(value):
+        return None
+    return value.item()
+
+
+def getWindow(dataset, symbol, indicator, params, start, end):
+    """
+    Args:
+        dataset (str): 'daily', 'minute' or 'volume'
+        symbol (str): ticker symbol
+        indicator (str): key of INDICATORS
+        params (tuple): indicator parameters
+        start (int): earliest candle time to include, seconds since epoch
+        end (int): latest candle time to include, seconds since epoch
+
+    Returns:
+        numpy array: the indicator for the candles with start <= time <= end (a view, no copy)
+    """
+    times = getSeries(dataset, symbol, "time")
+    return getSeries(dataset, symbol, indicator, params)[np.searchsorted(times, start):
+                                                        np.searchsorted(times, end, side='right')]
+
+
+def getStats():
+    """
+    Returns:
+        dict: hits, misses, cached keys and estimated bytes held
+    """
+    return cache.getStats()
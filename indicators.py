@@ -1,3 +1,6 @@
+import candle_series
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 # import execution
 
 # Test code for local development, will comment out once strategy.py is set up to pass along basic
@@ -35,27 +38,29 @@ def risingCheck(data):
     Basic directional: objective rising signals based on impulsive moves and pullbacks 
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
 
     Returns:
         bool: if price is rising
     """
-    currentLow = float(data[0]["low"])
-    pullbackLow = float(data[0]["low"])
-    highestHigh = float(data[0]["high"])
+    lstLow = candle_series.getColumn(data, "low")
+    lstHigh = candle_series.getColumn(data, "high")
+    currentLow = lstLow[0]
+    pullbackLow = lstLow[0]
+    highestHigh = lstHigh[0]
     boolRising = True
-    for candle in data:
+    for low, high in zip(lstLow, lstHigh):
         # If low is lower than pullbackLow, return False
-        if float(candle["low"]) < pullbackLow:
+        if low < pullbackLow:
             boolRising = False
         # If low is lower than lowestCurrent and higher than pullbackLow set currentLow to low
-        elif float(candle["low"]) < currentLow and float(candle["low"]) > pullbackLow:
-            currentLow = float(candle["low"])
+        elif low < currentLow and low > pullbackLow:
+            currentLow = low
         # If high is new highest, update highestHigh and set pullbackLow to currentLow
-        elif float(candle["high"]) > highestHigh:
-            highestHigh = float(candle["high"])
+        elif high > highestHigh:
+            highestHigh = high
             pullbackLow = currentLow
-            currentLow = float(candle["low"])
+            currentLow = low
     
     return boolRising
 
@@ -65,35 +70,38 @@ def fallingCheck(data):
     Basic directional: objective falling signals based on impulsive moves and pullbacks 
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
 
     Returns:
         bool: if price is falling
     """
+    lstLow = candle_series.getColumn(data, "low")
+    lstHigh = candle_series.getColumn(data, "high")
+
     # Set current high and pullback high to opening high price, and lowest low as opening low price
-    currentHigh = float(data[0]["high"])
-    pullbackHigh = float(data[0]["high"])
-    lowestLow = float(data[0]["low"])
+    currentHigh = lstHigh[0]
+    pullbackHigh = lstHigh[0]
+    lowestLow = lstLow[0]
     
     # Set falling indicator to True by default
     boolFalling = True
     
     # Iterate through candles
-    for candle in data:
+    for low, high in zip(lstLow, lstHigh):
         
         # If high is higher than pullbackHigh, return False
-        if float(candle["high"]) > pullbackHigh:
+        if high > pullbackHigh:
             boolFalling = False
         
         # If high is higher than currentHigh and lower than pullbackHigh set currentHigh to high
-        elif float(candle["high"]) > currentHigh and float(candle["high"]) < pullbackHigh:
-            currentHigh = float(candle["high"])
+        elif high > currentHigh and high < pullbackHigh:
+            currentHigh = high
         
         # If low is new lowest, update lowestLow and set pullbackHigh to currentHigh
-        elif float(candle["low"]) < lowestLow:
-            lowestLow = float(candle["low"])
+        elif low < lowestLow:
+            lowestLow = low
             pullbackHigh = currentHigh
-            currentHigh = float(candle["high"])
+            currentHigh = high
     
     return boolFalling
 
@@ -102,15 +110,15 @@ def getATR(data):
     Average True Range - volatility indicator: average of total price spreads across the dataset 
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
 
     Returns:
         float: TODO
     """
     intCounter = 0
     returnATR = 0
-    for candle in data:
-        returnATR += (float(candle["high"]) - float(candle["low"]))
+    for high, low in zip(candle_series.getColumn(data, "high"), candle_series.getColumn(data, "low")):
+        returnATR += (high - low)
         intCounter += 1
     return (returnATR / intCounter)
 
@@ -119,15 +127,15 @@ def getSMA(data):
     Simple Moving Average: average of closing prices across the dataset
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
 
     Returns:
         float: TODO
     """
     intCounter = 0
     returnAvgPrice = 0
-    for candle in data:
-        returnAvgPrice += float(candle["close"])
+    for close in candle_series.getColumn(data, "close"):
+        returnAvgPrice += close
         intCounter += 1
     return (returnAvgPrice / intCounter)
 
@@ -137,30 +145,32 @@ def getEMA(data, timeperiod):
     Exponential Moving Average: weighted price average that favors recency in price movement
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
         timeperiod (int): calculation window
 
     Returns:
         float: TODO
     """
-    lstSMA = []
-    lstEMA = []
+    lstClose = candle_series.getColumn(data, "close")
 
     # Separate data into initial SMA and subsequent EMA calculation window based on timeperiod
-    for i in range(0, timeperiod):
-        lstSMA.append(data[i])
-    for i in range(timeperiod, len(data)):
-        lstEMA.append(data[i])
+    lstSMA = lstClose[0:timeperiod]
+    lstEMA = lstClose[timeperiod:]
+    if len(lstSMA) < timeperiod:
+        raise IndexError("getEMA needs at least timeperiod candles")
 
     # Calculate SMA for initial EMA based 
-    returnEMA = getSMA(lstSMA)
+    returnEMA = 0
+    for close in lstSMA:
+        returnEMA += close
+    returnEMA = returnEMA / timeperiod
     
     # Calculate weighting based on timeperiod
     floatMultiplier = (2 / (timeperiod + 1))
 
     # For loop to calculate the exponential moving average
-    for candle in lstEMA:
-        returnEMA = (float(candle["close"]) * floatMultiplier) + (returnEMA * (1 - floatMultiplier))
+    for close in lstEMA:
+        returnEMA = (close * floatMultiplier) + (returnEMA * (1 - floatMultiplier))
 
     return returnEMA
 
@@ -172,14 +182,12 @@ def getRSI(data, timeperiod):
     Note: this uses a smoothing function vs. moving frame - may need to reevaluate (TODO)
 
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
         timeperiod (int): calculation window
 
     Returns:
         float: TODO
     """
-    lstInit = []
-    lstRSI = []
     lstGains = []
     lstLosses = []
 
@@ -189,31 +197,32 @@ def getRSI(data, timeperiod):
     RSI = None
 
     # Separate data into initial and subsequent calculation window based on timeperiod
-    for i in range(0, timeperiod):
-        lstInit.append(data[i])
-    for i in range(timeperiod, len(data)):
-        lstRSI.append(data[i])
+    lstPairs = list(zip(candle_series.getColumn(data, "open"), candle_series.getColumn(data, "close")))
+    lstInit = lstPairs[0:timeperiod]
+    lstRSI = lstPairs[timeperiod:]
+    if len(lstInit) < timeperiod:
+        raise IndexError("getRSI needs at least timeperiod candles")
 
     # Calculate average gains and losses for initial period
-    for candle in lstInit:
+    for floatOpen, floatClose in lstInit:
         # Check if gain or loss, add to appropriate list
-        if float(candle["open"]) < float(candle["close"]):
-            lstGains.append(float(candle["close"])-float(candle["open"]))
+        if floatOpen < floatClose:
+            lstGains.append(floatClose - floatOpen)
         else:
-            lstLosses.append(float(candle["open"])-float(candle["close"]))
+            lstLosses.append(floatOpen - floatClose)
     
     avgGains = sum(lstGains) / timeperiod
     avgLosses = sum(lstLosses) / timeperiod
 
     # For loop to update avgGains, avgLosses on remaining values
-    for candle in lstRSI:
-        if float(candle["open"]) < float(candle["close"]):
+    for floatOpen, floatClose in lstRSI:
+        if floatOpen < floatClose:
             avgGains = ((avgGains * (timeperiod - 1)) + \
-                (float(candle["close"])-float(candle["open"]))) \
+                (floatClose - floatOpen)) \
                     / timeperiod
         else:
             avgLosses = ((avgLosses * (timeperiod - 1)) + \
-                (float(candle["open"])-float(candle["close"]))) \
+                (floatOpen - floatClose)) \
                     / timeperiod
 
     # Calculate final RS, RSI
@@ -234,7 +243,7 @@ def getSuperTrend(candles, timeperiod=10, multiplier=3):
     Used to determine price trending direction
 
     Args:
-        candles (lst of dicts: set of candle data
+        candles (lst of dicts or CandleSeries): set of candle data
         timeperiod (int): window to examine trend data - 10 candles by default
         multiplier (int): magnitude factor for supertrend, 3 by default
 
@@ -242,9 +251,18 @@ def getSuperTrend(candles, timeperiod=10, multiplier=3):
         lstSuperTrend (lst): supertrend data for the given set of candles
     '''
 
-    lstStart = candles[0:timeperiod + 1]
+    # Parse the columns once; each window is then a range of indices into them
+    lstHigh = candle_series.getColumn(candles, "high")
+    lstLow = candle_series.getColumn(candles, "low")
+    lstClose = candle_series.getColumn(candles, "close")
+    intWindow = min(timeperiod + 1, len(lstClose))
     intCounter = timeperiod + 1
 
+    # ATR of every window in one vectorized pass over the candle ranges. sumWindows adds each window
+    # left to right like getATR, so the bands compared below are bit for bit the scalar ones
+    lstATR = (sumWindows(np.subtract(lstHigh, lstLow), intWindow) / intWindow).tolist() \
+        if intWindow > 0 else []
+
     prevFinalUpper = 99999999
     prevFinalLower = -99999999
     prevSuperTrend = 0
@@ -253,36 +271,39 @@ def getSuperTrend(candles, timeperiod=10, multiplier=3):
     lstSuperTrend = []
 
     # Iterate through the full set of candles, calculating supertrend along the way
-    while intCounter < len(candles):
+    while intCounter < len(lstClose):
+
+        # Window is the intWindow candles ending just before intCounter
+        intLast = intCounter - 1
 
-        floatATR = getATR(lstStart)
+        floatATR = lstATR[intLast]
         
-        basicUpper = ((float(lstStart[-1]["high"]) + float(lstStart[-1]["low"])) / 2) + (multiplier * floatATR)
-        basicLower = ((float(lstStart[-1]["high"]) + float(lstStart[-1]["low"])) / 2) - (multiplier * floatATR)
+        basicUpper = ((lstHigh[intLast] + lstLow[intLast]) / 2) + (multiplier * floatATR)
+        basicLower = ((lstHigh[intLast] + lstLow[intLast]) / 2) - (multiplier * floatATR)
 
         # Establish basic current upper band
-        if basicUpper < prevFinalUpper or float(lstStart[len(lstStart) - 2]["close"]) > prevFinalUpper:
+        if basicUpper < prevFinalUpper or lstClose[intLast - 1] > prevFinalUpper:
             finalUpper = basicUpper
         else:
             finalUpper = prevFinalUpper
         
         # Establish basic current lower band
-        if basicLower > prevFinalLower or float(lstStart[len(lstStart) - 2]["close"]) < prevFinalLower:
+        if basicLower > prevFinalLower or lstClose[intLast - 1] < prevFinalLower:
             finalLower = basicLower
         else:
             finalLower = prevFinalLower
         
         # Compare to previous SuperTrend line value and current closing price to 
-        if prevSuperTrend == prevFinalUpper and float(lstStart[-1]["close"]) < finalUpper:
+        if prevSuperTrend == prevFinalUpper and lstClose[intLast] < finalUpper:
             superTrend = finalUpper
         
-        elif prevSuperTrend == prevFinalUpper and float(lstStart[-1]["close"]) > finalUpper:
+        elif prevSuperTrend == prevFinalUpper and lstClose[intLast] > finalUpper:
             superTrend = finalLower
         
-        elif prevSuperTrend == prevFinalLower and float(lstStart[-1]["close"]) > finalLower:
+        elif prevSuperTrend == prevFinalLower and lstClose[intLast] > finalLower:
             superTrend = finalLower
         
-        elif prevSuperTrend == prevFinalLower and float(lstStart[-1]["close"]) < finalLower:
+        elif prevSuperTrend == prevFinalLower and lstClose[intLast] < finalLower:
             superTrend = finalUpper
         
         lstSuperTrend.append(superTrend)
@@ -291,35 +312,175 @@ def getSuperTrend(candles, timeperiod=10, multiplier=3):
         prevFinalLower = finalLower
         prevSuperTrend = superTrend
 
-        lstStart.append(candles[intCounter])
-        lstStart.pop(0)
         intCounter += 1
 
     return lstSuperTrend
 
+###### Full-series indicators #####
+# Companions to the scalar functions above that take whole columns (numpy arrays or lists) and
+# return the indicator at every point in one pass, with NaN where there is not enough history.
+# They do the same floating-point operations in the same order as the scalars, so each point
+# matches the scalar result exactly:
+#   getSMASeries(close, n)[i] == getSMA(candles[i-n+1:i+1])
+#   getATRSeries(high, low, n)[i] == getATR(candles[i-n+1:i+1])
+#   getEMASeries(close, n)[i] == getEMA(candles[:i+1], n)
+#   getRSISeries(open, close, n)[i] == getRSI(candles[:i+1], n)
+
+def sumWindows(values, timeperiod):
+    """
+    Sums every window of timeperiod values, adding left to right like the scalar loops do;
+    the additions are vectorized across windows rather than run once per window
+
+    Args:
+        values (array): values to sum
+        timeperiod (int): window length
+
+    Returns:
+        numpy array: sum of the window ending at each index, NaN for the first timeperiod - 1
+    """
+    values = np.asarray(values, dtype=np.float64)
+    returnSums = np.full(len(values), np.nan)
+    if timeperiod < 1 or len(values) < timeperiod:
+        return returnSums
+
+    windows = sliding_window_view(values, timeperiod)
+    floatSums = np.zeros(len(windows))
+    for i in range(timeperiod):
+        floatSums += windows[:, i]
+    returnSums[timeperiod - 1:] = floatSums
+    return returnSums
+
+def getSMASeries(close, timeperiod):
+    """
+    Args:
+        close (array): close prices, oldest first
+        timeperiod (int): calculation window
+
+    Returns:
+        numpy array: simple moving average of the timeperiod closes ending at each index
+    """
+    return sumWindows(close, timeperiod) / timeperiod
+
+def getATRSeries(high, low, timeperiod):
+    """
+    Args:
+        high (array): high prices, oldest first
+        low (array): low prices, oldest first
+        timeperiod (int): calculation window
+
+    Returns:
+        numpy array: average high - low range of the timeperiod candles ending at each index
+    """
+    return sumWindows(np.asarray(high, dtype=np.float64) - np.asarray(low, dtype=np.float64), timeperiod) / timeperiod
+
+def getEMASeries(close, timeperiod):
+    """
+    Args:
+        close (array): close prices, oldest first
+        timeperiod (int): calculation window
+
+    Returns:
+        numpy array: EMA seeded with the SMA of the first timeperiod closes, at each index
+    """
+    lstClose = np.asarray(close, dtype=np.float64).tolist()
+    returnEMA = np.full(len(lstClose), np.nan)
+    if timeperiod < 1 or len(lstClose) < timeperiod:
+        return returnEMA
+
+    # Seed with the SMA of the first timeperiod closes, summed in order like getEMA
+    floatEMA = 0
+    for floatClose in lstClose[:timeperiod]:
+        floatEMA += floatClose
+    floatEMA = floatEMA / timeperiod
+    returnEMA[timeperiod - 1] = floatEMA
+
+    # Single pass of the same recurrence getEMA applies
+    floatMultiplier = (2 / (timeperiod + 1))
+    for i in range(timeperiod, len(lstClose)):
+        floatEMA = (lstClose[i] * floatMultiplier) + (floatEMA * (1 - floatMultiplier))
+        returnEMA[i] = floatEMA
+    return returnEMA
+
+def getRSISeries(open, close, timeperiod):
+    """
+    Args:
+        open (array): open prices, oldest first
+        close (array): close prices, oldest first
+        timeperiod (int): calculation window
+
+    Returns:
+        numpy array: Wilder-smoothed RSI (as in getRSI) at each index
+    """
+    lstOpen = np.asarray(open, dtype=np.float64).tolist()
+    lstClose = np.asarray(close, dtype=np.float64).tolist()
+    returnRSI = np.full(len(lstClose), np.nan)
+    if timeperiod < 1 or len(lstClose) < timeperiod:
+        return returnRSI
+
+    # Average gains and losses over the initial period, summed in order like getRSI
+    lstGains = []
+    lstLosses = []
+    for floatOpen, floatClose in zip(lstOpen[:timeperiod], lstClose[:timeperiod]):
+        if floatOpen < floatClose:
+            lstGains.append(floatClose - floatOpen)
+        else:
+            lstLosses.append(floatOpen - floatClose)
+    avgGains = sum(lstGains) / timeperiod
+    avgLosses = sum(lstLosses) / timeperiod
+
+    # Smooth through the remaining candles, recording RSI after each one
+    for i in range(timeperiod - 1, len(lstClose)):
+        if i >= timeperiod:
+            if lstOpen[i] < lstClose[i]:
+                avgGains = ((avgGains * (timeperiod - 1)) + (lstClose[i] - lstOpen[i])) / timeperiod
+            else:
+                avgLosses = ((avgLosses * (timeperiod - 1)) + (lstOpen[i] - lstClose[i])) / timeperiod
+
+        if avgLosses == 0:
+            returnRSI[i] = 100
+        else:
+            returnRSI[i] = 100 - (100 / (1 + (avgGains / avgLosses)))
+    return returnRSI
+
+def getSuperTrendSeries(candles, timeperiod=10, multiplier=3):
+    """
+    Args:
+        candles (lst of dicts or CandleSeries): set of candle data
+        timeperiod (int): window to examine trend data
+        multiplier (int): magnitude factor for supertrend
+
+    Returns:
+        numpy array: getSuperTrend aligned by candle - entry k of getSuperTrend is for the window
+            ending at candle k + timeperiod - with NaN where it has no entry
+    """
+    returnSuperTrend = np.full(len(candles), np.nan)
+    lstSuperTrend = getSuperTrend(candles, timeperiod, multiplier)
+    returnSuperTrend[timeperiod:timeperiod + len(lstSuperTrend)] = lstSuperTrend
+    return returnSuperTrend
+
 ###### Candlestick patterns: 32.8%, engulfing, etc, #####
 
 def get382(data):
     """
     32.8 Candle: hammer or inverted hammer - potential reversal indicators
     Args:
-        data (list): list of candlestick dictionaries
+        data (list or CandleSeries): list of candlestick dictionaries
 
     Returns:
         tuple (str, bool): TODO 
     """
     for candle in data:
+        floatOpen, floatClose = float(candle["open"]), float(candle["close"])
+        floatHigh, floatLow = float(candle["high"]), float(candle["low"])
         # Check for bullish scenario, else check bearish scenario
-        if float(candle["close"]) > float(candle["open"]):  
+        if floatClose > floatOpen:  
             # If entire candle falls within 38.2% Fibonnaci retracement, return True, else False
-            if float(candle["open"]) > \
-                float(candle["high"]) - ((float(candle["high"]) - float(candle["low"])) * 0.382):
+            if floatOpen > floatHigh - ((floatHigh - floatLow) * 0.382):
                 return "Bullish", True  
             else:
                 return "Bullish", False
         else:
-            if float(candle["open"]) < \
-                float(candle["low"]) + ((float(candle["high"]) - float(candle["low"])) * 0.382):
+            if floatOpen < floatLow + ((floatHigh - floatLow) * 0.382):
                 return "Bearish", True
             else:
                 return "Bearish", False
@@ -329,27 +490,26 @@ def getEngulfing(oldcandle, newcandle):
     Engulfing Formation: another reversal indicator
     
     Args:
-        olcandle (dict):
-        newcandle (dict): 
+        olcandle (dict or Candle):
+        newcandle (dict or Candle): 
 
     Returns:
         tuple (str, bool): TODO 
     """
+    oldOpen, oldClose = float(oldcandle["open"]), float(oldcandle["close"])
+    newOpen, newClose = float(newcandle["open"]), float(newcandle["close"])
+
     # Check for bearish scenario
-    if float(oldcandle["close"]) > float(oldcandle["open"]) \
-        and float(newcandle["open"]) > float(newcandle["close"]):
+    if oldClose > oldOpen and newOpen > newClose:
         # Check engulfing
-        if float(newcandle["open"]) > float(oldcandle["close"]) \
-            and float(newcandle["close"]) < float(oldcandle["open"]):
+        if newOpen > oldClose and newClose < oldOpen:
             return "Bearish", True
         else:
             return "Bearish", False
     # Check for bullish scenario
-    elif float(oldcandle["open"]) > float(oldcandle["close"]) \
-        and float(newcandle["close"]) > float(newcandle["open"]):
+    elif oldOpen > oldClose and newClose > newOpen:
         # Check engulfing
-        if float(newcandle["close"]) > float(oldcandle["open"]) \
-            and float(newcandle["open"]) < float(oldcandle["close"]):
+        if newClose > oldOpen and newOpen < oldClose:
             return "Bullish", True
         else:
             return "Bullish", False
@@ -362,26 +522,27 @@ def getAboveBelow(oldcandle, newcandle):
     Close above / below candles: reversal - indicates change in support or resistance
     
     Args:
-        olcandle (dict):
-        newcandle (dict): 
+        olcandle (dict or Candle):
+        newcandle (dict or Candle): 
         
     Returns:
         tuple (str, bool): TODO 
     """
+    oldOpen, oldClose = float(oldcandle["open"]), float(oldcandle["close"])
+    newOpen, newClose = float(newcandle["open"]), float(newcandle["close"])
+
     # Check for bearish scenario
-    if float(oldcandle["close"]) > float(oldcandle["open"]) \
-        and float(newcandle["open"]) > float(newcandle["close"]):
+    if oldClose > oldOpen and newOpen > newClose:
         # Check close below
-        if float(newcandle["close"]) < float(oldcandle["low"]):
+        if newClose < float(oldcandle["low"]):
             return "Bearish, Close Below", True
         else:
             return "Bearish", False
     
     # Check for bullish scenario
-    elif float(oldcandle["open"]) > float(oldcandle["close"]) \
-        and float(newcandle["close"]) > float(newcandle["open"]):
+    elif oldOpen > oldClose and newClose > newOpen:
         # Check close above
-        if float(newcandle["close"]) > float(oldcandle["high"]):
+        if newClose > float(oldcandle["high"]):
             return "Bullish, Close Above", True
         else:
             return "Bullish", False
@@ -390,6 +551,159 @@ def getAboveBelow(oldcandle, newcandle):
     else:
         return "Not Above / Below"
 
+###### Series-level scanners #####
+# Whole-history versions of the candle patterns and trend checks above. They take price columns
+# (numpy arrays or lists, oldest first) and evaluate every bar at once. Pattern scanners return
+# one int8 value per bar: BULLISH / BEARISH where the pattern fires in that direction, 0 where it
+# does not (or there is not enough history); the trend scanner returns boolean masks. They apply the same comparisons as the scalar functions, so
+# each bar agrees with calling them on that bar / pair / window.
+
+BULLISH = 1
+BEARISH = -1
+
+def get382Series(open, high, low, close):
+    """
+    Args:
+        open, high, low, close (array): price columns
+
+    Returns:
+        numpy array: per bar, BULLISH / BEARISH where get382 on that candle returns (direction, True)
+    """
+    open, high, low, close = (np.asarray(x, dtype=np.float64) for x in (open, high, low, close))
+    boolBullish = close > open
+    boolHit = np.where(boolBullish,
+                       open > high - ((high - low) * 0.382),
+                       open < low + ((high - low) * 0.382))
+    return np.where(boolHit, np.where(boolBullish, BULLISH, BEARISH), 0).astype(np.int8)
+
+def getEngulfingSeries(open, close):
+    """
+    Args:
+        open, close (array): price columns
+
+    Returns:
+        numpy array: per bar, BULLISH / BEARISH where getEngulfing(previous bar, bar) returns
+            (direction, True); always 0 for the first bar
+    """
+    open, close = np.asarray(open, dtype=np.float64), np.asarray(close, dtype=np.float64)
+    returnMask = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 2:
+        return returnMask
+    oldOpen, oldClose, newOpen, newClose = open[:-1], close[:-1], open[1:], close[1:]
+
+    boolBearish = (oldClose > oldOpen) & (newOpen > newClose) & (newOpen > oldClose) & (newClose < oldOpen)
+    boolBullish = (oldOpen > oldClose) & (newClose > newOpen) & (newClose > oldOpen) & (newOpen < oldClose)
+    returnMask[1:] = np.where(boolBearish, BEARISH, np.where(boolBullish, BULLISH, 0))
+    return returnMask
+
+def getAboveBelowSeries(open, high, low, close):
+    """
+    Args:
+        open, high, low, close (array): price columns
+
+    Returns:
+        numpy array: per bar, BULLISH where getAboveBelow(previous bar, bar) is a close above,
+            BEARISH where it is a close below; always 0 for the first bar
+    """
+    open, high, low, close = (np.asarray(x, dtype=np.float64) for x in (open, high, low, close))
+    returnMask = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 2:
+        return returnMask
+    oldOpen, oldClose, newOpen, newClose = open[:-1], close[:-1], open[1:], close[1:]
+
+    boolBearish = (oldClose > oldOpen) & (newOpen > newClose) & (newClose < low[:-1])
+    boolBullish = (oldOpen > oldClose) & (newClose > newOpen) & (newClose > high[:-1])
+    returnMask[1:] = np.where(boolBearish, BEARISH, np.where(boolBullish, BULLISH, 0))
+    return returnMask
+
+def checkTrendWindows(windowsLow, windowsHigh):
+    """
+    risingCheck and fallingCheck for many windows at once: the windows are advanced together one
+    bar position at a time, so the work is one vectorized step per bar in a window
+
+    Args:
+        windowsLow, windowsHigh (2D array): one window per row, bars oldest first along each row
+
+    Returns:
+        tuple (numpy array, numpy array): risingCheck and fallingCheck result for each row
+    """
+    # Rising state per window, initialized from each window's first bar
+    currentLow = pullbackLow = windowsLow[:, 0]
+    highestHigh = windowsHigh[:, 0]
+    boolRising = np.ones(len(windowsLow), dtype=bool)
+
+    # Falling state per window
+    currentHigh = pullbackHigh = windowsHigh[:, 0]
+    lowestLow = windowsLow[:, 0]
+    boolFalling = np.ones(len(windowsLow), dtype=bool)
+
+    for i in range(windowsLow.shape[1]):
+        floatLow, floatHigh = windowsLow[:, i], windowsHigh[:, i]
+
+        # Same if / elif chain as risingCheck, evaluated for every window
+        boolBreak = floatLow < pullbackLow
+        boolCurrent = ~boolBreak & (floatLow < currentLow) & (floatLow > pullbackLow)
+        boolImpulse = ~boolBreak & ~boolCurrent & (floatHigh > highestHigh)
+        boolRising = boolRising & ~boolBreak
+        pullbackLow = np.where(boolImpulse, currentLow, pullbackLow)
+        currentLow = np.where(boolCurrent | boolImpulse, floatLow, currentLow)
+        highestHigh = np.where(boolImpulse, floatHigh, highestHigh)
+
+        # Same if / elif chain as fallingCheck
+        boolBreak = floatHigh > pullbackHigh
+        boolCurrent = ~boolBreak & (floatHigh > currentHigh) & (floatHigh < pullbackHigh)
+        boolImpulse = ~boolBreak & ~boolCurrent & (floatLow < lowestLow)
+        boolFalling = boolFalling & ~boolBreak
+        pullbackHigh = np.where(boolImpulse, currentHigh, pullbackHigh)
+        currentHigh = np.where(boolCurrent | boolImpulse, floatHigh, currentHigh)
+        lowestLow = np.where(boolImpulse, floatLow, lowestLow)
+
+    return boolRising, boolFalling
+
+def getTrendSeries(low, high, window):
+    """
+    Runs the risingCheck / fallingCheck pullback logic over every window of `window` bars at once
+    with checkTrendWindows, so the work is `window` vectorized steps over the whole history
+
+    Args:
+        low, high (array): price columns
+        window (int): number of bars each check looks at (e.g. params["Trend"])
+
+    Returns:
+        tuple (numpy array, numpy array): per bar, whether risingCheck and fallingCheck of the window
+            ending at that bar are True (both can be); False before the first full window
+    """
+    low, high = np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64)
+    returnRising = np.zeros(len(low), dtype=bool)
+    returnFalling = np.zeros(len(low), dtype=bool)
+    if window < 1 or len(low) < window:
+        return returnRising, returnFalling
+    boolRising, boolFalling = checkTrendWindows(sliding_window_view(low, window), sliding_window_view(high, window))
+    returnRising[window - 1:] = boolRising
+    returnFalling[window - 1:] = boolFalling
+    return returnRising, returnFalling
+
+def scanSeries(dictSeries, trendWindow=5):
+    """
+    Runs every series-level scanner over each symbol's full history
+
+    Args:
+        dictSeries (dict): symbol -> CandleSeries, e.g. from structure_data.getDailySeries()
+        trendWindow (int): window for getTrendSeries
+
+    Returns:
+        dict: symbol -> {"382", "engulfing", "aboveBelow", "rising", "falling"} -> mask per bar
+    """
+    dictMasks = {}
+    for symbol, series in dictSeries.items():
+        boolRising, boolFalling = getTrendSeries(series.low, series.high, trendWindow)
+        dictMasks[symbol] = {"382": get382Series(series.open, series.high, series.low, series.close),
+                             "engulfing": getEngulfingSeries(series.open, series.close),
+                             "aboveBelow": getAboveBelowSeries(series.open, series.high, series.low, series.close),
+                             "rising": boolRising,
+                             "falling": boolFalling}
+    return dictMasks
+
 # print(getAboveBelow({"open":"50", "close": "30", "high": "50", "low": 10}, \
 #   {"open":"10", "close": "49", "high": "30", "low": 50}))
 
@@ -0,0 +1,126 @@
+import json, threading, time, random
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-in for the Coinbase `/products/<symbol>/candles/` endpoint, used to exercise
+# get_data.py without touching the real API. Candles are synthetic but deterministic per
+# (symbol, time), so repeated downloads of the same window return identical data.
+
+def isoToEpoch(iso):
+    """
+    Converts an ISO 8601 string (as built by get_data.epochToISOFormat) to seconds since epoch
+
+    Args:
+        iso (str): naive UTC ISO 8601 date string
+
+    Returns:
+        int: seconds since epoch
+    """
+    return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+
+
+def buildCandle(symbol, epoch):
+    """
+    Generates a deterministic candle for a symbol and time in the API's list format
+
+    Args:
+        symbol (str): ticker symbol
+        epoch (int): candle open time, seconds since epoch
+
+    Returns:
+        list: [time, low, high, open, close, volume]
+    """
+    rand = random.Random(symbol + str(epoch))
+    floatOpen = round(rand.uniform(10, 1000), 2)
+    floatClose = round(floatOpen * rand.uniform(0.95, 1.05), 2)
+    floatHigh = round(max(floatOpen, floatClose) * rand.uniform(1, 1.02), 2)
+    floatLow = round(min(floatOpen, floatClose) * rand.uniform(0.98, 1), 2)
+    return [epoch, floatLow, floatHigh, floatOpen, floatClose, round(rand.uniform(1, 10000), 4)]
+
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [x for x in url.path.split('/') if x]
+
+        if len(parts) != 3 or parts[0] != 'products' or parts[2] != 'candles':
+            self.sendJSON(404, {'message': 'NotFound'})
+            return
+
+        query = parse_qs(url.query)
+        granularity = int(query['granularity'][0])
+        start = isoToEpoch(query['start'][0])
+        end = isoToEpoch(query['end'][0])
+
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), parts[1], start, end))
+            boolFail = self.server.random.random() < self.server.failRate
+            status = self.server.random.choice(self.server.failStatuses)
+
+            # Scripted statuses for a chunk are answered in order before it is served normally
+            lstScript = self.server.script.get((parts[1], start))
+            if lstScript:
+                boolFail = True
+                status = lstScript.pop(0)
+
+        # Injected failures mimic rate limiting and transient outages on the real API
+        if boolFail:
+            self.sendJSON(status, {'message': 'injected failure'})
+            return
+
+        # Align to the granularity like the real API and return newest candles first, capped at 300,
+        # never returning candles that have not opened yet
+        end = min(end, int(time.time()))
+        epoch = start - (start % granularity)
+        if epoch < start:
+            epoch += granularity
+        lstCandles = []
+        while epoch <= end and len(lstCandles) < 300:
+            lstCandles.append(buildCandle(parts[1], epoch))
+            epoch += granularity
+        lstCandles.reverse()
+
+        self.sendJSON(200, lstCandles)
+
+    def sendJSON(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass # keep test / benchmark output quiet
+
+
+def startMockExchange(port=0, failRate=0.0, failStatuses=(429, 500, 503), seed=0, script=None):
+    """
+    Starts the stand-in exchange on a background thread
+
+    Args:
+        port (int): port to bind on localhost; 0 picks a free port
+        failRate (float): fraction of candle requests answered with an error status instead of data
+        failStatuses (tuple): statuses to pick from for injected failures
+        seed (int): seed for failure injection, so runs are reproducible
+        script (dict): (symbol, start epoch) -> list of error statuses to answer that chunk's
+            requests with, in order, before serving it normally
+
+    Returns:
+        tuple (ThreadingHTTPServer, str): running server (call shutdown() when done) and its base URL,
+            which can be passed as `baseUrl` to the get_data functions. `server.requests` records
+            (monotonic time, symbol, start, end) for every candle request served.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockExchangeHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failRate = failRate
+    server.failStatuses = failStatuses
+    server.random = random.Random(seed)
+    server.script = {x: list(y) for x, y in (script or {}).items()}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, 'http://127.0.0.1:' + str(server.server_address[1])
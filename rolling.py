@@ -0,0 +1,110 @@
+import numpy as np
+from collections import deque
+
+# Rolling-window aggregates over whole columns in O(n), for loops that would otherwise rescan
+# every window: sums come from differences of prefix sums, and min / max from a monotonic deque
+# that each value enters and leaves once. Results are aligned to the index of each window's last
+# value, with NaN where a full window is not yet available.
+#
+# Min and max are exact. Sums are not bit for bit equal to adding a window's values one by one:
+# the prefix sums restart every `window` values so error cannot build up along the series. Each
+# window is the tail of one block plus the head of the next, and the rounding error stays within
+# a few units in the last place of the absolute values in those two blocks, however long the
+# series. indicators.sumWindows is the exact (O(n x window)) alternative.
+
+
+def blockPrefixSums(values, window):
+    """
+    Args:
+        values (array): values to accumulate
+        window (int): block length
+
+    Returns:
+        tuple (numpy array, numpy array): running totals that restart at every multiple of window
+            (padded with zeros to whole blocks), and the total of each block
+    """
+    values = np.asarray(values, dtype=np.float64)
+    intBlocks = -(-len(values) // window)
+    blocks = np.zeros(intBlocks * window)
+    blocks[:len(values)] = values
+    sums = np.cumsum(blocks.reshape(intBlocks, window), axis=1)
+    return sums.ravel(), sums[:, -1]
+
+
+def rollingSum(values, window):
+    """
+    Args:
+        values (array): values to sum, oldest first
+        window (int): window length
+
+    Returns:
+        numpy array: sum of the window ending at each index
+    """
+    values = np.asarray(values, dtype=np.float64)
+    returnSums = np.full(len(values), np.nan)
+    if window < 1 or window > len(values):
+        return returnSums
+
+    # A window starting on a block boundary is that whole block; any other window is the rest
+    # of the block it starts in plus the head of the next block
+    sums, totals = blockPrefixSums(values, window)
+    intEnds = np.arange(window - 1, len(values))
+    intStarts = intEnds - window + 1
+    returnSums[window - 1:] = np.where(intStarts % window == 0,
+                                       sums[intEnds],
+                                       totals[intStarts // window] - sums[np.maximum(intStarts - 1, 0)] + sums[intEnds])
+    return returnSums
+
+
+def rollingMax(values, window):
+    """
+    Args:
+        values (array): values to scan, oldest first
+        window (int): window length
+
+    Returns:
+        numpy array: largest value in the window ending at each index
+    """
+    return rollingExtreme(values, window, lambda x, y: x >= y)
+
+
+def rollingMin(values, window):
+    """
+    Args:
+        values (array): values to scan, oldest first
+        window (int): window length
+
+    Returns:
+        numpy array: smallest value in the window ending at each index
+    """
+    return rollingExtreme(values, window, lambda x, y: x <= y)
+
+
+def rollingExtreme(values, window, beats):
+    """
+    Monotonic deque scan: the deque holds indices of values that could still be the extreme of a
+    later window, best first, so each window's answer is at the front
+
+    Args:
+        values (array): values to scan, oldest first
+        window (int): window length
+        beats (function): beats(new, old) is True if old can never be the extreme again
+
+    Returns:
+        numpy array: extreme of the window ending at each index
+    """
+    lstValues = np.asarray(values, dtype=np.float64).tolist()
+    returnExtremes = np.full(len(lstValues), np.nan)
+    if window < 1:
+        return returnExtremes
+
+    dequeIndex = deque()
+    for i, value in enumerate(lstValues):
+        while dequeIndex and beats(value, lstValues[dequeIndex[-1]]):
+            dequeIndex.pop()
+        dequeIndex.append(i)
+        if dequeIndex[0] <= i - window:
+            dequeIndex.popleft()
+        if i >= window - 1:
+            returnExtremes[i] = lstValues[dequeIndex[0]]
+    return returnExtremes
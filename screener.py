@@ -0,0 +1,166 @@
+import datetime
+import numpy as np
+import indicators, strategies, structure_data
+
+# Morning screener over the whole symbol universe. Every symbol's daily candles are placed in one
+# symbols x dates array (NaN where a symbol has no candle), and the checkCross condition, the
+# risingCheck / fallingCheck result and the RSI are computed for all symbols together with a
+# handful of column-wise numpy steps, instead of one Python call per symbol and indicator.
+#
+# For the screen date (the latest date by default) the windows are the ones runStrategy uses for
+# that day's candle: the candles before it, so a still-forming candle never moves the result.
+# Values match checkCross(candles up to the date), risingCheck / fallingCheck(lstTrend) and
+# getRSI(lstRSI, params["RSI"]) for each symbol exactly.
+
+DEFAULT_PARAMS = {"Short EMA": 20, "Long EMA": 200, "Trend": 5, "RSI": 14}
+
+# Sort order of the cross conditions in the ranked table (crosses first, no signal last)
+CONDITION_RANK = {strategies.GOLDEN_CROSS: 0,
+                  strategies.DEATH_CROSS: 1,
+                  3: 2, # approaching from below
+                  1: 3, # approaching from above
+                  2: 4, # rising further above
+                  4: 5, # sinking lower below
+                  0: 6}
+
+
+def alignSeries(dictSeries, fields=("open", "high", "low", "close")):
+    """
+    Args:
+        dictSeries (dict): symbol -> CandleSeries
+        fields (tuple): price columns to align
+
+    Returns:
+        tuple (list, numpy array, dict): symbols (row order), every candle time across the symbols
+            (column order), and field -> symbols x times float array with NaN for missing candles
+    """
+    lstSymbols = list(dictSeries)
+    times = np.unique(np.concatenate([dictSeries[x].time for x in lstSymbols])) if len(lstSymbols) > 0 \
+        else np.array([], dtype=np.int64)
+    dictMatrix = {x: np.full((len(lstSymbols), len(times)), np.nan) for x in fields}
+
+    for i, symbol in enumerate(lstSymbols):
+        series = dictSeries[symbol]
+        intColumns = np.searchsorted(times, series.time)
+        for field in fields:
+            dictMatrix[field][i, intColumns] = getattr(series, field)
+    return lstSymbols, times, dictMatrix
+
+
+def sumColumns(matrix, start, end):
+    """
+    Row sums of columns start..end-1, added left to right like the scalar indicator loops
+
+    Args:
+        matrix (2D array): one row per symbol
+        start (int): first column
+        end (int): column after the last
+
+    Returns:
+        numpy array: one sum per row
+    """
+    floatSums = np.zeros(len(matrix))
+    for i in range(start, end):
+        floatSums += matrix[:, i]
+    return floatSums
+
+
+def screen(dictSeries=None, params=DEFAULT_PARAMS, date=None):
+    """
+    Args:
+        dictSeries (dict): symbol -> daily CandleSeries; every stored daily symbol if None
+        params (dict): "Short EMA", "Long EMA", "Trend" and "RSI" windows
+        date (datetime): screen the latest candle at or before this date; the latest date if None
+
+    Returns:
+        list: one dict per symbol (symbol, date, close, condition, rising, falling, rsi, short / long
+            EMA), ranked by cross condition and then by how far the RSI sits from 50. Indicators are
+            None where a symbol lacks the history or has no candle on the screen date.
+    """
+    if dictSeries is None:
+        dictSeries = structure_data.getDailySeries()
+    lstSymbols, times, dictMatrix = alignSeries(dictSeries)
+    if len(times) == 0:
+        return []
+
+    intShort, intLong = int(params["Short EMA"]), int(params["Long EMA"])
+    intTrend, intRSI = int(params["Trend"]), int(params["RSI"])
+
+    # Screen column; indicator windows end on the column before it
+    intEnd = len(times) - 1 if date is None else int(np.searchsorted(times, date.timestamp(), side='right')) - 1
+    if intEnd < 0:
+        return []
+    arrOpen, arrHigh, arrLow, arrClose = (dictMatrix[x] for x in ["open", "high", "low", "close"])
+
+    # Rows with every candle the windows need (NaN anywhere in a window leaves it NaN below)
+    intLookback = max(intLong + 1, intShort + 1, intTrend, intRSI)
+    boolValid = ~np.isnan(arrClose[:, intEnd])
+    if intEnd - intLookback < 0:
+        boolValid[:] = False
+    else:
+        for matrix in [arrOpen, arrHigh, arrLow, arrClose]:
+            boolValid &= ~np.isnan(matrix[:, intEnd - intLookback:intEnd]).any(axis=1)
+
+    # Cross state: EMAs (SMA of exactly one window, as in checkCross) for the windows ending
+    # yesterday and today relative to the screen candle
+    arrCode = np.zeros(len(lstSymbols), dtype=np.int8)
+    todayShort = todayLong = np.full(len(lstSymbols), np.nan)
+    if intEnd - intLong - 1 >= 0:
+        yesterdayShort = sumColumns(arrClose, intEnd - intShort - 1, intEnd - 1) / intShort
+        yesterdayLong = sumColumns(arrClose, intEnd - intLong - 1, intEnd - 1) / intLong
+        todayShort = sumColumns(arrClose, intEnd - intShort, intEnd) / intShort
+        todayLong = sumColumns(arrClose, intEnd - intLong, intEnd) / intLong
+        arrCode = strategies.getCrossCodes(yesterdayShort, yesterdayLong, todayShort, todayLong)
+
+    # Trend: risingCheck / fallingCheck over each symbol's lstTrend window
+    boolRising = boolFalling = np.zeros(len(lstSymbols), dtype=bool)
+    if intEnd - intTrend >= 0 and intTrend > 0:
+        boolRising, boolFalling = indicators.checkTrendWindows(arrLow[:, intEnd - intTrend:intEnd],
+                                                               arrHigh[:, intEnd - intTrend:intEnd])
+
+    # RSI over each symbol's lstRSI window: getRSI on exactly timeperiod candles averages the
+    # gains and losses without any smoothing steps
+    arrRSI = np.full(len(lstSymbols), np.nan)
+    if intEnd - intRSI >= 0 and intRSI > 0:
+        floatGains = np.zeros(len(lstSymbols))
+        floatLosses = np.zeros(len(lstSymbols))
+        for i in range(intEnd - intRSI, intEnd):
+            floatOpen, floatClose = arrOpen[:, i], arrClose[:, i]
+            boolGain = floatOpen < floatClose
+            floatGains += np.where(boolGain, floatClose - floatOpen, 0.0)
+            floatLosses += np.where(boolGain, 0.0, floatOpen - floatClose)
+        avgGains, avgLosses = floatGains / intRSI, floatLosses / intRSI
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrRSI = np.where(avgLosses == 0, 100.0, 100 - (100 / (1 + (avgGains / avgLosses))))
+
+    strDate = datetime.datetime.fromtimestamp(int(times[intEnd])).strftime('%Y-%m-%d')
+    lstRows = []
+    for i, symbol in enumerate(lstSymbols):
+        boolRow = bool(boolValid[i])
+        lstRows.append({"symbol": symbol,
+                        "date": strDate,
+                        "close": float(arrClose[i, intEnd]) if boolRow else None,
+                        "code": int(arrCode[i]) if boolRow else 0,
+                        "condition": strategies.CROSS_CONDITIONS[int(arrCode[i])] if boolRow else None,
+                        "rising": bool(boolRising[i]) if boolRow else None,
+                        "falling": bool(boolFalling[i]) if boolRow else None,
+                        "rsi": float(arrRSI[i]) if boolRow else None,
+                        "short": float(todayShort[i]) if boolRow else None,
+                        "long": float(todayLong[i]) if boolRow else None})
+
+    # Crosses first, then approaching states; within a state, the most stretched RSI first
+    lstRows.sort(key=lambda x: (CONDITION_RANK[x["code"]], -abs(x["rsi"] - 50) if x["rsi"] is not None else 0))
+    return lstRows
+
+
+def printScreen(rows):
+    """
+    Args:
+        rows (list): output of screen()
+    """
+    print("%-10s %-11s %-46s %-7s %-7s %6s" % ("symbol", "date", "condition", "rising", "falling", "RSI"))
+    for row in rows:
+        print("%-10s %-11s %-46s %-7s %-7s %6s" % (row["symbol"], row["date"], row["condition"] or "-",
+              "-" if row["rising"] is None else row["rising"],
+              "-" if row["falling"] is None else row["falling"],
+              "-" if row["rsi"] is None else round(row["rsi"], 1)))
@@ -1,6 +1,6 @@
-import csv, indicators, accounts, pandas
+import csv, indicators, accounts, candle_series, build_patterns
+import numpy as np
 
-from numpy import short
 from datetime import datetime, timedelta
 
 # Strategies to be called from execution.py as part of the trading strategy
@@ -12,34 +12,23 @@ def checkCross(candles, shortwindow, longwindow):
     Looks for golden and death cross scenarios based on 20-day and 100-day EMAs, specifically seeking a cross event in the last two candles
 
     Args:
-        pricedata (list of candle dictionaries): 200 days of candles from a given symbol set in getStrategy
+        candles (list of candle dictionaries or CandleSeries): 200 days of candles from a given symbol set in getStrategy
 
     Returns:
         list: list of three dictionaries that contain yesterday's and today's short- and long-term EMAs, the cross condition, and
                 distance to intercept if relevant (else None)
     """
 
-    # Starting with the oldest data, iteratively check the 20-Day EMA and store in list
-    lstShortEMA = []
-    lstWindow = candles[0:shortwindow]
-    intCounter = shortwindow
+    # Parse the candles once into typed columns
+    candles = candle_series.asSeries(candles)
 
-    while intCounter < len(candles):
-        lstShortEMA.append(indicators.getEMA(lstWindow, shortwindow))
-        lstWindow.pop(0)
-        lstWindow.append(candles[intCounter])
-        intCounter += 1
+    # getEMA over a window of exactly timeperiod candles is that window's SMA seed, so the EMA for
+    # every window ending before each candle comes from one full-series pass
+    # Starting with the oldest data, the 20-Day EMA for each window
+    lstShortEMA = indicators.getSMASeries(candles.close, shortwindow)[shortwindow - 1:len(candles) - 1].tolist()
 
-    # Starting with the oldest data, iteratively check the 100-Day EMA and store in list
-    lstLongEMA = []
-    lstWindow = candles[0:longwindow]
-    intCounter = longwindow
-
-    while intCounter < len(candles):
-        lstLongEMA.append(indicators.getEMA(lstWindow, longwindow))
-        lstWindow.pop(0)
-        lstWindow.append(candles[intCounter])
-        intCounter += 1
+    # Starting with the oldest data, the 100-Day EMA for each window
+    lstLongEMA = indicators.getSMASeries(candles.close, longwindow)[longwindow - 1:len(candles) - 1].tolist()
 
     # Set variables for evaluating cross checks
     yesterdayShortEMA = lstShortEMA[len(lstShortEMA)-2]
@@ -105,3 +94,274 @@ def checkCross(candles, shortwindow, longwindow):
         return lstDictData
 
 
+
+# checkCross conditions by code, as returned by scanCrosses (0: not enough history, or no branch of
+# checkCross applies, e.g. the EMAs were equal yesterday and the short one fell below today)
+CROSS_CONDITIONS = [None,
+                    "Short-term approaching long-term from above",
+                    "Short-term rising further above long-term",
+                    "Short-term approaching long-term from below",
+                    "Short-term sinking lower below long-term",
+                    "DEATH CROSS!",
+                    "GOLDEN CROSS!"]
+DEATH_CROSS = 5
+GOLDEN_CROSS = 6
+
+def shiftSeries(values, steps):
+    """
+    Args:
+        values (array): one value per candle
+        steps (int): candles to shift forward
+
+    Returns:
+        numpy array: values[i - steps] at index i, NaN for the first steps candles
+    """
+    returnShifted = np.full(len(values), np.nan)
+    returnShifted[steps:] = values[:max(len(values) - steps, 0)]
+    return returnShifted
+
+def getCrossCodes(yesterdayShort, yesterdayLong, todayShort, todayLong):
+    """
+    checkCross's decision applied elementwise
+
+    Args:
+        yesterdayShort, yesterdayLong, todayShort, todayLong (array): the four EMAs checkCross compares
+
+    Returns:
+        numpy array: index into CROSS_CONDITIONS for each element (0 where any EMA is NaN)
+    """
+    boolValid = ~(np.isnan(yesterdayShort) | np.isnan(yesterdayLong) | np.isnan(todayShort) | np.isnan(todayLong))
+
+    yestLongShortDistance = np.abs(yesterdayShort - yesterdayLong)
+    todayLongShortDistance = np.abs(todayShort - todayLong)
+    boolClosing = yestLongShortDistance >= todayLongShortDistance
+
+    # Same branch order as checkCross; np.select takes the first condition that holds
+    boolAbove = boolValid & (yesterdayShort >= yesterdayLong) & (todayShort >= todayLong)
+    boolBelow = boolValid & (yesterdayShort < yesterdayLong) & (todayShort < todayLong)
+    return np.select([boolAbove & boolClosing,
+                      boolAbove,
+                      boolBelow & boolClosing,
+                      boolBelow,
+                      boolValid & (yesterdayShort > yesterdayLong) & (todayShort <= todayLong),
+                      boolValid & (yesterdayShort < yesterdayLong) & (todayShort >= todayLong)],
+                     [1, 2, 3, 4, DEATH_CROSS, GOLDEN_CROSS], 0).astype(np.int8)
+
+def scanCrosses(candles, shortwindow, longwindow):
+    """
+    checkCross for every day of a symbol's history in one linear pass: both EMA series are computed
+    once, and the condition for each day is taken from the same yesterday / today comparison that
+    checkCross makes when handed the candles up to and including that day
+
+    Args:
+        candles (list of candle dictionaries or CandleSeries): full history of a single symbol, oldest first
+        shortwindow (int): short EMA window
+        longwindow (int): long EMA window
+
+    Returns:
+        dict: "short" / "long" - EMA of the window ending at each candle (NaN before a full window),
+              "code" - index into CROSS_CONDITIONS for each candle,
+              "condition" - the checkCross condition string for each candle (None if unavailable),
+              "golden" / "death" - indices of the candles on which a golden / death cross is reported
+    """
+    candles = candle_series.asSeries(candles)
+
+    # As in checkCross, the EMA of a window of exactly timeperiod candles is that window's SMA
+    arrShort = indicators.getSMASeries(candles.close, shortwindow)
+    arrLong = indicators.getSMASeries(candles.close, longwindow)
+
+    # checkCross on day t compares the windows ending at t - 2 ("yesterday") and t - 1 ("today")
+    arrCode = getCrossCodes(shiftSeries(arrShort, 2), shiftSeries(arrLong, 2),
+                            shiftSeries(arrShort, 1), shiftSeries(arrLong, 1))
+
+    return {"short": arrShort,
+            "long": arrLong,
+            "code": arrCode,
+            "condition": [CROSS_CONDITIONS[x] for x in arrCode.tolist()],
+            "golden": np.flatnonzero(arrCode == GOLDEN_CROSS),
+            "death": np.flatnonzero(arrCode == DEATH_CROSS)}
+
+
+###### Strategy plugins #####
+# Each strategy exposes generate_signals(series, params), which evaluates the strategy for every
+# candle of a symbol's full history at once and returns, per candle:
+#   "direction" - BUY, SHORT or 0; the decision runStrategy would make with that candle as candles[-1]
+#   "entries" - number of positions to open (pattern files can list a sequence more than once)
+#   "price" - entry price, "stop" / "target" - stop-loss and profit target (NaN without an entry)
+# Stops and targets are ATR multiples taken from params["Stop Loss"] and params["Profit Multiple"]
+# (backtest.runSignalBacktest copies them from the account). Each strategy reads the same candles
+# as its runStrategy counterpart: ATR, trend, RSI, cross and pattern windows end on the candle
+# before the current one, while SuperTrendEMAStrategy's EMA includes the current candle (as
+# getEMA(candles, ...) did). A candle without enough history gets no entry.
+#
+# `datasets` lists the candle sets ('daily', 'volume') a strategy can run on; the pattern
+# strategies are tied to the model or file mined from one of them.
+
+BUY = 1
+SHORT = -1
+
+def getMidpointPrices(open, close):
+    """
+    Args:
+        open, close (array): price columns
+
+    Returns:
+        numpy array: trading price per candle, same formula as execution.runStrategy
+    """
+    open, close = np.asarray(open, dtype=np.float64), np.asarray(close, dtype=np.float64)
+    return np.where(open <= close, open + (close - open / 2), open - (open - close / 2))
+
+def getSignals(series, direction, price, params, entries=None):
+    """
+    Adds ATR-based stops and targets to a strategy's entry directions
+
+    Args:
+        series (CandleSeries): candles the directions were computed on
+        direction (array): BUY, SHORT or 0 per candle
+        price (array): entry price per candle
+        params (dict): "ATR" window plus "Stop Loss" and "Profit Multiple" ATR multiples
+        entries (array): positions to open per entry candle; 1 if None
+
+    Returns:
+        dict: direction, entries, price, stop and target arrays
+    """
+    # ATR of the window ending at the previous candle (lstATR in runStrategy)
+    arrATR = shiftSeries(indicators.getATRSeries(series.high, series.low, int(params["ATR"])), 1)
+    direction = np.where(np.isnan(arrATR), 0, direction).astype(np.int8)
+    entries = np.where(direction != 0, 1 if entries is None else entries, 0)
+
+    floatStop = arrATR * params["Stop Loss"]
+    floatTarget = arrATR * params["Profit Multiple"]
+    return {"direction": direction,
+            "entries": entries,
+            "price": price,
+            "stop": np.select([direction == BUY, direction == SHORT], [price - floatStop, price + floatStop], np.nan),
+            "target": np.select([direction == BUY, direction == SHORT], [price + floatTarget, price - floatTarget], np.nan)}
+
+
+class PatternStrategy:
+    """
+    Pattern matching: scores the last Pattern-1 closes and acts on the signal counts of patterns
+    starting with that sequence. 'daily' uses the mined pattern model and midpoint prices (as in
+    execution.runStrategy); 'volume' uses params["Pattern File"] and close prices (as in
+    volume_execution.runStrategy).
+    """
+
+    def __init__(self, dataset='daily'):
+        self.dataset = dataset
+        self.datasets = (dataset,)
+        self.intMinStrength = 1 if dataset == 'daily' else 0 # winning count must exceed this
+
+    def getIndex(self, params):
+        if self.dataset == 'volume':
+            return params.get("Pattern Index") or build_patterns.getPatternIndex(params["Pattern File"], params["Scoring Range"])
+        return params.get("Pattern Model") or build_patterns.getPatternModel(self.dataset, params)
+
+    def generate_signals(self, series, params):
+        dictIndex = self.getIndex(params)
+        intLength = int(params["Pattern"]) - 1
+        price = series.close if self.dataset == 'volume' else getMidpointPrices(series.open, series.close)
+
+        # Pattern code of the intLength closes ending at the previous candle, per candle
+        arrCodes = np.full(len(series), -1, dtype=np.int64)
+        if 0 < intLength < len(series):
+            arrScores, boolValid = build_patterns.scoreWindows(series.close[:-1], intLength, params["Scoring Range"])
+            arrWindowCodes = build_patterns.encodeSequences(arrScores, dictIndex["base"])
+            arrWindowCodes[~boolValid] = -1
+            arrCodes[intLength:] = arrWindowCodes
+
+        # Direction and row count per pattern in the index, then one sorted lookup for every candle
+        lstKeys, lstDirection, lstEntries = [], [], []
+        for intCode, lstRows in sorted(dictIndex["signals"].items()):
+            lstBuy = [x for x in lstRows if x["buy"] > x["short"] and x["buy"] > self.intMinStrength]
+            lstShort = [x for x in lstRows if x["short"] > x["buy"] and x["short"] > self.intMinStrength]
+            lstKeys.append(intCode)
+            lstDirection.append(BUY if len(lstBuy) > 0 else (SHORT if len(lstShort) > 0 else 0))
+            lstEntries.append(len(lstBuy) if len(lstBuy) > 0 else len(lstShort))
+
+        direction = np.zeros(len(series), dtype=np.int8)
+        entries = np.zeros(len(series), dtype=np.int64)
+        if len(lstKeys) > 0:
+            arrKeys = np.array(lstKeys, dtype=np.int64)
+            intPositions = np.minimum(np.searchsorted(arrKeys, arrCodes), len(arrKeys) - 1)
+            boolFound = arrKeys[intPositions] == arrCodes
+            direction = np.where(boolFound, np.array(lstDirection, dtype=np.int8)[intPositions], 0)
+            entries = np.where(boolFound, np.array(lstEntries)[intPositions], 0)
+
+        return getSignals(series, direction, price, params, entries)
+
+
+class CrossStrategy:
+    """
+    EMA cross: buy on a golden cross and short on a death cross of the "Short EMA" / "Long EMA"
+    windows, as reported by checkCross
+    """
+    datasets = ('daily', 'volume')
+
+    def generate_signals(self, series, params):
+        arrCode = scanCrosses(series, int(params["Short EMA"]), int(params["Long EMA"]))["code"]
+        direction = np.select([arrCode == GOLDEN_CROSS, arrCode == DEATH_CROSS], [BUY, SHORT], 0)
+        return getSignals(series, direction, getMidpointPrices(series.open, series.close), params)
+
+
+class TrendRSIStrategy:
+    """
+    Rising trend with RSI <= 30 buys, falling trend with RSI >= 70 shorts; risingCheck /
+    fallingCheck over the "Trend" candles and getRSI over the "RSI" candles before the current one
+    """
+    datasets = ('daily', 'volume')
+
+    def generate_signals(self, series, params):
+        intTrend, intRSI = int(params["Trend"]), int(params["RSI"])
+        boolRising, boolFalling = indicators.getTrendSeries(series.low, series.high, intTrend)
+        boolRising, boolFalling = shiftSeries(boolRising, 1) == 1, shiftSeries(boolFalling, 1) == 1
+
+        # getRSI on exactly intRSI candles: plain average gains and losses over the window
+        floatMove = series.close - series.open
+        floatGains = indicators.sumWindows(np.where(floatMove > 0, floatMove, 0.0), intRSI) / intRSI
+        floatLosses = indicators.sumWindows(np.where(floatMove > 0, 0.0, -floatMove), intRSI) / intRSI
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrRSI = np.where(floatLosses == 0, 100.0, 100 - (100 / (1 + (floatGains / floatLosses))))
+        arrRSI = shiftSeries(np.where(np.isnan(floatLosses), np.nan, arrRSI), 1)
+
+        direction = np.select([boolRising & (arrRSI <= 30), boolFalling & (arrRSI >= 70)], [BUY, SHORT], 0)
+        return getSignals(series, direction, getMidpointPrices(series.open, series.close), params)
+
+
+class SuperTrendEMAStrategy:
+    """
+    SuperTrend + EMA support: with ATR above 10% of the close, buy when the SuperTrend line is
+    below the close and the low touches the "Short EMA", short when it is above and the high
+    touches it. SuperTrend and EMA run over the whole history rather than restarting at the
+    start of each backtest window.
+    """
+    datasets = ('daily', 'volume')
+
+    def generate_signals(self, series, params):
+        arrSuperTrend = shiftSeries(indicators.getSuperTrendSeries(series), 1)
+        arrEMA = indicators.getEMASeries(series.close, int(params["Short EMA"]))
+        arrATR = shiftSeries(indicators.getATRSeries(series.high, series.low, int(params["ATR"])), 1)
+
+        boolVolatile = arrATR / series.close > 0.1
+        direction = np.select([boolVolatile & (arrSuperTrend < series.close) & (series.low <= arrEMA),
+                               boolVolatile & (arrSuperTrend > series.close) & (series.high >= arrEMA)],
+                              [BUY, SHORT], 0)
+        return getSignals(series, direction, getMidpointPrices(series.open, series.close), params)
+
+
+STRATEGIES = {"pattern": PatternStrategy('daily'),
+              "volume-pattern": PatternStrategy('volume'),
+              "cross": CrossStrategy(),
+              "trend-rsi": TrendRSIStrategy(),
+              "supertrend-ema": SuperTrendEMAStrategy()}
+
+
+def getStrategyNames(dataset):
+    """
+    Args:
+        dataset (str): 'daily' or 'volume'
+
+    Returns:
+        list: names in STRATEGIES that can run on that dataset's candles
+    """
+    return [x for x, y in STRATEGIES.items() if dataset in y.datasets]
@@ -0,0 +1,268 @@
+from collections import deque
+
+# Incremental versions of the indicators in indicators.py for live or bar-by-bar use. Each object
+# is fed one candle at a time with update(candle) (a candle dict or candle_series.Candle) and
+# exposes the indicator for the candles seen so far as .value (None until there is enough
+# history). An update never looks back past the indicator's own window, instead of recomputing
+# the indicator over the whole slice.
+#
+# Every value matches the batch functions exactly. EMA and RSI apply the same recurrences in O(1).
+# SMA, ATR (and so SuperTrend) re-add their window left to right on each update, as getSMA /
+# getATR / sumWindows do, so each update costs O(timeperiod) - a running add-new / subtract-old
+# sum would be O(1) but drifts from the batch values in the last bits. Trend replays its window
+# through risingCheck's and fallingCheck's state machine when given a length.
+
+
+class WindowSum:
+    """
+    Sum of the last `length` values, added oldest first like indicators.sumWindows
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.values = deque(maxlen=length)
+        self.total = 0.0
+
+    def add(self, value):
+        """
+        Args:
+            value (float): newest value; the oldest drops out once the window is full
+
+        Returns:
+            float: sum of the values in the window
+        """
+        self.values.append(value)
+
+        # Re-add the window in order so the sum is the batch one bit for bit
+        self.total = 0.0
+        for x in self.values:
+            self.total += x
+        return self.total
+
+    def isFull(self):
+        return len(self.values) == self.length
+
+
+class SMA:
+    """
+    Simple moving average of the last timeperiod closes - indicators.getSMA over that window
+    """
+
+    def __init__(self, timeperiod):
+        self.timeperiod = timeperiod
+        self.sum = WindowSum(timeperiod)
+        self.value = None
+
+    def update(self, candle):
+        floatSum = self.sum.add(float(candle["close"]))
+        if self.sum.isFull():
+            self.value = floatSum / self.timeperiod
+        return self.value
+
+
+class ATR:
+    """
+    Average high - low range of the last timeperiod candles - indicators.getATR over that window
+    """
+
+    def __init__(self, timeperiod):
+        self.timeperiod = timeperiod
+        self.sum = WindowSum(timeperiod)
+        self.value = None
+
+    def update(self, candle):
+        floatSum = self.sum.add(float(candle["high"]) - float(candle["low"]))
+        if self.sum.isFull():
+            self.value = floatSum / self.timeperiod
+        return self.value
+
+
+class EMA:
+    """
+    Exponential moving average seeded with the SMA of the first timeperiod closes - matches
+    indicators.getEMA(all candles seen, timeperiod)
+    """
+
+    def __init__(self, timeperiod):
+        self.timeperiod = timeperiod
+        self.multiplier = (2 / (timeperiod + 1))
+        self.count = 0
+        self.seed = 0
+        self.value = None
+
+    def update(self, candle):
+        floatClose = float(candle["close"])
+        self.count += 1
+
+        # Accumulate the seeding SMA, then apply the EMA recurrence
+        if self.count <= self.timeperiod:
+            self.seed += floatClose
+            if self.count == self.timeperiod:
+                self.value = self.seed / self.timeperiod
+        else:
+            self.value = (floatClose * self.multiplier) + (self.value * (1 - self.multiplier))
+        return self.value
+
+
+class RSI:
+    """
+    Wilder-smoothed RSI from open / close moves - matches indicators.getRSI(all candles seen, timeperiod)
+    """
+
+    def __init__(self, timeperiod):
+        self.timeperiod = timeperiod
+        self.count = 0
+        self.gains = 0
+        self.losses = 0
+        self.value = None
+
+    def update(self, candle):
+        floatOpen, floatClose = float(candle["open"]), float(candle["close"])
+        self.count += 1
+
+        # Sum gains and losses over the initial period, then smooth them candle by candle
+        if self.count <= self.timeperiod:
+            if floatOpen < floatClose:
+                self.gains += floatClose - floatOpen
+            else:
+                self.losses += floatOpen - floatClose
+            if self.count < self.timeperiod:
+                return self.value
+            self.gains = self.gains / self.timeperiod
+            self.losses = self.losses / self.timeperiod
+        elif floatOpen < floatClose:
+            self.gains = ((self.gains * (self.timeperiod - 1)) + (floatClose - floatOpen)) / self.timeperiod
+        else:
+            self.losses = ((self.losses * (self.timeperiod - 1)) + (floatOpen - floatClose)) / self.timeperiod
+
+        if self.losses == 0:
+            self.value = 100
+        else:
+            self.value = 100 - (100 / (1 + (self.gains / self.losses)))
+        return self.value
+
+
+class SuperTrend:
+    """
+    SuperTrend line over windows of timeperiod + 1 candles. After each update, value is the entry
+    indicators.getSuperTrend produces for the window ending at that candle (getSuperTrend itself
+    stops one window short of its last candle).
+    """
+
+    def __init__(self, timeperiod=10, multiplier=3):
+        self.multiplier = multiplier
+        self.atr = ATR(timeperiod + 1)
+        self.prevClose = None
+        self.prevFinalUpper = 99999999
+        self.prevFinalLower = -99999999
+        self.prevSuperTrend = 0
+        self.superTrend = self.prevFinalUpper
+        self.value = None
+
+    def update(self, candle):
+        floatHigh, floatLow, floatClose = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        floatATR = self.atr.update(candle)
+        prevClose = self.prevClose
+        self.prevClose = floatClose
+        if floatATR is None:
+            return self.value
+
+        basicUpper = ((floatHigh + floatLow) / 2) + (self.multiplier * floatATR)
+        basicLower = ((floatHigh + floatLow) / 2) - (self.multiplier * floatATR)
+
+        # Bands only tighten unless the previous close broke through them
+        if basicUpper < self.prevFinalUpper or prevClose > self.prevFinalUpper:
+            finalUpper = basicUpper
+        else:
+            finalUpper = self.prevFinalUpper
+        if basicLower > self.prevFinalLower or prevClose < self.prevFinalLower:
+            finalLower = basicLower
+        else:
+            finalLower = self.prevFinalLower
+
+        # Flip between the bands when the close crosses the active one
+        if self.prevSuperTrend == self.prevFinalUpper and floatClose < finalUpper:
+            self.superTrend = finalUpper
+        elif self.prevSuperTrend == self.prevFinalUpper and floatClose > finalUpper:
+            self.superTrend = finalLower
+        elif self.prevSuperTrend == self.prevFinalLower and floatClose > finalLower:
+            self.superTrend = finalLower
+        elif self.prevSuperTrend == self.prevFinalLower and floatClose < finalLower:
+            self.superTrend = finalUpper
+
+        self.prevFinalUpper = finalUpper
+        self.prevFinalLower = finalLower
+        self.prevSuperTrend = self.superTrend
+        self.value = self.superTrend
+        return self.value
+
+
+class Trend:
+    """
+    Rising / falling state from impulsive moves and pullbacks - after each update, rising and
+    falling equal indicators.risingCheck and fallingCheck over the last `length` candles, or over
+    every candle since the last reset() when length is None
+    """
+
+    def __init__(self, length=None):
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        """
+        Starts the trend over from the next candle
+        """
+        self.candles = deque(maxlen=self.length)
+        self.count = 0
+        self.rising = None
+        self.falling = None
+
+    def update(self, candle):
+        floatHigh, floatLow = float(candle["high"]), float(candle["low"])
+        if self.length is None:
+            self.step(floatLow, floatHigh)
+            return self.rising, self.falling
+
+        # The pullback levels depend on the window's first candle, so replay the window once it slides
+        self.candles.append((floatLow, floatHigh))
+        self.count = 0
+        for floatLow, floatHigh in self.candles:
+            self.step(floatLow, floatHigh)
+        return self.rising, self.falling
+
+    def step(self, floatLow, floatHigh):
+        """
+        Advances risingCheck's and fallingCheck's loops by one candle
+
+        Args:
+            floatLow (float): candle low
+            floatHigh (float): candle high
+        """
+        if self.count == 0:
+            self.currentLow = self.pullbackLow = floatLow
+            self.highestHigh = floatHigh
+            self.currentHigh = self.pullbackHigh = floatHigh
+            self.lowestLow = floatLow
+            self.rising = True
+            self.falling = True
+        self.count += 1
+
+        # Rising: fails once a low undercuts the last pullback low
+        if floatLow < self.pullbackLow:
+            self.rising = False
+        elif floatLow < self.currentLow and floatLow > self.pullbackLow:
+            self.currentLow = floatLow
+        elif floatHigh > self.highestHigh:
+            self.highestHigh = floatHigh
+            self.pullbackLow = self.currentLow
+            self.currentLow = floatLow
+
+        # Falling: fails once a high exceeds the last pullback high
+        if floatHigh > self.pullbackHigh:
+            self.falling = False
+        elif floatHigh > self.currentHigh and floatHigh < self.pullbackHigh:
+            self.currentHigh = floatHigh
+        elif floatLow < self.lowestLow:
+            self.lowestLow = floatLow
+            self.pullbackHigh = self.currentHigh
+            self.currentHigh = floatHigh
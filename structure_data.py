@@ -1,6 +1,21 @@
-import csv
+import csv, bisect, candle_store, column_store, candle_series, dataset_cache
 from datetime import datetime, timedelta
 
+# The loaders below parse each file once per process: results are kept in dataset_cache and
+# reused until the files' mtime / size change. Each call returns a new list, but the row dicts
+# are shared between calls, so copy a row before modifying it.
+
+def readCSV(path):
+    """
+    Args:
+        path (str): csv file to parse
+
+    Returns:
+        list: list of row dictionaries
+    """
+    with open(path, mode='r', encoding='UTF-8') as file:
+        return list(csv.DictReader(file))
+
 def getSymbols():
     """
     Pull in symbols.csv for iteration
@@ -8,25 +23,23 @@ def getSymbols():
     Returns:
         list: list of symbols
     """
-    lstSymbols = []
-    reader = csv.DictReader(open('data/symbols.csv', mode='r', encoding='UTF-8'))
-    lstSymbols = list(reader)
-    return lstSymbols
+    lstSymbols = dataset_cache.cache.load('symbols', ['data/symbols.csv'], lambda: readCSV('data/symbols.csv'))
+    return list(lstSymbols)
 
 def getValidSymbols(params):
     '''
     Function to test which symbols in symbols.csv have enough data history for a given set of params
+    Reads each symbol's oldest candle time from the daily catalog (see candle_store.py), so no candles are loaded
 
     Args:
-        listsymbols (lst of dicts): sourced from symbols.csv
         params (dict): set of dates and windows for a given backtesting strategy
     
     Returns:
         validSymbols (lst): list of symbols that have sufficient data for a test to be executed
     '''
     
-    # Initialize a list with all candles data available per get-data and all symbols in list
-    lstCandles = getDaily()
+    # Initialize the per-symbol catalog of the daily data and all symbols in list
+    dictCatalog = candle_store.getCatalog('daily')
     lstSymbols = getSymbols()
     
     # Set a variable for the oldest date per the params 
@@ -38,18 +51,12 @@ def getValidSymbols(params):
     # Iterate through all symbols in symbols.csv
     for symbol in lstSymbols:
 
-        # Initialize a variable with today's date, to be updated with the oldest record for the symbol
-        dateSymbolOldest = datetime.today()
-
-        # Iterate through all candle data
-        for candle in lstCandles:
-
-            # Check for match with given symbol from symbols.csv
-            if candle["symbol"] == symbol["symbol"]:
-
-                # Check to see if the candle's date is older than dateOldest, update if so
-                if datetime.fromtimestamp(int(candle["time"])) < dateSymbolOldest:
-                    dateSymbolOldest = datetime.fromtimestamp(int(candle["time"]))
+        # Look up the symbol's oldest record, defaulting to today's date if nothing is stored
+        dictEntry = dictCatalog.get(symbol["symbol"])
+        if dictEntry is None or dictEntry["first"] is None:
+            dateSymbolOldest = datetime.today()
+        else:
+            dateSymbolOldest = datetime.fromtimestamp(dictEntry["first"])
             
         # Check to see if the dateSymbolOldest is older than the param's earliest time period
         if dateSymbolOldest < dateOldestDate:
@@ -59,27 +66,50 @@ def getValidSymbols(params):
 
 def getDaily():
     """
-    Read in the Daily-level file in full, build list of dictionaries
+    Read in the Daily-level files (data/daily/<symbol>.csv) in full, build list of dictionaries
 
     Returns:
         list: list of candles
     """
-    lstDaily = []
-    reader = csv.DictReader(open('data/daily.csv', mode='r', encoding='UTF-8'))
-    lstDaily = list(reader)
-    return lstDaily
+    lstPaths = [candle_store.getSymbolPath('daily', x) for x in candle_store.getStoredSymbols('daily')]
+    lstDaily = dataset_cache.cache.load('daily', lstPaths, lambda: candle_store.readCandles('daily'))
+    return list(lstDaily)
 
-def getMinute():
+def streamMinute(symbols=None, start=None, end=None, batchSize=candle_store.BATCH_SIZE):
     """
-    Read in the Daily-level file in full, build list of dictionaries
+    Stream the Minute-level files in batches, reading only the given symbols and time range
+    (see candle_store.iterCandles); memory is bounded by the batch size
+
+    Args:
+        symbols (list): symbols to read; all symbols if None
+        start (int): earliest candle time, seconds since epoch; no lower bound if None
+        end (int): latest candle time, seconds since epoch; no upper bound if None
+        batchSize (int): maximum candles per batch
+
+    Returns:
+        generator: lists of candles, ordered by symbol then time
+    """
+    return candle_store.iterCandles('minute', symbols, start, end, batchSize)
+
+def getMinute(symbols=None, start=None, end=None):
+    """
+    Read in the Minute-level files (data/minute/<symbol>.csv), build list of dictionaries
+    Unfiltered reads are cached; filtered reads go through streamMinute and skip non-matching rows
+
+    Args:
+        symbols (list): symbols to read; all symbols if None
+        start (int): earliest candle time, seconds since epoch; no lower bound if None
+        end (int): latest candle time, seconds since epoch; no upper bound if None
 
     Returns:
         list: list of candles
     """
-    lstMinute = []
-    reader = csv.DictReader(open('data/minute.csv', mode='r', encoding='UTF-8'))
-    lstMinute = list(reader)
-    return lstMinute
+    if symbols is not None or start is not None or end is not None:
+        return [x for batch in streamMinute(symbols, start, end) for x in batch]
+
+    lstPaths = [candle_store.getSymbolPath('minute', x) for x in candle_store.getStoredSymbols('minute')]
+    lstMinute = dataset_cache.cache.load('minute', lstPaths, lambda: candle_store.readCandles('minute'))
+    return list(lstMinute)
 
 def getVolume():
     """
@@ -88,29 +118,199 @@ def getVolume():
     Returns:
         list: list of candles
     """
-    lstVolume = []
-    reader = csv.DictReader(open('data/volume.csv', mode='r', encoding='UTF-8'))
-    lstVolume = list(reader)
-    return lstVolume
+    lstVolume = dataset_cache.cache.load('volume', ['data/volume.csv'], lambda: readCSV('data/volume.csv'))
+    return list(lstVolume)
+
+def getDailyColumns(symbols=None):
+    """
+    Memory-map the Daily-level columnar store, converting from data/daily/ first if it is stale
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> dict of time/open/high/low/close/volume numpy arrays
+    """
+    return column_store.loadDataset('daily', symbols)
+
+def getMinuteColumns(symbols=None):
+    """
+    Memory-map the Minute-level columnar store, converting from data/minute/ first if it is stale
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> dict of time/open/high/low/close/volume numpy arrays
+    """
+    return column_store.loadDataset('minute', symbols)
+
+def getVolumeColumns(symbols=None):
+    """
+    Memory-map the Volume-based columnar store, converting from volume.csv first if it is stale
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> dict of time/open/high/low/close/volume numpy arrays
+    """
+    return column_store.loadDataset('volume', symbols)
+
+def getDailySeries(symbols=None):
+    """
+    Load the Daily-level data as typed CandleSeries, one per symbol, backed by the columnar store
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> CandleSeries
+    """
+    return {x: candle_series.CandleSeries.fromColumns(x, y) for x, y in getDailyColumns(symbols).items()}
+
+def getMinuteSeries(symbols=None):
+    """
+    Load the Minute-level data as typed CandleSeries, one per symbol, backed by the columnar store
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> CandleSeries
+    """
+    return {x: candle_series.CandleSeries.fromColumns(x, y) for x, y in getMinuteColumns(symbols).items()}
+
+def getVolumeSeries(symbols=None):
+    """
+    Load the Volume-based data as typed CandleSeries, one per symbol, backed by the columnar store
+
+    Args:
+        symbols (list): symbols to load; all symbols if None
+
+    Returns:
+        dict: symbol -> CandleSeries
+    """
+    return {x: candle_series.CandleSeries.fromColumns(x, y) for x, y in getVolumeColumns(symbols).items()}
+
+class CandleIndex:
+    """
+    Candles grouped by symbol and sorted by time, with a parallel list of times per symbol so a
+    date range can be found by binary search instead of scanning every candle. Build it once per
+    dataset and pass it to setTradingData in place of the candle list.
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data (list or dict): list of candle dicts (as from getDaily), or symbol -> CandleSeries
+        """
+        self.symbols = {} # symbol -> (list of times, candles sorted by time)
+
+        if isinstance(data, dict):
+            for symbol, series in data.items():
+                self.symbols[symbol] = (series.time.tolist(), series)
+            return
+
+        dictGroups = {}
+        for candle in data:
+            dictGroups.setdefault(candle["symbol"], []).append((int(float(candle["time"])), candle))
+        for symbol, lstPairs in dictGroups.items():
+            lstPairs.sort(key=lambda x: x[0])
+            self.symbols[symbol] = ([x[0] for x in lstPairs], [x[1] for x in lstPairs])
+
+    def getRange(self, symbol, start, end):
+        """
+        Args:
+            symbol (str): symbol to subset
+            start (float): exclusive lower bound, seconds since epoch
+            end (float): inclusive upper bound, seconds since epoch
+
+        Returns:
+            list or CandleSeries: the symbol's candles with start < time <= end, oldest first
+        """
+        if symbol not in self.symbols:
+            return []
+        lstTimes, candles = self.symbols[symbol]
+        return candles[bisect.bisect_right(lstTimes, start):bisect.bisect_right(lstTimes, end)]
+
+    def getWindow(self, symbol, latestdate, timeWindow):
+        """
+        Args:
+            symbol (str): symbol to subset
+            latestdate (datetime): most recent period to include
+            timeWindow (int): number of days to include, ending at latestdate
+
+        Returns:
+            list or CandleSeries: the symbol's candles in the window, oldest first
+        """
+        return self.getRange(symbol, (latestdate - timedelta(days=timeWindow)).timestamp(), latestdate.timestamp())
+
+    def getLast(self, symbol, latestdate, count):
+        """
+        Args:
+            symbol (str): symbol to subset
+            latestdate (datetime): most recent period to include
+            count (int): number of candles to return
+
+        Returns:
+            list or CandleSeries: up to count candles ending at latestdate, oldest first
+        """
+        if symbol not in self.symbols:
+            return []
+        lstTimes, candles = self.symbols[symbol]
+        intEnd = bisect.bisect_right(lstTimes, latestdate.timestamp())
+        return candles[max(intEnd - count, 0):intEnd]
+
+    def getAll(self, symbol):
+        """
+        Returns:
+            list or CandleSeries: every candle for the symbol, oldest first
+        """
+        return self.symbols[symbol][1] if symbol in self.symbols else []
+
+    @property
+    def nbytes(self):
+        """
+        Returns:
+            int: estimated bytes held by the time lists and candles, for dataset_cache; candle
+                dicts shared with the cached getDaily rows are counted here as well
+        """
+        return dataset_cache.estimateSize(self.symbols)
+
+def getDailyIndex():
+    """
+    CandleIndex over the Daily-level data, built once and cached alongside getDaily until the
+    daily files change, so repeated backtests (e.g. a tuning grid) share one sorted index
+
+    Returns:
+        CandleIndex: index over every daily candle
+    """
+    lstPaths = [candle_store.getSymbolPath('daily', x) for x in candle_store.getStoredSymbols('daily')]
+    return dataset_cache.cache.load('daily index', lstPaths, lambda: CandleIndex(getDaily()))
 
 def setTradingData(data, symbol, latestdate, timeWindow):
     """
     Build sublist of dictionaries based on a dataset, symbol/ticker, latest date, and # of days
-    NOTE: potentially refactor this function to use list comprehension to be more efficient + pythonic
+    Passing a CandleIndex instead of a list makes each call a binary search plus a copy of the window.
 
     Args:
-        data (list): list of candles
+        data (list or CandleIndex): list of candles, or an index built over them
         symbol (str): symbol to subset
         latestdate (datetime): most recent period to include
         timeWindow (int): number of periods to include, starting from latestdate, if value is "ALL", return all
+            of the symbol's candles (for a list and a CandleIndex alike)
 
     Returns:
         list: list of candles
     """
     lstReturn = []
 
-    if timeWindow == "ALL":
-        lstReturn = data.copy()
+    if isinstance(data, CandleIndex):
+        lstReturn = data.getAll(symbol) if timeWindow == "ALL" else data.getWindow(symbol, latestdate, timeWindow)
+
+    elif timeWindow == "ALL":
+        lstReturn = [x for x in data if x["symbol"] == symbol]
     
     else:
         lstReturn = [x for x in data if x["symbol"] == symbol and \
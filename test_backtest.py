@@ -0,0 +1,96 @@
+import os
+import numpy as np
+from datetime import datetime
+import accounts, backtest, build_patterns, candle_series, candle_store, dataset_cache, indicator_cache, strategies
+from test_rolling import getRandomWalk
+
+# The signal-driven backtest must open the same positions, on the same dates and at the same
+# prices, as the day-by-day runStrategy backtest it replaces.
+
+PARAMS = {"Trade Start": datetime(2021, 3, 1, 23, 59, 59),
+          "Current Date": datetime(2021, 3, 1, 23, 59, 59),
+          "Trade End": datetime(2021, 8, 1, 23, 59, 59),
+          "Candles": 60,
+          "Trend": 5,
+          "Pattern": 4,
+          "Scoring Range": 2,
+          "ATR": 7,
+          "Short EMA": 5,
+          "Long EMA": 20,
+          "RSI": 7}
+
+
+def testApplySignals():
+    series = candle_series.CandleSeries(
+        'SYN-USD', [1609459200 + 86400 * x for x in range(5)],
+        [9.0, 9.0, 9.0, 9.0, 9.0], [12.0, 12.0, 12.0, 12.0, 12.0], [10.0, 10.0, 10.0, 10.0, 10.0],
+        [10.0, 10.0, 10.0, 10.0, 10.0], [1.0, 1.0, 1.0, 1.0, 1.0])
+    signals = {"direction": np.array([0, strategies.BUY, 0, strategies.SHORT, 0]),
+               "entries": np.array([0, 2, 0, 1, 0]),
+               "price": np.array([10.0, 10.0, 11.0, 12.0, 9.0]),
+               "stop": np.array([np.nan, 8.0, np.nan, 13.0, np.nan]),
+               "target": np.array([np.nan, 11.0, np.nan, 10.0, np.nan])}
+    account = accounts.TestAccount(balance=5000, profit=3, stoploss=1.5)
+
+    # Candle 1 opens two buys at 10; candle 2 (11) takes their profit; candle 3 opens a short at
+    # 12; candle 4 (9) takes its profit
+    backtest.applySignals(account, 'SYN-USD', series, signals, [0, 1, 2, 3, 4])
+    assert [(x["type"], x["time"], x["init_price"], x["quantity"], x["stoploss"], x["profittarget"], x["close_price"])
+            for x in account.open_positions] == \
+        [("buy", datetime.fromtimestamp(1609459200 + 86400 * 2), 10.0, 5.0, 8.0, 11.0, 11.0),
+         ("buy", datetime.fromtimestamp(1609459200 + 86400 * 2), 10.0, 5.0, 8.0, 11.0, 11.0),
+         ("short", datetime.fromtimestamp(1609459200 + 86400 * 4), 12.0, 50 / 12, 13.0, 10.0, 9.0)]
+    assert all(x["status"] is False for x in account.open_positions)
+    assert abs(account.balance - (5000 + 2 * 5.0 * (11.0 - 10.0) + (12.0 - 9.0) * 50 / 12)) < 1e-9
+
+
+def writeFixture():
+    os.makedirs('data')
+    os.makedirs('patterns')
+    with open(os.path.join('data', 'symbols.csv'), 'w') as file:
+        file.write('symbol\nAAA-USD\nBBB-USD\n')
+    for symbol, intOffset, intSeed in [('AAA-USD', 0, 1), ('BBB-USD', 30, 2)]:
+        lstCandles = getRandomWalk(250, intSeed)
+        candle_store.upsertCandles('daily', symbol, [[x["time"] + 86400 * intOffset, x["low"], x["high"], x["open"],
+                                                      x["close"], x["volume"]] for x in lstCandles])
+    dataset_cache.invalidate()
+    indicator_cache.cache.invalidate()
+
+
+def testSignalBacktestMatchesRunStrategy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writeFixture()
+    build_patterns.trainPatternModel('daily', PARAMS)
+
+    accountBasic = accounts.TestAccount(balance=5000, profit=3, stoploss=1.5)
+    backtest.runBasicBacktest(accountBasic, ['AAA-USD', 'BBB-USD'], dict(PARAMS))
+    accountSignal = accounts.TestAccount(balance=5000, profit=3, stoploss=1.5)
+    backtest.runSignalBacktest(accountSignal, ['AAA-USD', 'BBB-USD'], strategies.STRATEGIES["pattern"], dict(PARAMS))
+
+    # Same entries; shorts also have the same levels (runStrategy gives buys the short-side levels)
+    def getEntries(account):
+        return [(x["time"], x["symbol"], x["type"], x["init_price"], x["quantity"],
+                 x["stoploss"] if x["type"] == "short" else None,
+                 x["profittarget"] if x["type"] == "short" else None) for x in account.open_positions]
+    lstEntries = getEntries(accountSignal)
+    assert lstEntries == getEntries(accountBasic)
+    assert len([x for x in lstEntries if x[2] == "buy"]) > 5 and len([x for x in lstEntries if x[2] == "short"]) > 5
+    assert {x[1] for x in lstEntries} == {'AAA-USD', 'BBB-USD'}
+
+    # Buys get buy-side levels from the plugin
+    for position in accountSignal.open_positions:
+        if position["type"] == "buy":
+            assert position["stoploss"] < position["init_price"] < position["profittarget"]
+
+    dataset_cache.invalidate()
+    indicator_cache.cache.invalidate()
+
+
+def testSignalBacktestRejectsVolumeStrategy(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    writeFixture()
+    account = accounts.TestAccount(balance=5000, profit=3, stoploss=1.5)
+    assert backtest.runSignalBacktest(account, ['AAA-USD'], strategies.STRATEGIES["volume-pattern"], dict(PARAMS)) is None
+    assert account.open_positions == [] and account.balance == 5000
+    assert 'runSignalBacktest error' in capsys.readouterr().out
+    dataset_cache.invalidate()
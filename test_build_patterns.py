@@ -0,0 +1,97 @@
+import csv, itertools, json, os
+import numpy as np
+import build_patterns, candle_store, dataset_cache
+from test_rolling import readDaily
+
+# Pattern lookups through the encoded index must return exactly the rows the original scan of the
+# pattern file matched.
+
+PATTERNS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns')
+
+
+def getPatternFiles():
+    # pattern-<Pattern>-<Scoring Range>-<minimum total>-<minimum share>.csv
+    for name in sorted(os.listdir(PATTERNS)):
+        if name.startswith('pattern-') and name.endswith('.csv'):
+            yield os.path.join(PATTERNS, name), int(name.split('-')[1]), int(name.split('-')[2])
+
+
+def testEncodeSequence():
+    for base in [2, 4, 6]:
+        # Every sequence up to length 4 gets its own code, and the row-wise version agrees
+        dictCodes = {}
+        for length in range(0, 5):
+            lstSequences = list(itertools.product(range(base), repeat=length))
+            for sequence in lstSequences:
+                dictCodes[build_patterns.encodeSequence(sequence, base)] = sequence
+            if length > 0:
+                arrCodes = build_patterns.encodeSequences(np.array(lstSequences), base)
+                assert arrCodes.tolist() == [build_patterns.encodeSequence(x, base) for x in lstSequences]
+        assert len(dictCodes) == sum(base ** x for x in range(0, 5))
+
+        # Scores outside the range cannot match a pattern
+        assert build_patterns.encodeSequence([0, base], base) is None
+        assert build_patterns.encodeSequence([-1, 0], base) is None
+        assert build_patterns.encodeSequences(np.array([[0, base], [-1, 0], [1, 1]]), base).tolist() == \
+            [-1, -1, build_patterns.encodeSequence([1, 1], base)]
+
+
+def testPatternSignalsMatchFileScan():
+    for path, intPattern, intRange in getPatternFiles():
+        with open(path, mode='r', encoding='UTF-8') as file:
+            lstSignals = list(csv.DictReader(file))
+        index = build_patterns.readPatternIndex(path, intRange)
+
+        # Every sequence in the file, the sequences of real windows, and some that cannot match
+        lstChecks = [[int(x) for x in row["sequence"].strip('[]').split(', ')] for row in lstSignals]
+        for lstCandles in readDaily(3):
+            lstClose = [float(x["close"]) for x in lstCandles]
+            arrScores, boolValid = build_patterns.scoreWindows(lstClose, intPattern - 1, intRange)
+            lstChecks += arrScores[boolValid].tolist()
+        lstChecks += [[intRange + 1] * (intPattern - 1), [0] * intPattern, [0] * (intPattern - 2), []]
+
+        intMatched = 0
+        for sequence in lstChecks:
+            # The original scan: compare the printed sequence with every row of the file
+            lstExpected = [{"total": int(x["total"]), "buy": int(x["buy"]), "short": int(x["short"]), "hold": int(x["hold"])}
+                           for x in lstSignals if x["sequence"] == str(sequence)]
+            assert build_patterns.getPatternSignals(index, sequence) == lstExpected
+            intMatched += len(lstExpected) > 0
+        assert intMatched >= len(lstSignals)
+
+
+def testDailyModelFixture(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    os.makedirs('patterns')
+    with open(os.path.join('data', 'symbols.csv'), 'w') as file:
+        file.write('symbol\nAAA-USD\nBBB-USD\n')
+
+    # The model is mined from the daily candles of the listed symbols; CCC-USD is not listed
+    dictCloses = {'AAA-USD': [1, 2, 3, 2, 1, 2, 3],
+                  'BBB-USD': [1, 2, 3, 2, 1, 2, 2, 9],
+                  'CCC-USD': [1, 3, 2, 1, 3, 2]}
+    for symbol, lstCloses in dictCloses.items():
+        candle_store.upsertCandles('daily', symbol, [[1609459200 + 86400 * i, x, x, x, x, 1.0] for i, x in enumerate(lstCloses)])
+    dataset_cache.invalidate()
+
+    params = {"Pattern": 3, "Scoring Range": 2}
+    index = build_patterns.trainPatternModel('daily', params)
+    with open(build_patterns.getModelPath('daily', params)) as file:
+        dictModel = json.load(file)
+
+    # Windows of 3 closes, excluding each symbol's last candle: [0, 1, 2] buy, [0, 2, 0] short,
+    # [2, 1, 0] short and [2, 0, 2] buy in both symbols, plus [0, 2, 2] hold in BBB-USD
+    assert dictModel["signals"] == [{"sequence": [0, 1], "total": 2, "buy": 2, "short": 0, "hold": 0},
+                                    {"sequence": [0, 2], "total": 3, "buy": 0, "short": 2, "hold": 1},
+                                    {"sequence": [2, 1], "total": 2, "buy": 0, "short": 2, "hold": 0},
+                                    {"sequence": [2, 0], "total": 2, "buy": 2, "short": 0, "hold": 0}]
+    assert build_patterns.getPatternSignals(index, [0, 2]) == [{"total": 3, "buy": 0, "short": 2, "hold": 1}]
+    assert build_patterns.getPatternSignals(index, [1, 0]) == []
+
+    # The saved model is reused until the daily files change
+    assert build_patterns.getPatternModel('daily', params) == index
+    candle_store.upsertCandles('daily', 'AAA-USD', [[1609459200 + 86400 * 7, 9.0, 9.0, 9.0, 9.0, 1.0]])
+    dictIndex = build_patterns.getPatternModel('daily', params)
+    assert build_patterns.getPatternSignals(dictIndex, [0, 1]) == [{"total": 3, "buy": 3, "short": 0, "hold": 0}]
+    dataset_cache.invalidate()
@@ -0,0 +1,84 @@
+import os
+import candle_store, mock_exchange
+
+# candle_store writes under the relative data/ path, so every test runs in a temporary directory.
+# The catalog kept by upsertCandles must always equal a full rescan of the file.
+
+START = 1609459200 # 2021-01-01 UTC
+DAY = 86400
+
+
+def getCandles(symbol, days):
+    return [mock_exchange.buildCandle(symbol, START + DAY * x) for x in days]
+
+
+def readFile(symbol):
+    with open(candle_store.getSymbolPath('daily', symbol), 'rb') as file:
+        return file.read()
+
+
+def assertCatalog(symbol):
+    assert candle_store.readCatalog('daily')[symbol] == candle_store.scanSymbol('daily', symbol)
+
+
+def testUpsertIsIdempotent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lstCandles = getCandles('AAA-USD', range(100))
+    assert candle_store.upsertCandles('daily', 'AAA-USD', lstCandles) == 100
+    bytesFile = readFile('AAA-USD')
+    dictCatalog = candle_store.readCatalog('daily')
+
+    # Writing the same candles again, in any order, or a repeat of the tail changes nothing
+    candle_store.upsertCandles('daily', 'AAA-USD', lstCandles)
+    candle_store.upsertCandles('daily', 'AAA-USD', list(reversed(lstCandles)))
+    candle_store.upsertCandles('daily', 'AAA-USD', lstCandles[-3:])
+    assert readFile('AAA-USD') == bytesFile
+    assert candle_store.readCatalog('daily') == dictCatalog
+    assert dictCatalog['AAA-USD'] == {"first": START, "last": START + DAY * 99, "rows": 100, "gaps": 0,
+                                      "size": len(bytesFile)}
+
+
+def testUpsertReplacesAndAppends(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', range(10)))
+
+    # A revised last candle plus new ones: the revision wins and the file stays sorted
+    lstRevised = [START + DAY * 9, 1.0, 2.0, 1.5, 1.75, 42.0]
+    assert candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', range(10, 15)) + [lstRevised]) == 6
+    lstRows = candle_store.readCandles('daily', ['AAA-USD'])
+    assert [int(x["time"]) for x in lstRows] == [START + DAY * x for x in range(15)]
+    assert lstRows[9] == {"time": str(START + DAY * 9), "low": "1.0", "high": "2.0", "open": "1.5",
+                          "close": "1.75", "volume": "42.0", "symbol": "AAA-USD"}
+    assert candle_store.getLastTime('daily', 'AAA-USD') == START + DAY * 14
+    assertCatalog('AAA-USD')
+
+
+def testCatalogTracksHoles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', [0, 1, 2, 5, 6, 9, 10]))
+    assert candle_store.readCatalog('daily')['AAA-USD']["gaps"] == 2
+    assertCatalog('AAA-USD')
+
+    # Filling one hole in the middle rewrites only the rows after it
+    candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', [3, 4]))
+    assert candle_store.readCatalog('daily')['AAA-USD']["gaps"] == 1
+    assertCatalog('AAA-USD')
+    candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', [7, 8]))
+    assert candle_store.readCatalog('daily')['AAA-USD']["gaps"] == 0
+    assert candle_store.readCatalog('daily')['AAA-USD']["rows"] == 11
+    assertCatalog('AAA-USD')
+
+
+def testCatalogRebuiltAfterOutsideEdit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    candle_store.upsertCandles('daily', 'AAA-USD', getCandles('AAA-USD', range(5)))
+    candle_store.upsertCandles('daily', 'BBB-USD', getCandles('BBB-USD', range(3)))
+
+    # A row appended by hand changes the size, so the entry is rescanned rather than trusted
+    with open(candle_store.getSymbolPath('daily', 'AAA-USD'), 'a') as file:
+        file.write(str(START + DAY * 8) + ',1,2,1,2,1,AAA-USD\n')
+    os.remove(candle_store.getSymbolPath('daily', 'BBB-USD'))
+    dictCatalog = candle_store.getCatalog('daily')
+    assert sorted(dictCatalog) == ['AAA-USD']
+    assert dictCatalog['AAA-USD']["rows"] == 6 and dictCatalog['AAA-USD']["gaps"] == 1
+    assert candle_store.readCatalog('daily') == dictCatalog
@@ -0,0 +1,128 @@
+import os, sys
+import numpy as np
+import dataset_cache, candle_series, structure_data
+from test_rolling import getRandomWalk
+
+# Each test builds its own DatasetCache, so the shared cache used by structure_data is untouched.
+
+
+class Loader:
+    """
+    Counts how many times the cache had to parse the dataset
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def testFileChangesInvalidate(tmp_path):
+    path = str(tmp_path / 'rows.csv')
+    with open(path, 'w') as file:
+        file.write('a,b\n1,2\n')
+    cache = dataset_cache.DatasetCache()
+    loader = Loader([1, 2])
+
+    assert cache.load('rows', [path], loader) == [1, 2] and loader.calls == 1
+    assert cache.load('rows', [path], loader) == [1, 2] and loader.calls == 1
+
+    # A write that changes the size
+    with open(path, 'a') as file:
+        file.write('3,4\n')
+    cache.load('rows', [path], loader)
+    assert loader.calls == 2
+
+    # Same size, new mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cache.load('rows', [path], loader)
+    cache.load('rows', [path], loader)
+    assert loader.calls == 3
+
+    # A deleted file, and then the file coming back
+    os.remove(path)
+    cache.load('rows', [path], loader)
+    assert loader.calls == 4
+    cache.load('rows', [path], loader)
+    assert loader.calls == 4
+    with open(path, 'w') as file:
+        file.write('a,b\n')
+    cache.load('rows', [path], loader)
+    assert loader.calls == 5
+    assert cache.getStats()["hits"] == 3 and cache.getStats()["misses"] == 5
+
+
+def testExplicitInvalidation(tmp_path):
+    path = str(tmp_path / 'rows.csv')
+    with open(path, 'w') as file:
+        file.write('a,b\n1,2\n')
+    cache = dataset_cache.DatasetCache()
+    loaderA, loaderB = Loader(list(range(10))), Loader(list(range(20)))
+    cache.load('a', [path], loaderA)
+    cache.load('b', [path], loaderB)
+
+    cache.invalidate('a')
+    assert cache.getStats()["entries"] == ['b']
+    assert cache.bytes == dataset_cache.estimateSize(loaderB.value)
+    cache.load('a', [path], loaderA)
+    cache.load('b', [path], loaderB)
+    assert loaderA.calls == 2 and loaderB.calls == 1
+
+    cache.invalidate('missing') # no-op
+    cache.invalidate()
+    assert cache.getStats()["entries"] == [] and cache.bytes == 0
+    cache.load('b', [path], loaderB)
+    assert loaderB.calls == 2
+
+
+def testLeastRecentlyUsedEviction(tmp_path):
+    path = str(tmp_path / 'rows.csv')
+    with open(path, 'w') as file:
+        file.write('a,b\n1,2\n')
+    arrValue = np.zeros(1000) # 8000 bytes
+    cache = dataset_cache.DatasetCache(maxBytes=20000)
+    dictLoaders = {x: Loader(arrValue.copy()) for x in 'abcd'}
+
+    cache.load('a', [path], dictLoaders['a'])
+    cache.load('b', [path], dictLoaders['b'])
+    cache.load('a', [path], dictLoaders['a']) # a is now the most recently used
+    cache.load('c', [path], dictLoaders['c'])
+    assert cache.getStats()["entries"] == ['a', 'c']
+    assert cache.bytes == 16000
+
+    cache.load('b', [path], dictLoaders['b'])
+    assert dictLoaders['b'].calls == 2 and cache.getStats()["entries"] == ['c', 'b']
+
+    # Shrinking the cap evicts at once; a value bigger than the cap is returned but not kept
+    cache.setMaxBytes(10000)
+    assert cache.getStats()["entries"] == ['b']
+    dictLoaders['d'].value = np.zeros(2000)
+    assert len(cache.load('d', [path], dictLoaders['d'])) == 2000
+    assert cache.getStats()["entries"] == ['b'] and cache.bytes == 8000
+
+
+def testEstimateSize():
+    lstCandles = getRandomWalk(1000)
+    series = candle_series.CandleSeries.fromDicts(lstCandles)
+    assert series.nbytes == 6 * 8 * 1000
+    assert series[100:200].nbytes == 6 * 8 * 100
+    assert dataset_cache.estimateSize(series) == series.nbytes
+    assert dataset_cache.estimateSize(np.zeros(500)) == 4000
+
+    # Containers are sized through their contents, so a dict holding series counts the arrays
+    dictSeries = {"SYN-USD": series, "OTHER-USD": series[:500]}
+    assert dataset_cache.estimateSize(dictSeries) >= series.nbytes * 3 // 2
+    index = structure_data.CandleIndex(dictSeries)
+    assert index.nbytes >= series.nbytes * 3 // 2 + 28 * 1500
+    assert dataset_cache.estimateSize(index) == index.nbytes
+
+    # Rows of a parsed csv: the sampled estimate is within a few percent of measuring every value
+    lstRows = [{x: str(y) for x, y in candle.items()} for candle in lstCandles]
+    intExact = sys.getsizeof(lstRows) + sum(sys.getsizeof(x) + sum(sys.getsizeof(y) + sys.getsizeof(z)
+                                                                    for y, z in x.items()) for x in lstRows)
+    assert abs(dataset_cache.estimateSize(lstRows) - intExact) < intExact * 0.05
+    assert structure_data.CandleIndex(lstRows).nbytes >= intExact
@@ -0,0 +1,184 @@
+import csv, functools, os
+import get_data, candle_store, mock_exchange
+
+# Downloads run against mock_exchange.py in a temporary working directory, since candle_store
+# keeps its files under the relative data/ path.
+
+START = 1609459200 # 2021-01-01 UTC
+DAY = 86400
+
+
+def getPlan(symbols, chunks):
+    return {x: get_data.getChunks(START, START + DAY * 251 * chunks - 1, DAY) for x in symbols}
+
+
+def runFetch(path, monkeypatch, dictChunks, workers, baseUrl, **kwargs):
+    path.mkdir()
+    monkeypatch.chdir(path)
+    return get_data.fetchCandles(dictChunks, functools.partial(candle_store.upsertCandles, 'daily'),
+                                 DAY, workers, baseUrl, **kwargs)
+
+
+def readFiles(path):
+    dictFiles = {}
+    for name in sorted(os.listdir(path / 'data' / 'daily')):
+        with open(path / 'data' / 'daily' / name, 'rb') as file:
+            dictFiles[name] = file.read()
+    return dictFiles
+
+
+def testConcurrentFetchMatchesSerial(tmp_path, monkeypatch):
+    server, baseUrl = mock_exchange.startMockExchange()
+    try:
+        dictChunks = getPlan(['AAA-USD', 'BBB-USD', 'CCC-USD', 'DDD-USD', 'EEE-USD'], 6)
+        assert runFetch(tmp_path / 'serial', monkeypatch, dictChunks, 1, baseUrl) == []
+        server.requests.clear()
+        assert runFetch(tmp_path / 'concurrent', monkeypatch, dictChunks, 4, baseUrl) == []
+        lstTimes = sorted(x[0] for x in server.requests)
+    finally:
+        server.shutdown()
+
+    # Every chunk was requested once, and no one-second window went over the 10 request budget
+    # (the bucket holds a single token, so at most 11 grants can fall within one second)
+    assert len(lstTimes) == 30
+    for i, floatTime in enumerate(lstTimes):
+        assert sum(1 for x in lstTimes[i:] if x < floatTime + 1) <= 11
+
+    # Same files byte for byte, so the same rows in the same schema, and the same catalog
+    dictSerial = readFiles(tmp_path / 'serial')
+    assert dictSerial == readFiles(tmp_path / 'concurrent')
+    assert sorted(dictSerial) == ['AAA-USD.csv', 'BBB-USD.csv', 'CCC-USD.csv', 'DDD-USD.csv',
+                                  'EEE-USD.csv', 'catalog.json']
+    with open(tmp_path / 'concurrent' / 'data' / 'daily' / 'CCC-USD.csv', mode='r', encoding='UTF-8') as file:
+        lstRows = list(csv.reader(file))
+    assert lstRows[0] == candle_store.COLUMNS
+    assert [int(x[0]) for x in lstRows[1:]] == list(range(START, START + DAY * 251 * 6, DAY))
+
+
+def testChunkRetriedAfterErrors(tmp_path, monkeypatch):
+    # Keep the backoff short; the retry logic itself is unchanged
+    monkeypatch.setattr(get_data, 'getProductCandles', functools.partial(get_data.getProductCandles, backoff=0.01))
+    dictChunks = getPlan(['AAA-USD'], 3)
+    chunk = dictChunks['AAA-USD'][1]
+    server, baseUrl = mock_exchange.startMockExchange(script={('AAA-USD', chunk[0]): [429, 500]})
+    try:
+        assert runFetch(tmp_path / 'run', monkeypatch, dictChunks, 2, baseUrl) == []
+        lstRequests = [x for x in server.requests if x[2] == chunk[0]]
+    finally:
+        server.shutdown()
+
+    # Two errors then the data: the chunk was requested three times and its candles were stored
+    assert len(lstRequests) == 3
+    with open(candle_store.getSymbolPath('daily', 'AAA-USD'), mode='r', encoding='UTF-8') as file:
+        lstTimes = [int(x["time"]) for x in csv.DictReader(file)]
+    assert lstTimes == list(range(START, START + DAY * 251 * 3, DAY))
+
+
+def testPersistentFailureIsRecorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_data, 'getProductCandles', functools.partial(get_data.getProductCandles, backoff=0.01))
+    dictChunks = getPlan(['AAA-USD'], 3)
+    chunk = dictChunks['AAA-USD'][1]
+    server, baseUrl = mock_exchange.startMockExchange(script={('AAA-USD', chunk[0]): [500] * 100})
+    try:
+        (tmp_path / 'run').mkdir()
+        monkeypatch.chdir(tmp_path / 'run')
+        checkpoint = get_data.Checkpoint('daily')
+        lstFailed = get_data.fetchCandles(dictChunks, functools.partial(candle_store.upsertCandles, 'daily'),
+                                          DAY, 2, baseUrl, checkpoint=checkpoint)
+        intRequests = len([x for x in server.requests if x[2] == chunk[0]])
+    finally:
+        server.shutdown()
+
+    # Six attempts in the main pass and six in the recovery pass, then it is reported
+    assert intRequests == 12
+    assert [(x["symbol"], x["start"], x["end"]) for x in lstFailed] == [('AAA-USD', chunk[0], chunk[1])]
+    assert '500' in lstFailed[0]["error"]
+
+    # The checkpoint on disk keeps the chunk for the next run, and the other chunks were stored
+    assert get_data.Checkpoint('daily').getFailed('AAA-USD') == [chunk]
+    with open(candle_store.getSymbolPath('daily', 'AAA-USD'), mode='r', encoding='UTF-8') as file:
+        lstTimes = [int(x["time"]) for x in csv.DictReader(file)]
+    assert lstTimes == list(range(START, chunk[0], DAY)) + list(range(chunk[1] + DAY, START + DAY * 251 * 3, DAY))
+
+
+def testFindGapsAndPlan():
+    # Days 3-4 and 10-700 are missing
+    lstTimes = [START + DAY * x for x in [0, 1, 2, 5, 6, 7, 8, 9, 701, 702]]
+    lstGaps = get_data.findGaps(lstTimes, DAY)
+    assert lstGaps == [(START + DAY * 3, START + DAY * 4), (START + DAY * 10, START + DAY * 700)]
+    assert get_data.findGaps(lstTimes[:3], DAY) == []
+
+    # The small hole and the start of the long one share a window; the rest takes two more
+    lstChunks = get_data.planBackfill(lstGaps, DAY)
+    assert lstChunks == [(START + DAY * 3, START + DAY * 253),
+                         (START + DAY * 254, START + DAY * 504),
+                         (START + DAY * 505, START + DAY * 755)]
+    setCovered = {x for start, end in lstChunks for x in range(start, end + 1, DAY)}
+    assert all(x in setCovered for first, last in lstGaps for x in range(first, last + 1, DAY))
+
+
+def testRepairGapsFillsHoles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lstDays = [x for x in range(600) if not (3 <= x <= 4 or 100 <= x <= 449)]
+    candle_store.upsertCandles('daily', 'AAA-USD', [mock_exchange.buildCandle('AAA-USD', START + DAY * x) for x in lstDays])
+    candle_store.upsertCandles('daily', 'BBB-USD', [mock_exchange.buildCandle('BBB-USD', START + DAY * x) for x in range(50)])
+    assert candle_store.getCatalog('daily')['AAA-USD']["gaps"] == 2
+
+    server, baseUrl = mock_exchange.startMockExchange()
+    try:
+        assert get_data.repairGaps(DAY, 2, baseUrl) == []
+        lstRequests = [(x[1], x[2]) for x in server.requests]
+    finally:
+        server.shutdown()
+
+    # Only the symbol with holes was fetched, and only the windows planBackfill asked for
+    assert sorted(lstRequests) == [('AAA-USD', START + DAY * 3), ('AAA-USD', START + DAY * 254)]
+    lstTimes = [int(x["time"]) for x in candle_store.readCandles('daily', ['AAA-USD'])]
+    assert lstTimes == [START + DAY * x for x in range(600)]
+    assert candle_store.getCatalog('daily')['AAA-USD']["gaps"] == 0
+
+
+def startUpdate(path, monkeypatch, baseUrl):
+    (path / 'data').mkdir(parents=True)
+    monkeypatch.chdir(path)
+    with open(os.path.join('data', 'symbols.csv'), 'w') as file:
+        file.write('symbol\nAAA-USD\nBBB-USD\n')
+    return get_data.updateData(DAY, 2, baseUrl, bufferSize=251)
+
+
+def testCheckpointResume(tmp_path, monkeypatch):
+    server, baseUrl = mock_exchange.startMockExchange()
+    try:
+        assert startUpdate(tmp_path / 'full', monkeypatch, baseUrl) == []
+
+        # Interrupt the second job on its fourth write, after three chunks were committed
+        upsertCandles = candle_store.upsertCandles
+        lstCalls = []
+        def interruptedUpsert(dataset, symbol, candles):
+            lstCalls.append(symbol)
+            if len(lstCalls) == 4:
+                raise KeyboardInterrupt
+            return upsertCandles(dataset, symbol, candles)
+        monkeypatch.setattr(candle_store, 'upsertCandles', interruptedUpsert)
+        try:
+            startUpdate(tmp_path / 'resumed', monkeypatch, baseUrl)
+        except KeyboardInterrupt:
+            pass
+        monkeypatch.setattr(candle_store, 'upsertCandles', upsertCandles)
+
+        checkpoint = get_data.Checkpoint('daily')
+        floatCommitted = checkpoint.getCommitted('AAA-USD')
+        assert os.path.exists(checkpoint.path)
+        assert floatCommitted == candle_store.getLastTime('daily', 'AAA-USD')
+        assert checkpoint.getCommitted('BBB-USD') is None
+
+        # Running again picks up after the committed chunk instead of starting over
+        server.requests.clear()
+        assert get_data.updateData(DAY, 2, baseUrl, bufferSize=251) == []
+        lstStarts = sorted(x[2] for x in server.requests if x[1] == 'AAA-USD')
+    finally:
+        server.shutdown()
+
+    assert lstStarts[0] == floatCommitted + DAY
+    assert not os.path.exists(checkpoint.path)
+    assert readFiles(tmp_path / 'resumed') == readFiles(tmp_path / 'full')
@@ -0,0 +1,58 @@
+import csv, os
+import numpy as np
+import indicators
+
+# The full-series indicators must give exactly the scalar indicator's value at every point, on
+# the reference data in data/ (see the notes above sumWindows in indicators.py).
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# 10-period EMA of data/test-ema.csv as published in the StockCharts EMA worked example (2 d.p.)
+EMA_REFERENCE = [22.22, 22.21, 22.24, 22.27, 22.33, 22.52, 22.80, 22.97, 23.13, 23.28, 23.34,
+                 23.43, 23.51, 23.54, 23.47, 23.40, 23.39, 23.26, 23.23, 23.08, 22.92]
+
+
+def readEMACandles():
+    with open(os.path.join(DATA, 'test-ema.csv'), mode='r', encoding='UTF-8') as file:
+        return list(csv.DictReader(file))
+
+
+def readRSICandles():
+    # test-rsi.csv is a single price column; each candle opens at the previous price
+    with open(os.path.join(DATA, 'test-rsi.csv'), mode='r', encoding='UTF-8') as file:
+        lstPrices = [float(x["price"]) for x in csv.DictReader(file)]
+    return [{"open": x, "close": y} for x, y in zip(lstPrices, lstPrices[1:])]
+
+
+def testEMASeriesMatchesScalar():
+    lstCandles = readEMACandles()
+    lstClose = [float(x["close"]) for x in lstCandles]
+    for timeperiod in [1, 5, 10, 20]:
+        arrEMA = indicators.getEMASeries(lstClose, timeperiod)
+        assert np.isnan(arrEMA[:timeperiod - 1]).all()
+        for i in range(timeperiod - 1, len(lstCandles)):
+            assert arrEMA[i] == indicators.getEMA(lstCandles[:i + 1], timeperiod)
+
+
+def testEMASeriesMatchesReference():
+    lstClose = [float(x["close"]) for x in readEMACandles()]
+    arrEMA = indicators.getEMASeries(lstClose, 10)
+    # The published table rounds each step, so allow for one unit in the last place
+    assert np.allclose(arrEMA[9:], EMA_REFERENCE, rtol=0, atol=0.015)
+
+
+def testRSISeriesMatchesScalar():
+    lstCandles = readRSICandles()
+    lstOpen = [x["open"] for x in lstCandles]
+    lstClose = [x["close"] for x in lstCandles]
+    for timeperiod in [1, 5, 14]:
+        arrRSI = indicators.getRSISeries(lstOpen, lstClose, timeperiod)
+        assert np.isnan(arrRSI[:timeperiod - 1]).all()
+        for i in range(timeperiod - 1, len(lstCandles)):
+            assert arrRSI[i] == indicators.getRSI(lstCandles[:i + 1], timeperiod)
+        assert ((arrRSI[timeperiod - 1:] >= 0) & (arrRSI[timeperiod - 1:] <= 100)).all()
+
+
+def testSeriesTooShort():
+    assert np.isnan(indicators.getEMASeries([1.0, 2.0], 3)).all()
+    assert np.isnan(indicators.getRSISeries([1.0, 2.0], [2.0, 1.0], 3)).all()
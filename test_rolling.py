@@ -0,0 +1,83 @@
+import csv, math, os
+import numpy as np
+import rolling, indicators, build_patterns, benchmark
+
+# The rolling primitives must agree with brute-force windows, and the code moved onto them must
+# reproduce the scalar implementations it replaced (kept in benchmark.py as they were before).
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SIZES = [1, 2, 5, 37, 400]
+WINDOWS = [1, 2, 3, 7, 14, 50]
+
+
+def getRandomWalk(size, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    open = np.concatenate(([100.0], close[:-1]))
+    high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.005, size)))
+    low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.005, size)))
+    return [{"time": 1609459200 + 86400 * i, "low": low[i], "high": high[i], "open": open[i],
+             "close": close[i], "volume": 1.0, "symbol": "SYN-USD"} for i in range(size)]
+
+
+def readDaily(count=5):
+    lstSymbols = sorted(os.listdir(os.path.join(DATA, 'daily')))
+    lstSymbols = [x for x in lstSymbols if x.endswith('.csv')][:count]
+    for name in lstSymbols:
+        with open(os.path.join(DATA, 'daily', name), mode='r', encoding='UTF-8') as file:
+            yield list(csv.DictReader(file))
+
+
+def testRollingSumMatchesBruteForce():
+    rng = np.random.default_rng(1)
+    for size in SIZES:
+        values = rng.normal(0, 1, size)
+        for window in WINDOWS:
+            arrSums = rolling.rollingSum(values, window)
+            assert len(arrSums) == size
+            if window > size:
+                assert np.isnan(arrSums).all()
+                continue
+            assert np.isnan(arrSums[:window - 1]).all()
+            lstExpected = [math.fsum(values[i - window + 1:i + 1]) for i in range(window - 1, size)]
+            assert np.allclose(arrSums[window - 1:], lstExpected, rtol=0, atol=1e-12)
+
+
+def testRollingSumDoesNotDrift():
+    # A long series far from zero: a single running prefix sum loses about 1e-11 relative here
+    values = 1e6 + np.random.default_rng(2).normal(0, 1, 10 ** 6)
+    arrSums = rolling.rollingSum(values, 14)
+    for i in range(13, len(values), 9973):
+        floatExpected = math.fsum(values[i - 13:i + 1])
+        assert abs(arrSums[i] - floatExpected) <= 1e-14 * floatExpected
+
+
+def testRollingMinMaxMatchBruteForce():
+    rng = np.random.default_rng(3)
+    for size in SIZES:
+        # Rounded values so windows contain ties
+        values = np.round(rng.normal(0, 3, size))
+        for window in WINDOWS:
+            arrMin = rolling.rollingMin(values, window)
+            arrMax = rolling.rollingMax(values, window)
+            assert np.isnan(arrMin[:window - 1]).all() and np.isnan(arrMax[:window - 1]).all()
+            for i in range(window - 1, size):
+                assert arrMin[i] == min(values[i - window + 1:i + 1])
+                assert arrMax[i] == max(values[i - window + 1:i + 1])
+
+
+def testSuperTrendMatchesScalar():
+    lstSets = list(readDaily()) + [getRandomWalk(2000, seed) for seed in range(3)]
+    for lstCandles in lstSets:
+        for timeperiod, multiplier in [(10, 3), (7, 2)]:
+            lstExpected = benchmark.scalarSuperTrend(lstCandles, timeperiod, multiplier)
+            lstSuperTrend = indicators.getSuperTrend(lstCandles, timeperiod, multiplier)
+            assert len(lstSuperTrend) == len(lstExpected)
+            assert lstSuperTrend == lstExpected
+
+
+def testWindowScoresMatchScalar():
+    lstSets = list(readDaily()) + [getRandomWalk(2000, seed) for seed in range(3)]
+    for lstCandles in lstSets:
+        for params in [{"Pattern": 6, "Scoring Range": 5}, {"Pattern": 8, "Scoring Range": 3}]:
+            assert build_patterns.getWindowScores(lstCandles, [], params) == benchmark.scalarWindowScores(lstCandles, params)
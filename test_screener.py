@@ -0,0 +1,82 @@
+from datetime import datetime
+import screener, strategies, indicators, candle_series
+from test_rolling import getRandomWalk
+
+# screen() must give each symbol exactly what the per-symbol functions give for the candles up to
+# the screen date, and rank the rows by cross condition and then by RSI distance from 50.
+
+PARAMS = {"Short EMA": 3, "Long EMA": 8, "Trend": 5, "RSI": 6}
+DAY = 86400
+
+
+def getUniverse():
+    # Symbols listed on different days, one that stops trading early and one with too little history
+    dictCandles = {}
+    for i, (intOffset, intSize) in enumerate([(0, 300), (40, 260), (150, 150), (0, 200), (290, 10),
+                                              (5, 295), (60, 240), (0, 300)]):
+        lstCandles = getRandomWalk(intSize, seed=i)
+        for candle in lstCandles:
+            candle["time"] += DAY * intOffset
+            candle["symbol"] = 'S' + str(i) + '-USD'
+        dictCandles['S' + str(i) + '-USD'] = lstCandles
+    return dictCandles
+
+
+def getExpected(dictCandles, intTime):
+    intLookback = max(PARAMS["Long EMA"] + 1, PARAMS["Short EMA"] + 1, PARAMS["Trend"], PARAMS["RSI"])
+    lstRows = []
+    for symbol, lstCandles in dictCandles.items():
+        lstUpTo = [x for x in lstCandles if x["time"] <= intTime]
+        dictRow = {"symbol": symbol, "date": datetime.fromtimestamp(intTime).strftime('%Y-%m-%d'), "close": None,
+                   "code": 0, "condition": None, "rising": None, "falling": None, "rsi": None, "short": None, "long": None}
+        if len(lstUpTo) > intLookback and lstUpTo[-1]["time"] == intTime:
+            lstCross = strategies.checkCross(lstUpTo, PARAMS["Short EMA"], PARAMS["Long EMA"])
+            lstTrend = lstUpTo[len(lstUpTo) - PARAMS["Trend"] - 1:len(lstUpTo) - 1]
+            lstRSI = lstUpTo[len(lstUpTo) - PARAMS["RSI"] - 1:len(lstUpTo) - 1]
+            dictRow.update({"close": float(lstUpTo[-1]["close"]),
+                            "code": 0 if lstCross is None else strategies.CROSS_CONDITIONS.index(lstCross[2]["condition"]),
+                            "condition": None if lstCross is None else lstCross[2]["condition"],
+                            "rising": indicators.risingCheck(lstTrend),
+                            "falling": indicators.fallingCheck(lstTrend),
+                            "rsi": indicators.getRSI(lstRSI, PARAMS["RSI"]),
+                            "short": indicators.getSMA(lstUpTo[len(lstUpTo) - PARAMS["Short EMA"] - 1:len(lstUpTo) - 1]),
+                            "long": indicators.getSMA(lstUpTo[len(lstUpTo) - PARAMS["Long EMA"] - 1:len(lstUpTo) - 1])})
+        lstRows.append(dictRow)
+    return lstRows
+
+
+def getRank(row):
+    return (screener.CONDITION_RANK[row["code"]], -abs(row["rsi"] - 50) if row["rsi"] is not None else 0)
+
+
+def testScreenMatchesPerSymbol():
+    dictCandles = getUniverse()
+    dictSeries = {x: candle_series.CandleSeries.fromDicts(y) for x, y in dictCandles.items()}
+    intFirst = dictCandles['S0-USD'][0]["time"]
+
+    setCodes = set()
+    for intDay in list(range(0, 300, 7)) + [299]:
+        intTime = intFirst + DAY * intDay
+        lstRows = screener.screen(dictSeries, PARAMS, datetime.fromtimestamp(intTime))
+        lstExpected = getExpected(dictCandles, intTime)
+        setCodes |= {x["code"] for x in lstRows}
+
+        # Same row per symbol; short / long are the EMAs of the windows ending the day before
+        dictRows = {x["symbol"]: x for x in lstRows}
+        assert sorted(dictRows) == sorted(dictCandles)
+        for dictExpected in lstExpected:
+            assert dictRows[dictExpected["symbol"]] == dictExpected
+
+        # Ranked: crosses first, then by condition, then the most stretched RSI; ties keep symbol order
+        assert [getRank(x) for x in lstRows] == sorted(getRank(x) for x in lstRows)
+        assert lstRows == sorted(lstExpected, key=getRank)
+
+    # The dates above cover crosses and the states around them
+    assert {strategies.GOLDEN_CROSS, strategies.DEATH_CROSS, 1, 2, 3, 4} <= setCodes
+
+
+def testScreenLatestDate():
+    dictSeries = {x: candle_series.CandleSeries.fromDicts(y) for x, y in getUniverse().items()}
+    intLast = max(int(x.time[-1]) for x in dictSeries.values())
+    assert screener.screen(dictSeries, PARAMS) == screener.screen(dictSeries, PARAMS, datetime.fromtimestamp(intLast))
+    assert screener.screen({}, PARAMS) == []
@@ -0,0 +1,45 @@
+import numpy as np
+import strategies, candle_series
+from test_rolling import getRandomWalk, readDaily
+
+# The whole-history scans must reproduce the per-candle functions they replaced, candle by candle.
+
+
+def getCrossSets():
+    # Flat stretches make the EMAs tie, which exercises the >= / <= edges of checkCross
+    lstFlat = getRandomWalk(300, 7)
+    for candle in lstFlat[100:160]:
+        candle["close"] = 100.0
+    return list(readDaily(2)) + [getRandomWalk(400, seed) for seed in range(3)] + [lstFlat]
+
+
+def testScanCrossesMatchesCheckCross():
+    for lstCandles in getCrossSets():
+        series = candle_series.CandleSeries.fromDicts(lstCandles)
+        for shortwindow, longwindow in [(3, 8), (20, 50)]:
+            dictScan = strategies.scanCrosses(series, shortwindow, longwindow)
+            assert (dictScan["code"][:longwindow + 1] == 0).all()
+
+            # checkCross needs two long windows before the current candle
+            for t in range(longwindow + 1, len(lstCandles)):
+                lstCross = strategies.checkCross(lstCandles[:t + 1], shortwindow, longwindow)
+                strCondition = None if lstCross is None else lstCross[2]["condition"]
+                assert dictScan["condition"][t] == strCondition
+                assert strategies.CROSS_CONDITIONS[dictScan["code"][t]] == strCondition
+                if lstCross is not None:
+                    assert dictScan["short"][t - 1] == lstCross[1]["day2short"]
+                    assert dictScan["long"][t - 1] == lstCross[1]["day2long"]
+                    assert dictScan["short"][t - 2] == lstCross[0]["day1short"]
+
+            assert dictScan["golden"].tolist() == [i for i, x in enumerate(dictScan["condition"]) if x == "GOLDEN CROSS!"]
+            assert dictScan["death"].tolist() == [i for i, x in enumerate(dictScan["condition"]) if x == "DEATH CROSS!"]
+
+
+def testCrossCodesBranches():
+    # One case per checkCross branch, including equal EMAs and the uncovered case (code 0)
+    yesterdayShort = np.array([5.0, 5.0, 1.0, 1.0, 5.0, 1.0, 3.0, 3.0, np.nan])
+    yesterdayLong = np.array([3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0])
+    todayShort = np.array([4.0, 6.0, 2.0, 0.0, 2.0, 4.0, 3.0, 2.0, 3.0])
+    todayLong = np.array([3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0])
+    assert strategies.getCrossCodes(yesterdayShort, yesterdayLong, todayShort, todayLong).tolist() == \
+        [1, 2, 3, 4, strategies.DEATH_CROSS, strategies.GOLDEN_CROSS, 1, 0, 0]
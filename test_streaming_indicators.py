@@ -0,0 +1,90 @@
+import numpy as np
+import indicators, streaming_indicators
+from test_indicators import readEMACandles, readRSICandles
+from test_rolling import getRandomWalk, readDaily
+
+# Fed one candle at a time, every streaming indicator must give exactly the batch value for the
+# candles seen so far, at every step.
+
+
+def getCandleSets():
+    return [readEMACandles()] + list(readDaily(3)) + [getRandomWalk(500, seed) for seed in range(3)]
+
+
+def feed(indicator, lstCandles):
+    lstValues = []
+    for candle in lstCandles:
+        indicator.update(candle)
+        lstValues.append(np.nan if indicator.value is None else indicator.value)
+    return np.array(lstValues)
+
+
+def assertSame(arrStream, arrBatch):
+    assert len(arrStream) == len(arrBatch)
+    assert np.array_equal(arrStream, arrBatch, equal_nan=True)
+
+
+def testSMAMatchesBatch():
+    for lstCandles in getCandleSets():
+        lstClose = [float(x["close"]) for x in lstCandles]
+        for timeperiod in [1, 5, 10, 20]:
+            assertSame(feed(streaming_indicators.SMA(timeperiod), lstCandles), indicators.getSMASeries(lstClose, timeperiod))
+
+
+def testATRMatchesBatch():
+    for lstCandles in getCandleSets():
+        lstHigh = [float(x["high"]) for x in lstCandles]
+        lstLow = [float(x["low"]) for x in lstCandles]
+        for timeperiod in [1, 5, 14]:
+            assertSame(feed(streaming_indicators.ATR(timeperiod), lstCandles), indicators.getATRSeries(lstHigh, lstLow, timeperiod))
+
+
+def testEMAMatchesBatch():
+    for lstCandles in getCandleSets():
+        lstClose = [float(x["close"]) for x in lstCandles]
+        for timeperiod in [1, 5, 10, 20]:
+            assertSame(feed(streaming_indicators.EMA(timeperiod), lstCandles), indicators.getEMASeries(lstClose, timeperiod))
+
+
+def testRSIMatchesBatch():
+    for lstCandles in [readRSICandles()] + getCandleSets():
+        lstOpen = [float(x["open"]) for x in lstCandles]
+        lstClose = [float(x["close"]) for x in lstCandles]
+        for timeperiod in [1, 5, 14]:
+            assertSame(feed(streaming_indicators.RSI(timeperiod), lstCandles), indicators.getRSISeries(lstOpen, lstClose, timeperiod))
+
+
+def testSuperTrendMatchesBatch():
+    for lstCandles in getCandleSets():
+        for timeperiod, multiplier in [(10, 3), (7, 2)]:
+            arrStream = feed(streaming_indicators.SuperTrend(timeperiod, multiplier), lstCandles)
+            # getSuperTrend stops one window short of its last candle, so the stream has one more value
+            arrBatch = indicators.getSuperTrendSeries(lstCandles, timeperiod, multiplier)
+            if len(lstCandles) > timeperiod:
+                assert not np.isnan(arrStream[-1])
+            assertSame(arrStream[:-1], arrBatch[:-1])
+
+
+def testTrendWindowMatchesBatch():
+    for lstCandles in getCandleSets():
+        for length in [1, 3, 5, 12]:
+            trend = streaming_indicators.Trend(length)
+            for i, candle in enumerate(lstCandles):
+                rising, falling = trend.update(candle)
+                lstWindow = lstCandles[max(0, i - length + 1):i + 1]
+                assert rising == indicators.risingCheck(lstWindow)
+                assert falling == indicators.fallingCheck(lstWindow)
+
+
+def testTrendResetMatchesBatch():
+    for lstCandles in getCandleSets():
+        # Without a length the trend covers every candle since the last reset()
+        trend = streaming_indicators.Trend()
+        intStart = 0
+        for i, candle in enumerate(lstCandles):
+            if i % 50 == 0:
+                trend.reset()
+                intStart = i
+            rising, falling = trend.update(candle)
+            assert rising == indicators.risingCheck(lstCandles[intStart:i + 1])
+            assert falling == indicators.fallingCheck(lstCandles[intStart:i + 1])
@@ -0,0 +1,107 @@
+import os, random
+from datetime import datetime, timedelta
+import structure_data, candle_series, candle_store, dataset_cache, mock_exchange
+from test_rolling import readDaily
+
+# Lookups through the newer structures must return exactly what the original list scans did.
+
+
+def getWindowDates(lstCandles):
+    # Candle times, points between candles, and dates before and after the stored history
+    lstTimes = sorted({int(x["time"]) for x in lstCandles})
+    lstDates = [datetime.fromtimestamp(x) for x in lstTimes[::37]]
+    lstDates += [x + timedelta(hours=12) for x in lstDates]
+    return lstDates + [datetime.fromtimestamp(lstTimes[0]) - timedelta(days=3),
+                       datetime.fromtimestamp(lstTimes[-1]) + timedelta(days=3)]
+
+
+def testCandleIndexMatchesSetTradingData():
+    lstCandles = [x for lstSymbol in readDaily(3) for x in lstSymbol]
+    lstSymbols = sorted({x["symbol"] for x in lstCandles}) + ['NONE-USD']
+    index = structure_data.CandleIndex(lstCandles)
+
+    # Built from shuffled candles, the index still returns each window oldest first
+    lstShuffled = list(lstCandles)
+    random.Random(0).shuffle(lstShuffled)
+    shuffledIndex = structure_data.CandleIndex(lstShuffled)
+
+    for symbol in lstSymbols:
+        assert structure_data.setTradingData(index, symbol, None, "ALL") == \
+            structure_data.setTradingData(lstCandles, symbol, None, "ALL")
+        for latestdate in getWindowDates(lstCandles):
+            for timeWindow in [1, 5, 30, 400]:
+                lstExpected = structure_data.setTradingData(lstCandles, symbol, latestdate, timeWindow)
+                assert structure_data.setTradingData(index, symbol, latestdate, timeWindow) == lstExpected
+                assert structure_data.setTradingData(shuffledIndex, symbol, latestdate, timeWindow) == lstExpected
+                assert index.getLast(symbol, latestdate, timeWindow) == \
+                    [x for x in lstCandles if x["symbol"] == symbol and \
+                        datetime.fromtimestamp(int(x["time"])) <= latestdate][-timeWindow:]
+
+
+def testSeriesIndexMatchesSetTradingData():
+    lstCandles = [x for lstSymbol in readDaily(3) for x in lstSymbol]
+    dictSeries = {}
+    for candle in lstCandles:
+        dictSeries.setdefault(candle["symbol"], []).append(candle)
+    index = structure_data.CandleIndex({x: candle_series.CandleSeries.fromDicts(y) for x, y in dictSeries.items()})
+
+    for symbol in dictSeries:
+        for latestdate in getWindowDates(lstCandles):
+            for timeWindow in [1, 30, 400]:
+                series = structure_data.setTradingData(index, symbol, latestdate, timeWindow)
+                assert isinstance(series, candle_series.CandleSeries)
+                lstExpected = structure_data.setTradingData(lstCandles, symbol, latestdate, timeWindow)
+                assert series.time.tolist() == [int(x["time"]) for x in lstExpected]
+                assert series.close.tolist() == [float(x["close"]) for x in lstExpected]
+
+
+def testValidSymbolsFromCatalog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset_cache.invalidate()
+    os.makedirs('data')
+    with open(os.path.join('data', 'symbols.csv'), 'w') as file:
+        file.write('symbol\nAAA-USD\nBBB-USD\nCCC-USD\n')
+    intStart = 1609459200 # 2021-01-01 UTC
+    candle_store.upsertCandles('daily', 'AAA-USD', [mock_exchange.buildCandle('AAA-USD', intStart + 86400 * x) for x in range(400)])
+    candle_store.upsertCandles('daily', 'BBB-USD', [mock_exchange.buildCandle('BBB-USD', intStart + 86400 * x) for x in range(200, 400)])
+
+    # The original scan: each listed symbol's oldest candle, today if it has none
+    lstCandles = structure_data.getDaily()
+    def getExpected(params):
+        dateOldestDate = params["Current Date"] - timedelta(days=int(params["Candles"]))
+        lstValid = []
+        for symbol in structure_data.getSymbols():
+            lstTimes = [datetime.fromtimestamp(int(x["time"])) for x in lstCandles if x["symbol"] == symbol["symbol"]]
+            if min(lstTimes, default=datetime.today()) < dateOldestDate:
+                lstValid.append(symbol["symbol"])
+        return lstValid
+
+    dateCurrent = datetime.fromtimestamp(intStart + 86400 * 399)
+    for intCandles in [10, 150, 199, 200, 201, 398, 399, 400, 1000]:
+        params = {"Current Date": dateCurrent, "Candles": intCandles}
+        assert structure_data.getValidSymbols(params) == getExpected(params)
+    assert structure_data.getValidSymbols({"Current Date": dateCurrent, "Candles": 300}) == ['AAA-USD']
+    dataset_cache.invalidate()
+
+
+def testStreamMinuteFilters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset_cache.invalidate()
+    intStart = 1609459200
+    for symbol, lstMinutes in [('AAA-USD', range(500)), ('BBB-USD', range(100, 300)), ('CCC-USD', range(0, 500, 7))]:
+        candle_store.upsertCandles('minute', symbol, [mock_exchange.buildCandle(symbol, intStart + 60 * x) for x in lstMinutes])
+    lstAll = candle_store.readCandles('minute')
+
+    lstBounds = [None, intStart - 60, intStart, intStart + 60 * 150, intStart + 60 * 150 + 30,
+                 intStart + 60 * 499, intStart + 60 * 600]
+    for symbols in [None, ['AAA-USD'], ['CCC-USD', 'BBB-USD'], ['NONE-USD', 'BBB-USD']]:
+        for start in lstBounds:
+            for end in lstBounds:
+                lstExpected = [x for x in lstAll if (symbols is None or x["symbol"] in symbols) and \
+                    (start is None or int(x["time"]) >= start) and (end is None or int(x["time"]) <= end)]
+                lstBatches = list(structure_data.streamMinute(symbols, start, end, batchSize=64))
+                assert all(0 < len(x) <= 64 for x in lstBatches)
+                assert [x for batch in lstBatches for x in batch] == lstExpected
+                assert structure_data.getMinute(symbols, start, end) == lstExpected
+    assert structure_data.getMinute() == lstAll
+    dataset_cache.invalidate()
@@ -1,8 +1,7 @@
-from cgi import test
-import pandas as pd, numpy as np
+import math
 from datetime import datetime, timedelta
 from volume_accounts import TestAccount
-import volume_execution, time, indicators, structure_data
+import volume_execution, time, indicators, structure_data, candle_series, build_patterns, backtest, strategies
 import time
 
 ####################################
@@ -28,29 +27,64 @@ def runBasicBacktest(account, symbols, params):
         N/A - updates TestAccount object
     '''
 
-    lstData = structure_data.getVolume()
+    dictSeries = structure_data.getVolumeSeries(symbols)
+
+    # Load the pattern signals once for the whole run rather than once per candle
+    params = dict(params, **{"Pattern Index": build_patterns.getPatternIndex(params["Pattern File"], params["Scoring Range"])})
 
     for symbol in symbols:
         
-        # Initialize list of candles based on symbol once per symbol
-        lstCandlesSymbol = [x for x in lstData if x["symbol"] == symbol]
+        # Skip symbols that have no volume candles
+        if symbol not in dictSeries:
+            continue
+        seriesSymbol = dictSeries[symbol]
+
+        # Initialize a window of ATR - 1 candles ending just before candle ATR, so that enough candles
+        # are supplied to generate the ATR calculation in execution
+        windowCandles = candle_series.CandleWindow(seriesSymbol, params["ATR"] - 1, params["ATR"])
         
-        # Set a counter for indexing candles - by default this should be set to the ATR param
-        # so that enough candles are supplied to generate the ATR calculation in execution
-        intCounter = params["ATR"]
+        # Iterate through all candles, executing the strategy without reference to date; the window
+        # slides forward one candle per step without copying
+        while windowCandles.end < len(seriesSymbol):
+            volume_execution.runStrategy(windowCandles, account, params)
+            windowCandles.advance()
 
-        # Initialize the subset of candles starting with first N candles as defined by the ATR window
-        lstCandles = lstCandlesSymbol[:intCounter - 1]
-        
-        # Iterate through all candles, executing the strategy without reference to date
-        while intCounter < len(lstCandlesSymbol):
-            volume_execution.runStrategy(lstCandles, account, params)
-            lstCandles.append(lstCandlesSymbol[intCounter])
-            lstCandles.pop(0)
-            intCounter += 1
 
+def runSignalBacktest(account, symbols, strategy, params):
+    '''
+    Same candle-by-candle walk as runBasicBacktest, but the strategy's signals for each symbol come
+    from one generate_signals call over all of its volume candles
+
+    Args:
+        account (TestAccount): account object to manage trade accounting
+        symbols (lst): list of symbols to take into consideration
+        strategy (object): strategy plugin with generate_signals(series, params), e.g. strategies.STRATEGIES["volume-pattern"]
+        params (dict): set of windows (and pattern file) to be used for generating signals
+
+    Returns:
+        N/A - updates TestAccount object
+    '''
+    if 'volume' not in strategy.datasets:
+        print('runSignalBacktest error: strategy does not run on volume candles, choose one of',
+              strategies.getStrategyNames('volume'))
+        return None
 
-testParams = {"Trade Start": datetime(2021, 3, 6, 23, 59, 59),
+    dictSeries = structure_data.getVolumeSeries(symbols)
+    params = dict(params, **{"Profit Multiple": account.profit_multiple, "Stop Loss": account.stop_loss})
+
+    for symbol in symbols:
+
+        # Skip symbols that have no volume candles
+        if symbol not in dictSeries:
+            continue
+        seriesSymbol = dictSeries[symbol]
+
+        # runBasicBacktest's windows end on candles ATR - 1 through the second to last
+        backtest.applySignals(account, symbol, seriesSymbol, strategy.generate_signals(seriesSymbol, params),
+                              range(params["ATR"] - 1, len(seriesSymbol) - 1))
+
+
+volumeParams = {"Trade Start": datetime(2021, 3, 6, 23, 59, 59),
                 "Current Date": datetime(2021, 3, 6, 23, 59, 59),
                 "Trade End": datetime(2022, 3, 6, 23, 59, 59),
                 "Candles": 210,
@@ -63,15 +97,33 @@ testParams = {"Trade Start": datetime(2021, 3, 6, 23, 59, 59),
                 "Long EMA": 200,
                 "RSI": 14}
 
-accountAlpha = TestAccount(balance = 5000, profit = 4, stoploss = 1.5)
-testSymbols = ["BTC-USD", "ETH-USD", "LTC-USD", "ADA-USD"]
-runBasicBacktest(accountAlpha, testSymbols, testParams)
+volumeSymbols = ["BTC-USD", "ETH-USD", "LTC-USD", "ADA-USD"]
 
-print()
-print("Total Positions:", len(accountAlpha.open_positions))
-print("Final Account Balance:", accountAlpha.balance)
-print("Maximum Account Drawdown:", accountAlpha.max_drawdown)
-print()
+def runVolumeBacktest(params, symbols, strategy=None):
+    '''
+    Runs a fresh TestAccount through the volume-candle backtest and prints a summary
+
+    Args:
+        params (dict): windows and pattern file to test with
+        symbols (lst): list of symbols to backtest
+        strategy (object): strategy plugin to run through runSignalBacktest; volume_execution.runStrategy if None
+
+    Returns:
+        TestAccount: account after the backtest
+    '''
+    accountAlpha = TestAccount(balance = 5000, profit = 4, stoploss = 1.5)
+    if strategy is None:
+        runBasicBacktest(accountAlpha, symbols, params)
+    else:
+        runSignalBacktest(accountAlpha, symbols, strategy, params)
+
+    print()
+    print("Total Positions:", len(accountAlpha.open_positions))
+    print("Final Account Balance:", accountAlpha.balance)
+    print("Maximum Account Drawdown:", accountAlpha.max_drawdown)
+    print()
+
+    return accountAlpha
 
 ##############################
 ### Define scenarios here ####
@@ -178,7 +230,7 @@ scenarios.append(scenario)
 def getSize(paramGrid):
     keys, valuesList = zip(*sorted(paramGrid.items())[::-1])
     sizes = [len(vList) for vList in valuesList]
-    total = np.product(sizes)
+    total = math.prod(sizes)
     return total 
 
 def getItem(paramGrid, ind):
@@ -212,7 +264,7 @@ def getItem(paramGrid, ind):
         # Reverse so most frequent cycling parameter comes first
         keys, valuesList = zip(*sorted(subGrid.items())[::-1])
         sizes = [len(vList) for vList in valuesList]
-        total = np.product(sizes)
+        total = math.prod(sizes)
 
         if ind >= total:
             # Try the next grid
@@ -254,12 +306,12 @@ paramGrid = {"Trade Start": [datetime(2021, 5, 31, 23, 59, 59)],
                 "Current Date": [datetime(2021, 5, 31, 23, 59, 59)],
                 "Trade End": [datetime(2022, 1, 19, 23, 59, 59)],
                 "Candles": [365], # was 210 (i think it's just the max of other params?, for now just setting to 365 even if 365 isnt needed)
-                "Trend": np.arange(4, 7, 1), # was 5
-                "Pattern": np.arange(4, 7, 1), # was 5
-                "ATR": np.arange(7, 22, 7), # was 14
-                "Short EMA": np.arange(10, 50, 10), # was 20
-                "Long EMA": np.arange(100, 301, 50), # was 200
-                "RSI": np.arange(7, 22, 7) # was 14
+                "Trend": list(range(4, 7, 1)), # was 5
+                "Pattern": list(range(4, 7, 1)), # was 5
+                "ATR": list(range(7, 22, 7)), # was 14
+                "Short EMA": list(range(10, 50, 10)), # was 20
+                "Long EMA": list(range(100, 301, 50)), # was 200
+                "RSI": list(range(7, 22, 7)) # was 14
             } 
 
 # RUN THIS SECTION TO RUN HYPERPARAMTER TUNING. HOWEVER IT CAN TAKE A WHILE, SO COMMENTING OUT FOR NOW. 
@@ -416,3 +468,6 @@ for scenarioX in scenarios:# mostRecent30:
 #         curr += granularity
 #         if account.balance < 0.2 * startingBalance: 
 #             break
+
+if __name__ == '__main__':
+    runVolumeBacktest(volumeParams, volumeSymbols)
@@ -1,4 +1,4 @@
-import csv, indicators, volume_accounts, pandas, strategies, build_patterns
+import csv, indicators, volume_accounts, strategies, build_patterns
 from datetime import datetime, timedelta
 
 def runStrategy(candles, account, params):
@@ -7,7 +7,7 @@ def runStrategy(candles, account, params):
     Account is an object class which stores account balance and trading positions.
 
     Args:
-        candles (lst): the total set of data to be considered for the trading strategy ending in the current date
+        candles (lst or CandleSeries): the total set of data to be considered for the trading strategy ending in the current date
         account (TestAccount): TestAccount instance containing balance, holdings, etc.
         params (dict): dictionary of dates and windows relevant to executing the strategy
 
@@ -58,18 +58,20 @@ def runStrategy(candles, account, params):
     floatBuyStopLoss = floatPrice - (floatATR * stopLossMultiple)
     floatShortStopLoss = floatPrice + (floatATR * stopLossMultiple)
 
-    # Read in pattern data
-    reader = csv.DictReader(open(params["Pattern File"], mode='r', encoding='UTF-8'))
-    lstSignals = list(reader)
+    # Pattern signals keyed by encoded sequence - loaded once by the backtest and passed in params,
+    # or read (and cached) here when called on its own
+    dictPatternIndex = params.get("Pattern Index")
+    if dictPatternIndex is None:
+        dictPatternIndex = build_patterns.getPatternIndex(params["Pattern File"], params["Scoring Range"])
 
     # Next, establish the current price patterns by passing the last Pattern-1 values in to be scored
     lstCheck = build_patterns.scoreMovingWindow(candles[len(candles)-params["Pattern"]:len(candles) - 1], params)
     
-    # Then iterate through all signal data to see if a matching pattern exists - since all signal data
-    # is pre-filtered to only be strong buy or sell signals, this enables very simple trading action
-    for item in lstSignals:
+    # Then look up the signal data matching the pattern - since all signal data is pre-filtered to
+    # only be strong buy or sell signals, this enables very simple trading action
+    for item in build_patterns.getPatternSignals(dictPatternIndex, lstCheck["sequence"]):
         
-        if item["sequence"] == str(lstCheck["sequence"]) and item["buy"] > item["short"]:
+        if item["buy"] > item["short"]:
             account.open_position("buy",
                         strSymbol,
                         floatPrice,
@@ -78,7 +80,7 @@ def runStrategy(candles, account, params):
                         floatShortProfitTarget,
                         dateEffective)
         
-        elif item["sequence"] == str(lstCheck["sequence"]) and item["short"] > item["buy"]:
+        elif item["short"] > item["buy"]:
             
             account.open_position("short",
                         strSymbol,